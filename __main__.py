@@ -0,0 +1,15 @@
+# organizador_inteligente/__main__.py
+# -------------------------------------------------------------
+# Permite `python -m organizador ...` sin cargar la interfaz gráfica
+# -------------------------------------------------------------
+
+import os
+import sys
+
+# Igual que main.py: los módulos se importan de forma absoluta
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())
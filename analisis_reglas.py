@@ -0,0 +1,177 @@
+# organizador_inteligente/analisis_reglas.py
+# -------------------------------------------------------------
+# Análisis estático de un conjunto de reglas
+# - Cada regla describe una "caja": extensiones × tamaño en KB × fecha de
+#   modificación, con la misma semántica que ReglaClasificacion.coincide_metadatos.
+# - Como gana la primera regla que coincide, una regla cuya caja queda cubierta
+#   por las anteriores nunca mueve nada (sombreada); una caja vacía, tampoco
+#   (inalcanzable). Las solapadas se reparten archivos con una anterior.
+# - reglas_efectivas() quita las que no pueden coincidir sin cambiar el resultado.
+# -------------------------------------------------------------
+
+import math
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import FrozenSet, List, Optional, Tuple
+
+from models import ReglaClasificacion
+
+# Intervalo cerrado de enteros; None = sin límite
+Intervalo = Tuple[Optional[int], Optional[int]]
+
+# Tope de piezas al restar cajas: por encima no se intenta probar que una regla
+# está sombreada (se la conserva, que nunca cambia el resultado)
+_MAX_PIEZAS = 10_000
+
+
+@dataclass(frozen=True)
+class _Extensiones:
+    """Conjunto de extensiones: las de ``valores`` o, si ``todas``, todas menos esas."""
+    valores: FrozenSet[str]
+    todas: bool = False
+
+    def vacio(self) -> bool:
+        return not self.todas and not self.valores
+
+    def interseccion(self, otro: "_Extensiones") -> "_Extensiones":
+        if self.todas and otro.todas:
+            return _Extensiones(self.valores | otro.valores, True)
+        if self.todas:
+            return _Extensiones(otro.valores - self.valores)
+        if otro.todas:
+            return _Extensiones(self.valores - otro.valores)
+        return _Extensiones(self.valores & otro.valores)
+
+    def complemento(self) -> "_Extensiones":
+        return _Extensiones(self.valores, not self.todas)
+
+
+def _interseccion(a: Intervalo, b: Intervalo) -> Optional[Intervalo]:
+    bajo = b[0] if a[0] is None else a[0] if b[0] is None else max(a[0], b[0])
+    alto = b[1] if a[1] is None else a[1] if b[1] is None else min(a[1], b[1])
+    if bajo is not None and alto is not None and bajo > alto:
+        return None
+    return (bajo, alto)
+
+
+def _diferencia(a: Intervalo, b: Intervalo) -> List[Intervalo]:
+    """Partes de ``a`` fuera de ``b`` (a lo sumo dos)."""
+    if _interseccion(a, b) is None:
+        return [a]
+    partes = []
+    if b[0] is not None and (a[0] is None or a[0] < b[0]):
+        partes.append((a[0], b[0] - 1))
+    if b[1] is not None and (a[1] is None or a[1] > b[1]):
+        partes.append((b[1] + 1, a[1]))
+    return partes
+
+
+@dataclass(frozen=True)
+class _Caja:
+    extensiones: _Extensiones
+    tam_kb: Intervalo
+    fecha: Intervalo  # ordinales de date
+
+    def interseccion(self, otra: "_Caja") -> Optional["_Caja"]:
+        ext = self.extensiones.interseccion(otra.extensiones)
+        tam = _interseccion(self.tam_kb, otra.tam_kb)
+        fecha = _interseccion(self.fecha, otra.fecha)
+        if ext.vacio() or tam is None or fecha is None:
+            return None
+        return _Caja(ext, tam, fecha)
+
+    def menos(self, otra: "_Caja") -> List["_Caja"]:
+        """Partición de lo que queda de esta caja fuera de ``otra``."""
+        comun = self.interseccion(otra)
+        if comun is None:
+            return [self]
+        partes = []
+        fuera = self.extensiones.interseccion(otra.extensiones.complemento())
+        if not fuera.vacio():
+            partes.append(_Caja(fuera, self.tam_kb, self.fecha))
+        for tam in _diferencia(self.tam_kb, otra.tam_kb):
+            partes.append(_Caja(comun.extensiones, tam, self.fecha))
+        for fecha in _diferencia(self.fecha, otra.fecha):
+            partes.append(_Caja(comun.extensiones, comun.tam_kb, fecha))
+        return partes
+
+
+def _ordinal(valor: Optional[str]) -> Optional[int]:
+    return datetime.fromisoformat(valor).date().toordinal() if valor else None
+
+
+def caja_de(regla: ReglaClasificacion) -> Optional[_Caja]:
+    """Archivos que la regla acepta, o None si no acepta ninguno."""
+    try:
+        fecha = (_ordinal(regla.fecha_desde), _ordinal(regla.fecha_hasta))
+        extensiones = (
+            _Extensiones(frozenset(e.lower().lstrip(".") for e in regla.extensiones))
+            if regla.extensiones else _Extensiones(frozenset(), True)
+        )
+        # El tamaño se compara en KB enteros y nunca es negativo
+        tam = (
+            max(0, math.ceil(regla.tam_min_kb)) if regla.tam_min_kb is not None else 0,
+            math.floor(regla.tam_max_kb) if regla.tam_max_kb is not None else None,
+        )
+    except (AttributeError, TypeError, ValueError):
+        return None  # coincide_metadatos falla con cualquier archivo: nunca coincide
+    if _interseccion(tam, tam) is None or _interseccion(fecha, fecha) is None:
+        return None
+    return _Caja(extensiones, tam, fecha)
+
+
+@dataclass
+class Hallazgo:
+    tipo: str  # "inalcanzable", "sombreada" o "solapada"
+    indice: int
+    regla: str
+    anteriores: List[str] = field(default_factory=list)
+
+    @property
+    def mensaje(self) -> str:
+        if self.tipo == "inalcanzable":
+            return f"«{self.regla}» no puede coincidir con ningún archivo (límites contradictorios o fecha inválida)"
+        otras = ", ".join(f"«{n}»" for n in self.anteriores)
+        if self.tipo == "sombreada":
+            return f"«{self.regla}» nunca se aplica: todos sus archivos los toma antes {otras}"
+        if len(self.anteriores) == 1:
+            return f"«{self.regla}» comparte archivos con {otras}, que va antes y se los queda"
+        return f"«{self.regla}» comparte archivos con {otras}, que van antes y se los quedan"
+
+
+def analizar(reglas: List[ReglaClasificacion]) -> List[Hallazgo]:
+    """Reglas inalcanzables, sombreadas por las anteriores y solapadas con alguna anterior."""
+    hallazgos: List[Hallazgo] = []
+    previas: List[Tuple[ReglaClasificacion, _Caja]] = []
+    for i, regla in enumerate(reglas):
+        caja = caja_de(regla)
+        if caja is None:
+            hallazgos.append(Hallazgo("inalcanzable", i, regla.nombre))
+            continue
+        resto: Optional[List[_Caja]] = [caja]
+        implicadas = []
+        for anterior, caja_anterior in previas:
+            if caja.interseccion(caja_anterior) is None:
+                continue
+            implicadas.append(anterior)
+            if resto is not None:
+                resto = [parte for r in resto for parte in r.menos(caja_anterior)]
+                if len(resto) > _MAX_PIEZAS:
+                    resto = None
+        if implicadas:
+            # Con destino igual, compartir archivos no cambia dónde terminan
+            distintas = [r.nombre for r in implicadas if r.destino_subcarpeta != regla.destino_subcarpeta]
+            if resto == []:
+                # Ya cubierta por las anteriores: no hace falta compararla con las siguientes
+                hallazgos.append(Hallazgo("sombreada", i, regla.nombre, [r.nombre for r in implicadas]))
+                continue
+            if distintas:
+                hallazgos.append(Hallazgo("solapada", i, regla.nombre, distintas))
+        previas.append((regla, caja))
+    return hallazgos
+
+
+def reglas_efectivas(reglas: List[ReglaClasificacion]) -> List[ReglaClasificacion]:
+    """Las reglas sin las inalcanzables ni las sombreadas (mismas decisiones, menos evaluaciones)."""
+    muertas = {h.indice for h in analizar(reglas) if h.tipo != "solapada"}
+    return [r for i, r in enumerate(reglas) if i not in muertas]
@@ -8,6 +8,7 @@ from pathlib import Path
 import json
 import hashlib
 import re
+import threading
 from database import db_manager
 
 class AuthManager:
@@ -19,8 +20,15 @@ class AuthManager:
         self.is_login_view = True
         self.is_recovery_view = False
         self.current_user = None
+        # Reglas, configuraciones y resumen del historial traídos junto con el login
+        self.datos_sesion = None
         
-        # Conectar a la base de datos
+        # Conectar a la base de datos en segundo plano: la pantalla de login no la
+        # necesita para mostrarse y la primera consulta espera a esta conexión.
+        threading.Thread(target=self._conectar_bd, name="conexion-bd", daemon=True).start()
+
+    def _conectar_bd(self):
+        """Abre la conexión a MySQL y avisa si falla."""
         if not db_manager.connect():
             self.page.show_snack_bar(ft.SnackBar(
                 content=ft.Text("Error al conectar con la base de datos"),
@@ -320,18 +328,11 @@ class AuthManager:
             self.page.update()
             return
 
-        # Autenticar con la base de datos
-        user = db_manager.authenticate_user(email, password)
-        if user:
-            self.message_text.value = "✅ Inicio de sesión exitoso"
-            self.message_text.color = ft.colors.GREEN
-            self.page.update()
-            
-            # Pequeña pausa para mostrar el mensaje de éxito
-            import time
-            time.sleep(1)
-            
-            self.current_user = user
+        # Autenticar y traer los datos de arranque de la sesión en un solo viaje
+        datos = db_manager.bootstrap_session(email, password)
+        if datos:
+            self.datos_sesion = datos
+            self.current_user = datos["usuario"]
             self.page.clean()
             self.on_login_success()
         else:
@@ -388,14 +389,11 @@ class AuthManager:
 
         # Registrar usuario en la base de datos
         if db_manager.create_user(username, cedula, email, password):
-            self.message_text.value = "✅ Registro exitoso. Redirigiendo..."
+            # Cambiar a vista de login y avisar allí del registro
+            self._switch_view(None)
+            self.message_text.value = "✅ Registro exitoso. Ya puedes iniciar sesión"
             self.message_text.color = ft.colors.GREEN
             self.page.update()
-            
-            # Cambiar a vista de login después de registro exitoso
-            import time
-            time.sleep(1)
-            self._switch_view(None)
         else:
             self.message_text.value = "❌ Error al registrar usuario"
             self.message_text.color = ft.colors.RED
@@ -457,14 +455,11 @@ class AuthManager:
         hashed_password = self._hash_password(new_password)
         query = "UPDATE Usuarios SET contrasena_hash = %s WHERE id_usuario = %s"
         if db_manager.execute_query(query, (hashed_password, user['id_usuario'])):
-            self.message_text.value = "✅ Contraseña actualizada exitosamente. Redirigiendo al login..."
+            # Cambiar a vista de login y avisar allí de la recuperación
+            self._switch_to_login()
+            self.message_text.value = "✅ Contraseña actualizada exitosamente"
             self.message_text.color = ft.colors.GREEN
             self.page.update()
-            
-            # Cambiar a vista de login después de recuperación exitosa
-            import time
-            time.sleep(2)
-            self._switch_to_login()
         else:
             self.message_text.value = "❌ Error al actualizar la contraseña"
             self.message_text.color = ft.colors.RED
@@ -0,0 +1,365 @@
+# organizador_inteligente/benchmarks/ejecutar.py
+# -------------------------------------------------------------
+# Benchmarks de los servicios sobre árboles sintéticos
+# - Cada caso corre en un proceso nuevo con su propio árbol, para
+#   que el pico de memoria y los contadores de E/S sean propios.
+# - Mide archivos/s, llamadas de lectura/escritura (/proc/self/io)
+#   y RSS máximo; con --auditar también mkdir/rename/scandir/...
+#   Guarda el resultado en JSON para compararlo.
+#
+# Uso:
+#   python benchmarks/ejecutar.py --archivos 20000 --reglas 20
+#   python benchmarks/ejecutar.py --comparar benchmarks/resultados/anterior.json
+# -------------------------------------------------------------
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+RAIZ_PROYECTO = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ_PROYECTO))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from generador import ParametrosArbol, carpeta_temporal_rapida, generar_arbol
+
+CASOS = ("coincide", "reglas", "reglas_vectorizado", "tabla", "basico", "avanzado", "avanzado_procesos",
+         "detectar_vacias", "eliminar_vacias")
+
+
+# ----- Medición -----
+def _leer_io() -> Dict[str, int]:
+    """Contadores de /proc/self/io (solo Linux); vacío en otras plataformas."""
+    try:
+        with open("/proc/self/io") as f:
+            return {k: int(v) for k, v in (linea.split(":") for linea in f)}
+    except OSError:
+        return {}
+
+
+def _reiniciar_pico_rss() -> bool:
+    """Reinicia VmHWM para medir el pico solo del caso; False si el sistema no lo permite."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _pico_rss_kb(reiniciado: bool) -> int:
+    if reiniciado:
+        with open("/proc/self/status") as f:
+            for linea in f:
+                if linea.startswith("VmHWM:"):
+                    return int(linea.split()[1])
+    # ru_maxrss: KB en Linux, bytes en macOS; incluye la generación del árbol
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico // 1024 if sys.platform == "darwin" else pico
+
+
+def _instalar_auditoria() -> Dict[str, int]:
+    """Cuenta eventos de auditoría del sistema operativo (os.*, open, shutil.*).
+
+    Complementa /proc/self/io, que solo cuenta lecturas y escrituras: así se ven
+    también mkdir, rename, scandir, etc. Un hook no se puede quitar, por eso
+    solo se instala en el proceso desechable de cada caso.
+    """
+    conteo: Dict[str, int] = {}
+
+    def hook(evento, _args):
+        if evento.startswith(("os.", "shutil.")) or evento == "open":
+            conteo[evento] = conteo.get(evento, 0) + 1
+
+    sys.addaudithook(hook)
+    return conteo
+
+
+def _medir(funcion: Callable[[], int], auditar: bool = False) -> Dict[str, Any]:
+    conteo = _instalar_auditoria() if auditar else None
+    reiniciado = _reiniciar_pico_rss()
+    io_antes = _leer_io()
+    uso_antes = resource.getrusage(resource.RUSAGE_SELF)
+    cpu_antes = time.process_time()
+    inicio = time.perf_counter()
+    if conteo is not None:
+        conteo.clear()
+    unidades = funcion()
+    segundos = time.perf_counter() - inicio
+    llamadas = dict(conteo) if conteo is not None else None
+    cpu = time.process_time() - cpu_antes
+    uso = resource.getrusage(resource.RUSAGE_SELF)
+    io_despues = _leer_io()
+    resultado = {
+        "unidades": unidades,
+        "segundos": round(segundos, 4),
+        "por_segundo": round(unidades / segundos, 1) if segundos > 0 else None,
+        "cpu_segundos": round(cpu, 4),
+        "cambios_contexto": (uso.ru_nvcsw - uso_antes.ru_nvcsw) + (uso.ru_nivcsw - uso_antes.ru_nivcsw),
+        "rss_pico_kb": _pico_rss_kb(reiniciado),
+    }
+    for clave in ("syscr", "syscw", "rchar", "wchar"):
+        if clave in io_despues:
+            resultado[clave] = io_despues[clave] - io_antes.get(clave, 0)
+    if llamadas is not None:
+        resultado["llamadas_os"] = dict(sorted(llamadas.items()))
+        resultado["llamadas_os_total"] = sum(llamadas.values())
+    return resultado
+
+
+# ----- Casos -----
+def reglas_sinteticas(cantidad: int, semilla: int):
+    """Reglas variadas (extensiones, tamaños y fechas) para la clasificación avanzada."""
+    import random
+    from models import ReglaClasificacion
+    rnd = random.Random(semilla)
+    extensiones = ["jpg", "png", "pdf", "docx", "xlsx", "txt", "mp3", "mp4", "zip", "py"]
+    hoy = date.today()
+    reglas = []
+    for i in range(cantidad):
+        regla = ReglaClasificacion(
+            nombre=f"regla_{i}",
+            destino_subcarpeta=f"R{i}",
+            extensiones=rnd.sample(extensiones, rnd.randint(1, 3)),
+        )
+        if rnd.random() < 0.5:
+            regla.tam_min_kb = rnd.choice([10, 100, 1000])
+        if rnd.random() < 0.3:
+            regla.tam_max_kb = rnd.choice([500, 5000, 50000])
+        if rnd.random() < 0.3:
+            regla.fecha_desde = (hoy - timedelta(days=rnd.randint(30, 700))).isoformat()
+        reglas.append(regla)
+    return reglas
+
+
+def _bytes_por_archivo(construir: Callable[[], Any], n: int) -> float:
+    """Memoria que sigue viva tras ``construir()`` (tracemalloc), dividida por ``n``."""
+    import tracemalloc
+    tracemalloc.start()
+    try:
+        objeto = construir()
+        usado = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del objeto
+    return round(usado / max(1, n), 1)
+
+
+def _ejecutar_caso(caso: str, parametros: Dict[str, Any], n_reglas: int, procesos: int,
+                   auditar: bool) -> Dict[str, Any]:
+    """Corre un caso en el proceso actual (llamado dentro de un proceso nuevo)."""
+    from repositories import RepositorioHistorialNulo
+    from services import ServicioCarpetas, ServicioClasificacion
+
+    p = ParametrosArbol(**parametros)
+    raiz = carpeta_temporal_rapida()
+    try:
+        resumen = generar_arbol(raiz, p)
+        reglas = reglas_sinteticas(n_reglas, p.semilla)
+        repo = RepositorioHistorialNulo()
+        extra: Dict[str, Any] = {}
+
+        if caso == "coincide":
+            archivos = [a for a in raiz.rglob("*") if a.is_file()]
+
+            def funcion():
+                for archivo in archivos:
+                    for regla in reglas:
+                        if regla.coincide(archivo):
+                            break
+                return len(archivos)
+        elif caso in ("reglas", "reglas_vectorizado"):
+            # Solo la evaluación de reglas sobre metadatos ya leídos, por lotes como en avanzado
+            from config import CLASIFICACION_TAM_LOTE
+            from evaluacion import compilar_vectorizado, evaluar_lote
+            registros = [r for lote in ServicioClasificacion(repo)._lotes_por_carpeta(raiz) for r in lote]
+            evaluador = compilar_vectorizado(reglas) if caso == "reglas_vectorizado" else None
+            extra["vectorizado"] = evaluador is not None  # False si falta numpy
+
+            def funcion():
+                for i in range(0, len(registros), CLASIFICACION_TAM_LOTE):
+                    evaluar_lote(reglas, registros[i:i + CLASIFICACION_TAM_LOTE], evaluador=evaluador)
+                return len(registros)
+        elif caso == "tabla":
+            # Recorrido a una TablaArchivos y cuánto ocupa cada archivo frente a
+            # listas de Path, de RegistroArchivo y de tuplas (origen, destino, regla)
+            from tabla_archivos import TablaArchivos, TablaMovimientos
+
+            def escanear():
+                tabla = TablaArchivos()
+                for dirpath, _dirnames, filenames in os.walk(raiz):
+                    id_carpeta = tabla.carpeta(dirpath)
+                    for nombre in filenames:
+                        st = os.stat(os.path.join(dirpath, nombre))
+                        tabla.agregar_en(id_carpeta, nombre, st.st_size, st.st_mtime)
+                return tabla
+
+            tabla = escanear()
+            n = len(tabla)
+            destinos = [os.path.join(raiz, "R0", tabla.nombre(i)) for i in range(n)]
+
+            def movimientos_tabla():
+                movidos = TablaMovimientos()
+                for i, destino in enumerate(destinos):
+                    movidos.agregar(tabla.ruta(i), destino, "regla_0")
+                return movidos
+
+            extra["bytes_por_archivo"] = {
+                "tabla": _bytes_por_archivo(escanear, n),
+                "registros": _bytes_por_archivo(lambda: list(tabla.registros()), n),
+                "path": _bytes_por_archivo(lambda: [Path(r) for r in tabla], n),
+                "movimientos_tabla": _bytes_por_archivo(movimientos_tabla, n),
+                "movimientos_tuplas": _bytes_por_archivo(
+                    lambda: [(tabla.ruta(i), d, "regla_0") for i, d in enumerate(destinos)], n
+                ),
+            }
+            del tabla, destinos
+
+            def funcion():
+                return len(escanear())
+        elif caso == "basico":
+            def funcion():
+                return ServicioClasificacion(repo).clasificar_basico(raiz)["archivos_procesados"]
+        elif caso in ("avanzado", "avanzado_procesos"):
+            n = procesos if caso == "avanzado_procesos" else 0
+
+            def funcion():
+                detalle = ServicioClasificacion(repo).clasificar_avanzado(raiz, reglas, procesos=n)
+                return detalle["archivos_procesados"]
+        elif caso == "detectar_vacias":
+            def funcion():
+                ServicioCarpetas(repo).detectar_vacias(raiz)
+                return resumen["carpetas"]
+        elif caso == "eliminar_vacias":
+            servicio = ServicioCarpetas(repo)
+            vacias = servicio.detectar_vacias(raiz)
+
+            def funcion():
+                return len(servicio.eliminar_vacias(vacias))
+        else:
+            raise ValueError(f"Caso desconocido: {caso}")
+
+        resultado = {"caso": caso, "arbol": resumen, "sistema_archivos": str(raiz.parent), **extra}
+        resultado.update(_medir(funcion, auditar))
+        return resultado
+    finally:
+        shutil.rmtree(raiz, ignore_errors=True)
+
+
+def ejecutar(casos: List[str], parametros: ParametrosArbol, n_reglas: int, procesos: int,
+             repeticiones: int, auditar: bool = False) -> Dict[str, Any]:
+    """Corre cada caso ``repeticiones`` veces, cada vez en un proceso nuevo."""
+    contexto = multiprocessing.get_context("spawn")
+    resultados = []
+    for caso in casos:
+        for rep in range(repeticiones):
+            with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as pool:
+                resultado = pool.submit(
+                    _ejecutar_caso, caso, parametros.como_dict(), n_reglas, procesos, auditar
+                ).result()
+            resultado["repeticion"] = rep
+            resultados.append(resultado)
+            print(f"{caso:<20} {resultado['segundos']:>9.3f}s {resultado['por_segundo'] or 0:>12.1f}/s "
+                  f"rss={resultado['rss_pico_kb']} KB syscr={resultado.get('syscr', '-')} "
+                  f"syscw={resultado.get('syscw', '-')}", file=sys.stderr)
+    return {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+        "parametros": parametros.como_dict(),
+        "reglas": n_reglas,
+        "procesos": procesos,
+        "auditado": auditar,
+        "resultados": resultados,
+    }
+
+
+# ----- Comparación -----
+def _mejor_por_caso(informe: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    mejores: Dict[str, Dict[str, Any]] = {}
+    for r in informe["resultados"]:
+        actual = mejores.get(r["caso"])
+        if actual is None or r["segundos"] < actual["segundos"]:
+            mejores[r["caso"]] = r
+    return mejores
+
+
+def comparar(anterior: Dict[str, Any], actual: Dict[str, Any], tolerancia: float) -> List[str]:
+    """Devuelve los casos cuyo tiempo empeoró más que ``tolerancia`` (fracción)."""
+    antes, ahora = _mejor_por_caso(anterior), _mejor_por_caso(actual)
+    regresiones = []
+    for caso, r in ahora.items():
+        if caso not in antes:
+            continue
+        cambio = (r["segundos"] - antes[caso]["segundos"]) / max(antes[caso]["segundos"], 1e-9)
+        marca = "REGRESIÓN" if cambio > tolerancia else ""
+        print(f"{caso:<20} {antes[caso]['segundos']:>9.3f}s -> {r['segundos']:>9.3f}s "
+              f"({cambio:+.1%}) {marca}", file=sys.stderr)
+        if marca:
+            regresiones.append(caso)
+    return regresiones
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks del Organizador Inteligente")
+    parser.add_argument("--casos", default=",".join(CASOS), help="casos separados por coma")
+    parser.add_argument("--archivos", type=int, default=10_000)
+    parser.add_argument("--profundidad", type=int, default=3)
+    parser.add_argument("--ramas", type=int, default=5)
+    parser.add_argument("--vacias", type=float, default=0.2, help="proporción de carpetas hoja vacías")
+    parser.add_argument("--tam-mediana-kb", type=float, default=200.0)
+    parser.add_argument("--antiguedad-dias", type=int, default=730)
+    parser.add_argument("--mezcla", type=json.loads, default=None,
+                        help='pesos de extensión en JSON, p. ej. \'{"jpg": 5, "": 1}\'')
+    parser.add_argument("--semilla", type=int, default=1234)
+    parser.add_argument("--reglas", type=int, default=20)
+    parser.add_argument("--procesos", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--repeticiones", type=int, default=1)
+    parser.add_argument("--auditar", action="store_true",
+                        help="contar llamadas al sistema operativo (añade algo de sobrecarga)")
+    parser.add_argument("--salida", type=Path, default=None)
+    parser.add_argument("--comparar", type=Path, default=None, help="informe JSON anterior")
+    parser.add_argument("--tolerancia", type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    casos = [c.strip() for c in args.casos.split(",") if c.strip()]
+    desconocidos = set(casos) - set(CASOS)
+    if desconocidos:
+        parser.error(f"casos desconocidos: {', '.join(sorted(desconocidos))}")
+    parametros = ParametrosArbol(
+        profundidad=args.profundidad, ramas=args.ramas, archivos=args.archivos,
+        tam_mediana_kb=args.tam_mediana_kb, antiguedad_max_dias=args.antiguedad_dias,
+        proporcion_vacias=args.vacias, semilla=args.semilla,
+    )
+    if args.mezcla is not None:
+        parametros.mezcla = args.mezcla
+
+    informe = ejecutar(casos, parametros, args.reglas, args.procesos, args.repeticiones, args.auditar)
+    salida = args.salida or (
+        Path(__file__).resolve().parent / "resultados" / f"bench_{datetime.now():%Y%m%d_%H%M%S}.json"
+    )
+    salida.parent.mkdir(parents=True, exist_ok=True)
+    with open(salida, "w", encoding="utf-8") as f:
+        json.dump(informe, f, ensure_ascii=False, indent=2)
+    print(salida)
+
+    if args.comparar:
+        with open(args.comparar, "r", encoding="utf-8") as f:
+            anterior = json.load(f)
+        if comparar(anterior, informe, args.tolerancia):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
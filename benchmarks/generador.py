@@ -0,0 +1,95 @@
+# organizador_inteligente/benchmarks/generador.py
+# -------------------------------------------------------------
+# Generador de árboles de archivos sintéticos y reproducibles
+# - Profundidad, ramificación, cantidad de archivos, mezcla de
+#   extensiones, distribución de tamaños y fechas configurables.
+# - Los archivos se crean dispersos (truncate): ocupan metadatos,
+#   no memoria, incluso en tmpfs.
+# -------------------------------------------------------------
+
+import math
+import os
+import random
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List
+
+# Peso relativo de cada extensión; "" = sin extensión, "xyz" = desconocida
+MEZCLA_POR_DEFECTO: Dict[str, float] = {
+    "jpg": 20, "png": 8, "pdf": 10, "docx": 6, "xlsx": 4, "txt": 8,
+    "mp3": 6, "mp4": 4, "zip": 4, "py": 6, "": 2, "xyz": 2,
+}
+
+
+@dataclass
+class ParametrosArbol:
+    profundidad: int = 3
+    ramas: int = 5                    # subcarpetas por carpeta
+    archivos: int = 10_000
+    mezcla: Dict[str, float] = field(default_factory=lambda: dict(MEZCLA_POR_DEFECTO))
+    tam_mediana_kb: float = 200.0     # tamaños con distribución log-normal
+    tam_sigma: float = 1.5
+    tam_max_kb: int = 512 * 1024
+    antiguedad_max_dias: int = 730    # mtime uniforme en este intervalo
+    proporcion_vacias: float = 0.2    # carpetas hoja sin archivos
+    semilla: int = 1234
+
+    def como_dict(self) -> Dict:
+        return asdict(self)
+
+
+def carpeta_temporal_rapida() -> Path:
+    """tmpfs si existe (/dev/shm), si no la carpeta temporal del sistema."""
+    shm = Path("/dev/shm")
+    base = shm if shm.is_dir() and os.access(shm, os.W_OK) else Path(tempfile.gettempdir())
+    return Path(tempfile.mkdtemp(prefix="organizador_bench_", dir=base))
+
+
+def _carpetas(raiz: Path, profundidad: int, ramas: int) -> List[Path]:
+    carpetas = [raiz]
+    nivel = [raiz]
+    for d in range(profundidad):
+        siguiente = []
+        for padre in nivel:
+            for i in range(ramas):
+                siguiente.append(padre / f"n{d}_{i}")
+        carpetas.extend(siguiente)
+        nivel = siguiente
+    return carpetas
+
+
+def generar_arbol(raiz: Path, p: ParametrosArbol) -> Dict[str, int]:
+    """Crea el árbol en ``raiz`` y devuelve un resumen (carpetas, vacías, archivos, bytes)."""
+    rnd = random.Random(p.semilla)
+    carpetas = _carpetas(Path(raiz), p.profundidad, p.ramas)
+    for carpeta in carpetas:
+        carpeta.mkdir(parents=True, exist_ok=True)
+
+    hojas = [c for c in carpetas if c.parts[-1].startswith(f"n{p.profundidad - 1}_")] if p.profundidad else []
+    vacias = set(rnd.sample(hojas, int(len(hojas) * p.proporcion_vacias)))
+    con_archivos = [c for c in carpetas if c not in vacias]
+
+    extensiones = list(p.mezcla)
+    pesos = [p.mezcla[e] for e in extensiones]
+    mu = math.log(max(p.tam_mediana_kb, 0.001) * 1024)
+    ahora = time.time()
+    total_bytes = 0
+    for i in range(p.archivos):
+        carpeta = con_archivos[rnd.randrange(len(con_archivos))]
+        ext = rnd.choices(extensiones, pesos)[0]
+        nombre = f"f{i}.{ext}" if ext else f"f{i}"
+        ruta = carpeta / nombre
+        tam = min(int(rnd.lognormvariate(mu, p.tam_sigma)), p.tam_max_kb * 1024)
+        with open(ruta, "wb") as f:
+            f.truncate(tam)
+        mtime = ahora - rnd.uniform(0, p.antiguedad_max_dias * 86400)
+        os.utime(ruta, (mtime, mtime))
+        total_bytes += tam
+    return {
+        "carpetas": len(carpetas),
+        "carpetas_vacias": len(vacias),
+        "archivos": p.archivos,
+        "bytes": total_bytes,
+    }
@@ -0,0 +1,392 @@
+# organizador_inteligente/cli.py
+# -------------------------------------------------------------
+# Interfaz de línea de comandos (sin Flet)
+# - Pensada para cron y servidores: salida JSON en stdout.
+# - Los módulos de servicios se importan solo al ejecutar un comando.
+# -------------------------------------------------------------
+
+import argparse
+import json
+import signal
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from config import HISTORIAL_RETENCION_DIAS, MOVIMIENTOS_LIMITE_BUSQUEDA, ruta_reglas_json
+
+
+def _imprimir(datos: Any):
+    """Escribe el resultado como JSON en una sola línea."""
+    json.dump(datos, sys.stdout, ensure_ascii=False, default=str)
+    sys.stdout.write("\n")
+    sys.stdout.flush()
+
+
+def _error(mensaje: str, codigo: int = 1) -> int:
+    _imprimir({"error": mensaje})
+    return codigo
+
+
+def _resolver_usuario(valor: Optional[str]) -> Optional[int]:
+    """Acepta un id_usuario numérico o un correo electrónico."""
+    if not valor:
+        return None
+    if valor.isdigit():
+        return int(valor)
+    from database import db_manager
+    usuario = db_manager.get_user_by_email(valor)
+    if not usuario:
+        raise LookupError(f"No existe el usuario {valor}")
+    return usuario["id_usuario"]
+
+
+def _carpeta(valor: str) -> Path:
+    """Tipo de argparse: carpeta existente."""
+    ruta = Path(valor)
+    if not ruta.is_dir():
+        raise argparse.ArgumentTypeError(f"no es una carpeta: {valor}")
+    return ruta
+
+
+def _repositorio(user_id: Optional[int]):
+    if user_id is None:
+        from repositories import RepositorioHistorialNulo
+        return RepositorioHistorialNulo()
+    from repositories import RepositorioHistorial
+    return RepositorioHistorial(user_id)
+
+
+def _cargar_reglas(args, user_id: Optional[int]):
+    """Reglas desde un archivo JSON (--reglas) o desde la base de datos del usuario."""
+    from models import ReglaClasificacion
+    if args.reglas is not None:
+        ruta = Path(args.reglas) if args.reglas else ruta_reglas_json()
+        with open(ruta, "r", encoding="utf-8") as f:
+            return [ReglaClasificacion(**r) for r in json.load(f)]
+    if user_id is None:
+        raise ValueError("Indica --reglas ARCHIVO.json o --usuario para leer las reglas de la base de datos")
+    from services import ServicioReglas
+    return ServicioReglas(user_id).cargar()
+
+
+def _almacen_huellas(args):
+    """Almacén de huellas salvo que se pida --sin-cache."""
+    if getattr(args, "sin_cache", False):
+        return None
+    from huellas import AlmacenHuellas
+    return AlmacenHuellas()
+
+
+def _detector_contenido(args):
+    """Detector por contenido si se pidió --contenido."""
+    if not getattr(args, "contenido", False):
+        return None
+    from contenido import DetectorContenido
+    return DetectorContenido()
+
+
+def _token_con_sigint():
+    """Token cancelado por la primera Ctrl+C; la segunda interrumpe de inmediato."""
+    from tareas import TokenCancelacion
+    token = TokenCancelacion()
+
+    def manejar(signum, frame):
+        if token.cancelado:
+            raise KeyboardInterrupt
+        token.cancelar()
+
+    signal.signal(signal.SIGINT, manejar)
+    return token
+
+
+# ----- Comandos -----
+def _cmd_basico(args, user_id) -> Dict[str, Any]:
+    from services import ServicioClasificacion
+    almacen = _almacen_huellas(args) if args.duplicados != "renombrar" else None
+    servicio = ServicioClasificacion(_repositorio(user_id), duplicados=args.duplicados, almacen_huellas=almacen,
+                                     detector_contenido=_detector_contenido(args))
+    try:
+        return servicio.clasificar_basico(args.fuente, args.destino, token=_token_con_sigint())
+    finally:
+        if almacen:
+            almacen.cerrar()
+
+
+def _cmd_avanzado(args, user_id) -> Dict[str, Any]:
+    from services import ServicioClasificacion
+    reglas = _cargar_reglas(args, user_id)
+    almacen = _almacen_huellas(args) if args.duplicados != "renombrar" else None
+    servicio = ServicioClasificacion(_repositorio(user_id), duplicados=args.duplicados, almacen_huellas=almacen,
+                                     detector_contenido=_detector_contenido(args))
+    try:
+        return servicio.clasificar_avanzado(
+            args.fuente, reglas, args.destino, token=_token_con_sigint(),
+            procesos=args.procesos, tam_lote=args.tam_lote,
+        )
+    finally:
+        if almacen:
+            almacen.cerrar()
+
+
+def _cmd_detectar_vacias(args, user_id) -> Dict[str, Any]:
+    from services import ServicioCarpetas
+    servicio = ServicioCarpetas(_repositorio(user_id))
+    token = _token_con_sigint()
+    vacias = servicio.detectar_vacias(args.carpeta, args.excluir, token=token)
+    return {
+        "carpetas_vacias": [str(c) for c in vacias],
+        "total": len(vacias),
+        "estado": "cancelado" if token.cancelado else "completado",
+    }
+
+
+def _cmd_eliminar_vacias(args, user_id) -> Dict[str, Any]:
+    from services import ServicioCarpetas
+    servicio = ServicioCarpetas(_repositorio(user_id))
+    token = _token_con_sigint()
+    vacias, escaneo_s = servicio.detectar_vacias_con_tiempo(args.carpeta, args.excluir, token=token)
+    eliminadas = servicio.eliminar_vacias(vacias, token=token, escaneo_s=escaneo_s)
+    return {
+        "carpetas_eliminadas": [str(c) for c in eliminadas],
+        "total": len(eliminadas),
+        "estado": "cancelado" if token.cancelado else "completado",
+    }
+
+
+def _cmd_duplicados(args, user_id) -> Dict[str, Any]:
+    from services import ServicioDuplicados
+    almacen = _almacen_huellas(args)
+    try:
+        servicio = ServicioDuplicados(hilos=args.hilos, almacen=almacen)
+        grupos = servicio.buscar(args.carpeta, args.excluir, token=_token_con_sigint())
+    finally:
+        if almacen:
+            almacen.cerrar()
+    resultado = {
+        "grupos": [[str(r) for r in g] for g in grupos],
+        "total_grupos": len(grupos),
+        "archivos_redundantes": sum(len(g) - 1 for g in grupos),
+    }
+    if almacen:
+        resultado["huellas"] = {"aciertos": almacen.aciertos, "calculadas": almacen.fallos}
+    return resultado
+
+
+def _cmd_analizar_reglas(args, user_id) -> List[Dict[str, Any]]:
+    from analisis_reglas import analizar
+    return [
+        {"tipo": h.tipo, "regla": h.regla, "posicion": h.indice + 1, "anteriores": h.anteriores, "mensaje": h.mensaje}
+        for h in analizar(_cargar_reglas(args, user_id))
+    ]
+
+
+def _cmd_historial(args, user_id) -> List[Dict[str, Any]]:
+    if user_id is None:
+        raise ValueError("El historial requiere --usuario")
+    repo = _repositorio(user_id)
+    if args.buscar_archivado is not None:
+        return repo.buscar_archivado(args.buscar_archivado, args.limite)
+    return repo.listar(args.limite, incluir_archivado=args.archivado)
+
+
+def _cmd_buscar(args, user_id) -> List[Dict[str, Any]]:
+    if user_id is None:
+        raise ValueError("La búsqueda requiere --usuario")
+    return _repositorio(user_id).buscar_movimientos(args.texto, args.limite)
+
+
+def _cmd_exportar(args, user_id) -> Dict[str, Any]:
+    if user_id is None:
+        raise ValueError("La exportación requiere --usuario")
+    from exportacion import ExportadorHistorial
+    return ExportadorHistorial(user_id).exportar(
+        args.archivo, movimientos=not args.sin_movimientos, incluir_archivado=args.archivado,
+        token=_token_con_sigint(),
+    )
+
+
+def _cmd_archivar(args, user_id) -> Dict[str, Any]:
+    if user_id is None and not args.todos:
+        raise ValueError("Archivar requiere --usuario (o --todos para el historial de todos los usuarios)")
+    if user_id is not None and args.todos:
+        raise ValueError("--todos no se combina con --usuario")
+    from retencion import ArchivoHistorial
+    return ArchivoHistorial().archivar(user_id, dias=args.dias, token=_token_con_sigint(), todos=args.todos)
+
+
+def _cmd_resumen(args, user_id) -> Dict[str, Any]:
+    if user_id is None:
+        raise ValueError("El resumen requiere --usuario")
+    from datetime import datetime
+    repo = _repositorio(user_id)
+    desde = datetime.strptime(args.desde, "%Y-%m-%d") if args.desde else None
+    return {
+        "totales": repo.totales(desde),
+        "por_mes": repo.por_mes(args.meses),
+        "acumulado": repo.estadisticas(),
+    }
+
+
+def _cmd_migrar(args, user_id) -> Dict[str, Any]:
+    from database import db_manager
+    return {
+        "columnas_agregadas": db_manager.migrar_historial(),
+        "tablas_estadisticas_creadas": db_manager.migrar_estadisticas(),
+        "tabla_movimientos_creada": db_manager.migrar_movimientos(),
+    }
+
+
+def _cmd_vigilar(args, user_id) -> Dict[str, Any]:
+    from services import ServicioClasificacion
+    from vigilancia import VigilanteCarpetas
+    reglas = _cargar_reglas(args, user_id)
+    vigilante = VigilanteCarpetas(
+        ServicioClasificacion(_repositorio(user_id), detector_contenido=_detector_contenido(args)),
+        args.carpeta, reglas, args.destino,
+        recursiva=args.recursiva, forzar_sondeo=args.sondeo,
+    )
+    totales = {"lotes": 0, "archivos_movidos": 0}
+
+    def al_clasificar(detalle):
+        totales["lotes"] += 1
+        totales["archivos_movidos"] += detalle["archivos_movidos"]
+        _imprimir(detalle)
+
+    vigilante.ejecutar(_token_con_sigint(), al_clasificar)
+    return {"modo": vigilante.modo, **totales}
+
+
+def construir_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="organizador",
+        description="Organizador Inteligente sin interfaz gráfica (salida JSON).",
+    )
+    parser.add_argument("--usuario", help="id_usuario o correo; sin él no se registra historial")
+    parser.add_argument("--metricas-puerto", type=int, default=None, metavar="PUERTO",
+                        help="publicar métricas de Prometheus en http://127.0.0.1:PUERTO/metrics")
+    parser.add_argument("--metricas-archivo", type=Path, default=None, metavar="ARCHIVO",
+                        help="escribir métricas periódicamente en ARCHIVO (textfile collector)")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    def con_duplicados(p):
+        p.add_argument("--duplicados", choices=("renombrar", "omitir", "cuarentena"), default="renombrar",
+                       help="qué hacer si el destino ya tiene un archivo idéntico")
+        p.add_argument("--sin-cache", action="store_true", help="no usar el almacén de huellas")
+
+    def con_contenido(p):
+        p.add_argument("--contenido", action="store_true",
+                       help="detectar el tipo por los primeros bytes si la extensión falta o no coincide")
+
+    def con_reglas(p):
+        p.add_argument("--reglas", nargs="?", const="", default=None, metavar="ARCHIVO",
+                       help="reglas en JSON (sin valor: el archivo de reglas de la aplicación)")
+
+    p = sub.add_parser("basico", help="clasificar por tipo de extensión")
+    p.add_argument("fuente", type=_carpeta)
+    p.add_argument("--destino", type=Path)
+    con_duplicados(p)
+    con_contenido(p)
+    p.set_defaults(funcion=_cmd_basico)
+
+    p = sub.add_parser("avanzado", help="clasificar con reglas personalizadas")
+    p.add_argument("fuente", type=_carpeta)
+    p.add_argument("--destino", type=Path)
+    p.add_argument("--procesos", type=int, default=None, help="procesos para evaluar reglas (0 = ninguno)")
+    p.add_argument("--tam-lote", type=int, default=None)
+    con_duplicados(p)
+    con_contenido(p)
+    con_reglas(p)
+    p.set_defaults(funcion=_cmd_avanzado)
+
+    for nombre, funcion, ayuda in (
+        ("detectar-vacias", _cmd_detectar_vacias, "listar carpetas vacías"),
+        ("eliminar-vacias", _cmd_eliminar_vacias, "detectar y eliminar carpetas vacías"),
+    ):
+        p = sub.add_parser(nombre, help=ayuda)
+        p.add_argument("carpeta", type=_carpeta)
+        p.add_argument("--excluir", type=lambda v: [x.strip() for x in v.split(",") if x.strip()],
+                       default=[], help="nombres de carpetas separados por coma")
+        p.set_defaults(funcion=funcion)
+
+    p = sub.add_parser("duplicados", help="buscar archivos con contenido idéntico")
+    p.add_argument("carpeta", type=_carpeta)
+    p.add_argument("--excluir", type=lambda v: [x.strip() for x in v.split(",") if x.strip()], default=[])
+    p.add_argument("--hilos", type=int, default=4)
+    p.add_argument("--sin-cache", action="store_true", help="no usar el almacén de huellas")
+    p.set_defaults(funcion=_cmd_duplicados)
+
+    p = sub.add_parser("analizar-reglas", help="reglas sombreadas, solapadas o que nunca pueden coincidir")
+    con_reglas(p)
+    p.set_defaults(funcion=_cmd_analizar_reglas)
+
+    p = sub.add_parser("historial", help="listar el historial del usuario")
+    p.add_argument("--limite", type=int, default=200)
+    p.add_argument("--archivado", action="store_true", help="completar con el historial archivado")
+    p.add_argument("--buscar-archivado", metavar="TEXTO", help="buscar TEXTO solo en el historial archivado")
+    p.set_defaults(funcion=_cmd_historial)
+
+    p = sub.add_parser("buscar", help="dónde quedó un archivo: busca en los movimientos registrados")
+    p.add_argument("texto", help="nombre del archivo o parte de su ruta")
+    p.add_argument("--limite", type=int, default=MOVIMIENTOS_LIMITE_BUSQUEDA)
+    p.set_defaults(funcion=_cmd_buscar)
+
+    p = sub.add_parser("exportar", help="exportar el historial del usuario a CSV o JSONL (.gz opcional)")
+    p.add_argument("archivo", type=Path, help="p. ej. historial.csv, historial.jsonl.gz")
+    p.add_argument("--sin-movimientos", action="store_true", help="no exportar los movimientos de archivos")
+    p.add_argument("--archivado", action="store_true", help="incluir el historial archivado")
+    p.set_defaults(funcion=_cmd_exportar)
+
+    p = sub.add_parser("archivar", help="pasar el historial antiguo del --usuario a archivos comprimidos "
+                                        "en este equipo (las filas se borran de la base)")
+    p.add_argument("--dias", type=int, default=HISTORIAL_RETENCION_DIAS,
+                   help=f"antigüedad mínima en días (por defecto {HISTORIAL_RETENCION_DIAS})")
+    p.add_argument("--todos", action="store_true",
+                   help="archivar el historial de todos los usuarios (en lugar de --usuario)")
+    p.set_defaults(funcion=_cmd_archivar)
+
+    p = sub.add_parser("resumen", help="totales del historial del usuario (sumados en la base de datos)")
+    p.add_argument("--desde", help="fecha AAAA-MM-DD desde la que sumar los totales")
+    p.add_argument("--meses", type=int, default=6, help="meses del desglose mensual")
+    p.set_defaults(funcion=_cmd_resumen)
+
+    p = sub.add_parser("migrar", help="agregar columnas y tablas nuevas a una base existente")
+    p.set_defaults(funcion=_cmd_migrar)
+
+    p = sub.add_parser("vigilar", help="clasificar continuamente los archivos nuevos de una carpeta")
+    p.add_argument("carpeta", type=_carpeta)
+    p.add_argument("--destino", type=Path)
+    p.add_argument("--recursiva", action="store_true")
+    p.add_argument("--sondeo", action="store_true", help="forzar el modo de sondeo (sin inotify)")
+    con_contenido(p)
+    con_reglas(p)
+    p.set_defaults(funcion=_cmd_vigilar)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Punto de entrada de ``python -m organizador``."""
+    args = construir_parser().parse_args(argv)
+    servidor = escritor = None
+    try:
+        if args.metricas_puerto is not None or args.metricas_archivo is not None:
+            import metricas
+            if args.metricas_puerto is not None:
+                servidor = metricas.iniciar_servidor(args.metricas_puerto)
+            if args.metricas_archivo is not None:
+                escritor = metricas.EscritorTextfile(args.metricas_archivo)
+        user_id = _resolver_usuario(args.usuario)
+        _imprimir(args.funcion(args, user_id))
+        return 0
+    except KeyboardInterrupt:
+        return _error("Interrumpido", 130)
+    except (OSError, ValueError, LookupError, TypeError) as e:
+        return _error(str(e))
+    finally:
+        if escritor is not None:
+            escritor.detener()
+        if servidor is not None:
+            servidor.shutdown()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,6 +3,7 @@
 # Configuraciones y constantes del aplicativo
 # -------------------------------------------------------------
 
+from functools import lru_cache
 from pathlib import Path
 
 APP_NOMBRE = "Organizador Inteligente"
@@ -12,8 +13,9 @@ def ruta_home() -> Path:
     """Obtiene la ruta del directorio home del usuario."""
     return Path.home()
 
+@lru_cache(maxsize=None)
 def ruta_datos_app() -> Path:
-    """Obtiene o crea la ruta de datos de la aplicación."""
+    """Obtiene o crea la ruta de datos de la aplicación (las carpetas se crean una vez por proceso)."""
     base = ruta_home() / APP_CARPETA_DATOS
     base.mkdir(parents=True, exist_ok=True)
     (base / "cuarentena").mkdir(parents=True, exist_ok=True)
@@ -24,6 +26,14 @@ def ruta_bd() -> Path:
     """Obtiene la ruta de la base de datos SQLite."""
     return ruta_datos_app() / "historial.sqlite3"
 
+def ruta_huellas() -> Path:
+    """Obtiene la ruta del almacén local de huellas (hashes) de archivos."""
+    return ruta_datos_app() / "huellas.sqlite3"
+
+def ruta_historial_archivado() -> Path:
+    """Obtiene la ruta de los archivos comprimidos con historial antiguo (uno por usuario y mes)."""
+    return ruta_datos_app() / "historial_archivado"
+
 def ruta_reglas_json() -> Path:
     """Obtiene la ruta del archivo JSON de reglas."""
     return ruta_datos_app() / "config" / "reglas.json"
@@ -41,6 +51,46 @@ CATEGORIAS = {
     "ejecutables": ["exe", "msi", "bat", "sh", "apk"],
 }
 
+# Clasificación avanzada en paralelo: 0 procesos = evaluación en el proceso actual
+CLASIFICACION_PROCESOS = 0
+CLASIFICACION_TAM_LOTE = 500  # registros de archivo por lote enviado a cada proceso
+CLASIFICACION_VECTORIZADA = True   # con numpy instalado, evaluar las reglas por lotes como máscaras
+CLASIFICACION_VECTORIZADA_MIN = 256  # registros mínimos por lote para que compense
+PERFIL_REGLAS_EJECUCIONES = 10  # ejecuciones recientes sumadas en las cifras de la tabla de reglas
+
+# Detección de duplicados
+DUPLICADOS_BLOQUE = 64 * 1024   # bytes leídos al inicio y al final en el hash parcial
+DUPLICADOS_HILOS = 4            # hilos de hashing en paralelo
+HUELLAS_MAX_MEMORIA = 100_000   # huellas retenidas en memoria (LRU)
+HUELLAS_LOTE_ESCRITURA = 500    # cambios acumulados antes de escribir en SQLite
+
+# Detección por contenido (firmas al inicio del archivo)
+CONTENIDO_BYTES = 512           # bytes leídos por archivo (incluye la firma "ustar" de tar)
+CONTENIDO_HILOS = 8             # lecturas en paralelo
+CONTENIDO_CACHE = 50_000        # resultados retenidos por (ruta, tamaño, mtime)
+
+# Exportación de métricas (Prometheus)
+METRICAS_INTERVALO_TEXTFILE_S = 15.0  # cada cuánto se reescribe el archivo de métricas
+
+# Retención del historial (las filas antiguas pasan a archivos .jsonl.gz)
+HISTORIAL_RETENCION_DIAS = 180  # antigüedad a partir de la cual se archiva
+HISTORIAL_LOTE_ARCHIVO = 1000   # filas leídas, escritas y borradas por vuelta
+
+# Índice de movimientos (búsqueda de "¿dónde quedó este archivo?")
+MOVIMIENTOS_LOTE = 1000         # filas por INSERT al guardar los movimientos de una ejecución
+MOVIMIENTOS_LIMITE_BUSQUEDA = 100  # resultados mostrados por búsqueda
+
+# Exportación del historial (CSV/JSONL, opcionalmente .gz)
+EXPORTACION_LOTE = 1000         # filas pedidas al servidor por vuelta (cursor sin búfer)
+
+# Lista de carpetas vacías en la interfaz
+VACIAS_POR_PAGINA = 100         # filas dibujadas a la vez (el resto solo vive en memoria)
+
+# Vigilancia de carpetas (clasificación incremental)
+VIGILANCIA_DEBOUNCE_S = 2.0        # segundos sin cambios antes de clasificar un archivo
+VIGILANCIA_MAX_LOTE = 200          # archivos por lote de clasificación
+VIGILANCIA_INTERVALO_SONDEO_S = 5.0  # solo en modo sondeo (sin inotify)
+
 EXCLUSIONES_POR_DEFECTO = {
     ".git", "__pycache__", ".venv", ".vscode", ".idea", "node_modules",
 }
@@ -0,0 +1,148 @@
+# organizador_inteligente/contenido.py
+# -------------------------------------------------------------
+# Detección del tipo de archivo por su contenido (firmas "mágicas")
+# - Lee solo los primeros bytes de cada archivo (un read al abrirlo).
+# - Lecturas en paralelo en un pool de hilos.
+# - Caché por (ruta, tamaño, mtime, categoría por extensión) con límite LRU,
+#   consultada con los metadatos del recorrido antes de abrir el archivo.
+# -------------------------------------------------------------
+
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from config import CONTENIDO_BYTES, CONTENIDO_CACHE, CONTENIDO_HILOS
+
+# (desplazamiento, firma, categoría, fuerte)
+# Las firmas débiles (pocos bytes o ambiguas) solo se usan si la extensión no
+# tiene categoría; las fuertes también corrigen extensiones engañosas.
+FIRMAS: Sequence[Tuple[int, bytes, str, bool]] = (
+    (0, b"%PDF-", "documentos_pdf", True),
+    (0, b"{\\rtf", "documentos_texto", True),
+    (0, b"\x89PNG\r\n\x1a\n", "imagenes", True),
+    (0, b"\xff\xd8\xff", "imagenes", True),
+    (0, b"GIF87a", "imagenes", True),
+    (0, b"GIF89a", "imagenes", True),
+    (0, b"II*\x00", "imagenes", True),
+    (0, b"MM\x00*", "imagenes", True),
+    (0, b"BM", "imagenes", False),
+    (0, b"\x1a\x45\xdf\xa3", "videos", True),
+    (0, b"FLV\x01", "videos", True),
+    (0, b"\x30\x26\xb2\x75\x8e\x66\xcf\x11", "videos", True),
+    (0, b"fLaC", "audios", True),
+    (0, b"OggS", "audios", True),
+    (0, b"ID3", "audios", True),
+    (0, b"\xff\xfb", "audios", False),
+    (0, b"\xff\xf3", "audios", False),
+    (0, b"\xff\xf1", "audios", False),
+    (0, b"Rar!\x1a\x07", "comprimidos", True),
+    (0, b"7z\xbc\xaf\x27\x1c", "comprimidos", True),
+    (0, b"\x1f\x8b", "comprimidos", True),
+    (257, b"ustar", "comprimidos", True),
+    (0, b"MZ", "ejecutables", True),
+    (0, b"\x7fELF", "ejecutables", True),
+)
+
+# Contenedores genéricos: si la extensión es de la misma familia se respeta
+_ZIP = b"PK\x03\x04"
+_OLE = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+_FAMILIA_ZIP = {"docx", "xlsx", "pptx", "apk", "zip"}
+_FAMILIA_OLE = {"doc", "xls", "ppt", "msi"}
+
+# Subtipos de RIFF y de ISO base media (ftyp)
+_RIFF = {b"WEBP": "imagenes", b"AVI ": "videos", b"WAVE": "audios"}
+_FTYP_AUDIO = (b"M4A ", b"M4B ", b"M4P ")
+_FTYP_IMAGEN = (b"heic", b"heix", b"mif1", b"avif")
+
+
+def detectar(cabecera: bytes, ext: str, categoria_ext: Optional[str]) -> Optional[str]:
+    """Categoría según el contenido, o None si no hay una firma concluyente."""
+    if cabecera.startswith(_ZIP):
+        return categoria_ext if ext in _FAMILIA_ZIP else "comprimidos"
+    if cabecera.startswith(_OLE):
+        # doc/xls/ppt/msi comparten formato: sin la extensión no se puede distinguir
+        return categoria_ext if ext in _FAMILIA_OLE else None
+    if cabecera.startswith(b"RIFF") and len(cabecera) >= 12:
+        return _RIFF.get(cabecera[8:12])
+    if cabecera[4:8] == b"ftyp":
+        marca = cabecera[8:12]
+        if marca in _FTYP_AUDIO:
+            return "audios"
+        if marca in _FTYP_IMAGEN:
+            return "imagenes"
+        return "videos"
+    for desplazamiento, firma, categoria, fuerte in FIRMAS:
+        if cabecera[desplazamiento:desplazamiento + len(firma)] == firma:
+            if fuerte or categoria_ext is None:
+                return categoria
+            return None
+    return None
+
+
+class DetectorContenido:
+    """Clasifica por contenido con lecturas parciales en paralelo y caché por ruta y metadatos."""
+    def __init__(self, hilos: int = CONTENIDO_HILOS, max_cache: int = CONTENIDO_CACHE,
+                 bytes_leidos: int = CONTENIDO_BYTES):
+        self.hilos = hilos
+        self.max_cache = max_cache
+        self.bytes_leidos = bytes_leidos
+        self.lecturas = 0
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[Tuple[str, int, float, Optional[str]], Optional[str]]" = OrderedDict()
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def _detectar_archivo(self, ruta: str, ext: str, categoria_ext: Optional[str],
+                          clave: Tuple[str, int, float, Optional[str]]) -> Optional[str]:
+        try:
+            # O_BINARY (solo Windows) evita que la lectura traduzca saltos de línea
+            fd = os.open(ruta, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+        except OSError:
+            return None
+        try:
+            # Recién abierto, el descriptor está en el byte 0 (os.pread no existe en Windows)
+            cabecera = os.read(fd, self.bytes_leidos)
+        except OSError:
+            return None
+        finally:
+            os.close(fd)
+        categoria = detectar(cabecera, ext, categoria_ext)
+        with self._lock:
+            self.lecturas += 1
+            self._cache[clave] = categoria
+            while len(self._cache) > self.max_cache:
+                self._cache.popitem(last=False)
+        return categoria
+
+    def categorias(self, archivos: List[Tuple[str, str, Optional[str], int, float]]) -> Dict[str, Optional[str]]:
+        """Detecta un lote de (ruta, extensión, categoría por extensión, tamaño, mtime).
+
+        Devuelve ruta -> categoría. Los aciertos de la caché se resuelven con el
+        tamaño y el mtime del recorrido, sin abrir ni consultar el archivo.
+        """
+        salida: Dict[str, Optional[str]] = {}
+        pendientes = []
+        with self._lock:
+            for ruta, ext, categoria_ext, tam, mtime in archivos:
+                clave = (ruta, tam, mtime, categoria_ext)
+                if clave in self._cache:
+                    self._cache.move_to_end(clave)
+                    salida[ruta] = self._cache[clave]
+                else:
+                    pendientes.append((ruta, ext, categoria_ext, clave))
+            if not pendientes:
+                return salida
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.hilos)
+            # Se encola con el lock tomado para que cerrar() no apague el pool entremedio
+            resultados = self._pool.map(lambda a: self._detectar_archivo(*a), pendientes)
+        salida.update((a[0], categoria) for a, categoria in zip(pendientes, resultados))
+        return salida
+
+    def cerrar(self):
+        """Libera el pool de hilos (se vuelve a crear si se detecta otro lote); la caché se conserva."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
@@ -3,13 +3,103 @@
 # Configuración y conexión a la base de datos MySQL
 # -------------------------------------------------------------
 
-import mysql.connector
-from mysql.connector import Error
 import json
+import os
+import re
+import threading
 from datetime import datetime
-from typing import List, Dict, Any, Optional, Tuple
+from itertools import islice
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
 import hashlib
+import time
+from config import EXPORTACION_LOTE, MOVIMIENTOS_LOTE
 from db_config import DB_CONFIG
+from metricas import BD_ERRORES, BD_SEGUNDOS, BD_SENTENCIA_SEGUNDOS
+
+# mysql.connector se importa en la primera conexión (tarda en cargarse y la
+# pantalla de login no lo necesita). Hasta entonces ``Error`` es un marcador
+# que ninguna consulta puede lanzar; luego pasa a ser mysql.connector.Error.
+class Error(Exception):
+    """Marcador de mysql.connector.Error antes de cargar el conector."""
+
+_conector = None
+
+# Códigos de error de MySQL que indican un esquema sin migrar (no un fallo pasajero)
+ER_BAD_FIELD_ERROR = 1054
+ER_NO_SUCH_TABLE = 1146
+ER_SP_DOES_NOT_EXIST = 1305
+
+
+def _cargar_conector():
+    """Importa mysql.connector una sola vez y publica su clase Error en este módulo."""
+    global _conector, Error
+    if _conector is None:
+        import mysql.connector
+        Error = mysql.connector.Error
+        _conector = mysql.connector
+    return _conector
+
+# Sentencias frecuentes: se preparan en el servidor una vez por conexión y se
+# reutilizan (ejecutar_sentencia); solo se envían los parámetros en cada llamada.
+SENTENCIAS: Dict[str, str] = {
+    "usuario_por_correo": "SELECT * FROM Usuarios WHERE correo_electronico = %s",
+    "agregar_historial": """
+        INSERT INTO Historial (id_usuario, tipo, fecha, detalle, ruta_cuarentena,
+                               archivos_movidos, bytes_movidos, carpetas_eliminadas, duracion_ms, estado)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """,
+    # Esquema anterior a las columnas numéricas (ver migrar_historial)
+    "agregar_historial_basico": """
+        INSERT INTO Historial (id_usuario, tipo, fecha, detalle, ruta_cuarentena)
+        VALUES (%s, %s, %s, %s, %s)
+    """,
+    "historial_usuario": """
+        SELECT * FROM Historial
+        WHERE id_usuario = %s
+        ORDER BY fecha DESC
+        LIMIT %s
+    """,
+    # Clasificaciones con perfil de reglas (el patrón LIKE va como parámetro)
+    "perfiles_reglas": """
+        SELECT detalle FROM Historial
+        WHERE id_usuario = %s AND tipo = 'organizar' AND detalle LIKE %s
+        ORDER BY id_accion DESC
+        LIMIT %s
+    """,
+    "config_usuario": "SELECT valor FROM Configuraciones WHERE id_usuario = %s AND clave = %s",
+    "sumar_estadisticas": """
+        INSERT INTO EstadisticasUsuario (id_usuario, ejecuciones, archivos_organizados,
+                                         bytes_organizados, carpetas_eliminadas, ultima_ejecucion)
+        VALUES (%s, 1, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            ejecuciones = ejecuciones + 1,
+            archivos_organizados = archivos_organizados + VALUES(archivos_organizados),
+            bytes_organizados = bytes_organizados + VALUES(bytes_organizados),
+            carpetas_eliminadas = carpetas_eliminadas + VALUES(carpetas_eliminadas),
+            ultima_ejecucion = VALUES(ultima_ejecucion)
+    """,
+    "sumar_categoria": """
+        INSERT INTO EstadisticasCategoria (id_usuario, categoria, archivos)
+        VALUES (%s, %s, %s)
+        ON DUPLICATE KEY UPDATE archivos = archivos + VALUES(archivos)
+    """,
+    "estadisticas_usuario": "SELECT * FROM EstadisticasUsuario WHERE id_usuario = %s",
+    "estadisticas_categorias": """
+        SELECT categoria, archivos FROM EstadisticasCategoria
+        WHERE id_usuario = %s
+        ORDER BY archivos DESC
+    """,
+}
+
+# Columnas numéricas de Historial (copias tipadas de campos del detalle JSON)
+TIPOS_COLUMNAS_HISTORIAL: Dict[str, str] = {
+    "archivos_movidos": "INTEGER",
+    "bytes_movidos": "BIGINT",
+    "carpetas_eliminadas": "INTEGER",
+    "duracion_ms": "INTEGER",
+    "estado": "VARCHAR(20)",
+}
+COLUMNAS_HISTORIAL: Tuple[str, ...] = tuple(TIPOS_COLUMNAS_HISTORIAL)
 
 class DatabaseManager:
     """Maneja la conexión y operaciones con la base de datos MySQL."""
@@ -17,30 +107,71 @@ class DatabaseManager:
     def __init__(self):
         self.connection = None
         self.config = DB_CONFIG
+        # Una sola conexión compartida: las consultas de distintos hilos se serializan
+        self._lock = threading.RLock()
+        # Se desactiva si sp_arranque_sesion no está instalado en el servidor
+        self._procedimiento_arranque = True
+        # Se desactiva si Historial aún no tiene las columnas numéricas
+        self._columnas_historial = True
+        # Se desactiva si no existen las tablas EstadisticasUsuario/EstadisticasCategoria
+        self._tablas_estadisticas = True
+        # Se desactiva si no existe la tabla Movimientos
+        self._tabla_movimientos = True
+        # errno del último Error de MySQL (None si la última operación no falló);
+        # quien lo consulta debe tener el candado desde la llamada que lo produjo
+        self._ultimo_errno: Optional[int] = None
+        # Cursores preparados de la conexión actual, por nombre de sentencia
+        self._preparados: Dict[str, Any] = {}
+        # nombre -> [llamadas, errores, segundos]
+        self._estadisticas: Dict[str, List[float]] = {}
     
     def connect(self):
         """Establece conexión con la base de datos."""
-        try:
-            self.connection = mysql.connector.connect(**self.config)
-            if self.connection.is_connected():
-                print("Conexión exitosa a MySQL")
-                return True
-        except Error as e:
-            print(f"Error al conectar a MySQL: {e}")
-            return False
+        with self._lock:
+            try:
+                conector = _cargar_conector()
+                self._preparados = {}
+                self.connection = conector.connect(**self.config)
+                if self.connection.is_connected():
+                    print("Conexión exitosa a MySQL")
+                    return True
+            except ImportError as e:
+                print(f"Error al conectar a MySQL: falta mysql-connector-python ({e})")
+                return False
+            except Error as e:
+                print(f"Error al conectar a MySQL: {e}")
+                return False
+    
+    def conectado(self) -> bool:
+        """Indica si hay una conexión abierta (sin intentar conectar)."""
+        return bool(self.connection and self.connection.is_connected())
+    
+    def _asegurar_conexion(self) -> bool:
+        """Conecta si aún no hay conexión; devuelve si quedó conectada."""
+        if self.conectado():
+            return True
+        return bool(self.connect())
     
     def disconnect(self):
         """Cierra la conexión con la base de datos."""
-        if self.connection and self.connection.is_connected():
-            self.connection.close()
-            print("Conexión a MySQL cerrada")
+        with self._lock:
+            self._cerrar_preparados()
+            if self.connection and self.connection.is_connected():
+                self.connection.close()
+                print("Conexión a MySQL cerrada")
     
     def execute_query(self, query: str, params: Tuple = None, fetch: bool = False):
         """Ejecuta una consulta SQL."""
+        with self._lock:
+            return self._ejecutar(query, params, fetch)
+    
+    def _ejecutar(self, query: str, params: Tuple, fetch: bool):
+        self._ultimo_errno = None
         try:
-            if not self.connection or not self.connection.is_connected():
-                self.connect()
+            if not self._asegurar_conexion():
+                return None
             
+            inicio = time.perf_counter()
             cursor = self.connection.cursor(dictionary=True)
             cursor.execute(query, params)
             
@@ -51,15 +182,170 @@ class DatabaseManager:
                 result = cursor.lastrowid
             
             cursor.close()
+            BD_SEGUNDOS.observe(time.perf_counter() - inicio, "lectura" if fetch else "escritura")
             return result
         except Error as e:
+            self._ultimo_errno = getattr(e, "errno", None)
+            BD_ERRORES.inc()
             print(f"Error ejecutando consulta: {e}")
             return None
     
+    def ejecutar_sentencia(self, nombre: str, params: Tuple = (), fetch: bool = False, commit: bool = True):
+        """Ejecuta una sentencia de ``SENTENCIAS`` con su cursor preparado (filas dict o lastrowid).
+
+        Con ``commit=False`` la escritura queda en la transacción abierta (la confirma quien llama).
+        """
+        with self._lock:
+            estadisticas = self._estadisticas.setdefault(nombre, [0, 0, 0.0])
+            self._ultimo_errno = None
+            try:
+                if not self._asegurar_conexion():
+                    return None
+                inicio = time.perf_counter()
+                cursor = self._preparados.get(nombre)
+                if cursor is None:
+                    cursor = self._preparados[nombre] = self.connection.cursor(prepared=True)
+                cursor.execute(SENTENCIAS[nombre], params)
+                if fetch:
+                    columnas = cursor.column_names
+                    result = [dict(zip(columnas, fila)) for fila in cursor.fetchall()]
+                else:
+                    if commit:
+                        self.connection.commit()
+                    result = cursor.lastrowid
+                segundos = time.perf_counter() - inicio
+                estadisticas[0] += 1
+                estadisticas[2] += segundos
+                BD_SENTENCIA_SEGUNDOS.observe(segundos, nombre)
+                BD_SEGUNDOS.observe(segundos, "lectura" if fetch else "escritura")
+                return result
+            except Error as e:
+                self._ultimo_errno = getattr(e, "errno", None)
+                # El cursor puede haber quedado inválido (p. ej. conexión perdida): se prepara de nuevo
+                cursor = self._preparados.pop(nombre, None)
+                if cursor is not None:
+                    try:
+                        cursor.close()
+                    except Error:
+                        pass
+                estadisticas[1] += 1
+                BD_ERRORES.inc()
+                print(f"Error ejecutando {nombre}: {e}")
+                return None
+    
+    def _cerrar_preparados(self):
+        """Libera las sentencias preparadas de la conexión actual."""
+        for cursor in self._preparados.values():
+            try:
+                cursor.close()
+            except Error:
+                pass
+        self._preparados = {}
+    
+    def estadisticas_sentencias(self) -> Dict[str, Dict[str, float]]:
+        """Llamadas, errores y latencia (total y media en ms) por sentencia con nombre."""
+        with self._lock:
+            return {
+                nombre: {
+                    "llamadas": int(llamadas),
+                    "errores": int(errores),
+                    "total_ms": round(segundos * 1000, 3),
+                    "media_ms": round(segundos * 1000 / llamadas, 3) if llamadas else 0.0,
+                }
+                for nombre, (llamadas, errores, segundos) in self._estadisticas.items()
+            }
+    
+    def execute_many(self, query: str, filas: List[Tuple]) -> bool:
+        """Ejecuta la misma sentencia para varias filas en un solo viaje y una transacción."""
+        if not filas:
+            return True
+        with self._lock:
+            self._ultimo_errno = None
+            try:
+                if not self._asegurar_conexion():
+                    return False
+                inicio = time.perf_counter()
+                cursor = self.connection.cursor()
+                cursor.executemany(query, filas)
+                self.connection.commit()
+                cursor.close()
+                BD_SEGUNDOS.observe(time.perf_counter() - inicio, "escritura")
+                return True
+            except Error as e:
+                self._ultimo_errno = getattr(e, "errno", None)
+                BD_ERRORES.inc()
+                print(f"Error ejecutando consulta: {e}")
+                return False
+    
+    def stream_query(self, query: str, params: Tuple = (), batch: int = EXPORTACION_LOTE) -> Iterator[Dict]:
+        """Filas de una consulta leídas del servidor a medida que se consumen (memoria constante).
+
+        Usa una conexión propia con cursor sin búfer: la conexión compartida (y su
+        candado) sigue libre para la interfaz mientras dure el recorrido. Un error
+        de MySQL a mitad de camino se propaga como ConnectionError.
+        """
+        try:
+            conexion = _cargar_conector().connect(**self.config)
+        except ImportError as e:
+            raise ConnectionError(f"falta mysql-connector-python ({e})") from e
+        except Error as e:
+            BD_ERRORES.inc()
+            raise ConnectionError(f"Error al conectar a MySQL: {e}") from e
+        inicio = time.perf_counter()
+        try:
+            cursor = conexion.cursor(dictionary=True, buffered=False)
+            cursor.execute(query, params)
+            while True:
+                filas = cursor.fetchmany(batch)
+                if not filas:
+                    break
+                yield from filas
+            BD_SEGUNDOS.observe(time.perf_counter() - inicio, "lectura")
+        except Error as e:
+            BD_ERRORES.inc()
+            print(f"Error leyendo consulta: {e}")
+            raise ConnectionError(str(e)) from e
+        finally:
+            try:
+                # Si se abandonó a medias quedan filas sin leer: se descarta la conexión entera
+                conexion.close()
+            except Error:
+                pass
+    
+    def table_exists(self, name: str) -> Optional[bool]:
+        """Indica si la tabla existe en la base actual (None si no se pudo consultar)."""
+        existe = self.execute_query(
+            "SELECT 1 FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+            (name,), fetch=True,
+        )
+        return None if existe is None else bool(existe)
+    
+    def call_procedure(self, nombre: str, params: Tuple) -> Optional[List[List[Dict]]]:
+        """Llama a un procedimiento almacenado y devuelve cada conjunto de resultados como filas dict."""
+        with self._lock:
+            self._ultimo_errno = None
+            try:
+                if not self._asegurar_conexion():
+                    return None
+                inicio = time.perf_counter()
+                cursor = self.connection.cursor()
+                cursor.callproc(nombre, params)
+                conjuntos = [
+                    [dict(zip(r.column_names, fila)) for fila in r.fetchall()]
+                    for r in cursor.stored_results()
+                ]
+                cursor.close()
+                BD_SEGUNDOS.observe(time.perf_counter() - inicio, "lectura")
+                return conjuntos
+            except Error as e:
+                self._ultimo_errno = getattr(e, "errno", None)
+                BD_ERRORES.inc()
+                print(f"Error llamando a {nombre}: {e}")
+                return None
+    
     def get_user_by_email(self, email: str) -> Optional[Dict]:
         """Obtiene un usuario por su correo electrónico."""
-        query = "SELECT * FROM Usuarios WHERE correo_electronico = %s"
-        result = self.execute_query(query, (email,), fetch=True)
+        result = self.ejecutar_sentencia("usuario_por_correo", (email,), fetch=True)
         return result[0] if result else None
     
     def create_user(self, username: str, cedula: str, email: str, password: str) -> bool:
@@ -85,6 +371,43 @@ class DatabaseManager:
                 return user
         return None
     
+    def bootstrap_session(self, email: str, password: str) -> Optional[Dict[str, Any]]:
+        """Autentica y trae en un solo viaje todo lo que la sesión necesita al arrancar.
+
+        Devuelve ``{"usuario", "reglas", "configuraciones", "resumen_historial"}`` o None si
+        las credenciales no son válidas. Usa ``sp_arranque_sesion`` (database_schema.sql);
+        si el procedimiento no existe, recurre a consultas separadas.
+        """
+        hashed_password = hashlib.sha256(password.encode()).hexdigest()
+        conjuntos = None
+        if self._procedimiento_arranque:
+            with self._lock:
+                conjuntos = self.call_procedure("sp_arranque_sesion", (email, hashed_password))
+                if conjuntos is None and self._ultimo_errno == ER_SP_DOES_NOT_EXIST:
+                    # El procedimiento no está instalado: consultas separadas desde ahora
+                    self._procedimiento_arranque = False
+        if conjuntos is not None:
+            if not conjuntos or not conjuntos[0]:
+                return None
+            usuario = conjuntos[0][0]
+            reglas, configuraciones, resumen = (conjuntos[1:] + [[], [], []])[:3]
+        else:
+            usuario = self.authenticate_user(email, password)
+            if not usuario:
+                return None
+            reglas = self.get_user_rules(usuario["id_usuario"])
+            configuraciones = self.execute_query(
+                "SELECT clave, valor FROM Configuraciones WHERE id_usuario = %s",
+                (usuario["id_usuario"],), fetch=True,
+            ) or []
+            resumen = self.get_history_summary(usuario["id_usuario"])
+        return {
+            "usuario": usuario,
+            "reglas": reglas,
+            "configuraciones": {c["clave"]: c["valor"] for c in configuraciones},
+            "resumen_historial": resumen,
+        }
+    
     def get_user_rules(self, user_id: int) -> List[Dict]:
         """Obtiene las reglas de un usuario."""
         query = "SELECT * FROM Reglas WHERE id_usuario = %s ORDER BY id_regla"
@@ -113,6 +436,27 @@ class DatabaseManager:
             print(f"Error creando regla: {e}")
             return False
     
+    def create_rules(self, user_id: int, rules_data: List[Dict]) -> bool:
+        """Crea varias reglas en un solo viaje."""
+        query = """
+        INSERT INTO Reglas (id_usuario, nombre, destino_subcarpeta, extensiones, 
+                           tam_min_kb, tam_max_kb, fecha_desde, fecha_hasta)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        """
+        return self.execute_many(query, [
+            (
+                user_id,
+                r['nombre'],
+                r['destino_subcarpeta'],
+                json.dumps(r['extensiones']),
+                r.get('tam_min_kb'),
+                r.get('tam_max_kb'),
+                r.get('fecha_desde'),
+                r.get('fecha_hasta'),
+            )
+            for r in rules_data
+        ])
+    
     def update_rule(self, rule_id: int, user_id: int, rule_data: Dict) -> bool:
         """Actualiza una regla existente."""
         query = """
@@ -148,39 +492,313 @@ class DatabaseManager:
             return False
     
     def add_history_record(self, user_id: int, action_type: str, details: Dict, 
-                          quarantine_path: str = None) -> bool:
-        """Agrega un registro al historial."""
-        query = """
-        INSERT INTO Historial (id_usuario, tipo, fecha, detalle, ruta_cuarentena)
-        VALUES (%s, %s, %s, %s, %s)
+                          quarantine_path: str = None, columns: Optional[Dict[str, Any]] = None,
+                          stats: Optional[Dict[str, Any]] = None) -> Optional[int]:
+        """Agrega un registro al historial y devuelve su id (None si falló).
+
+        ``columns`` lleva las cifras con columna propia (archivos_movidos, bytes_movidos,
+        carpetas_eliminadas, duracion_ms, estado). ``stats`` (archivos, bytes, carpetas,
+        por_categoria) se suma a EstadisticasUsuario en la misma transacción.
         """
+        columns = columns or {}
+        ahora = datetime.now()
+        base = (user_id, action_type, ahora, json.dumps(details), quarantine_path)
+        with self._lock:
+            try:
+                id_accion = self._insertar_historial(base, columns)
+                if id_accion is None:
+                    self._deshacer()
+                    return None
+                if stats and self._tablas_estadisticas and not self._sumar_estadisticas(user_id, stats, ahora):
+                    falta_tabla = self._ultimo_errno == ER_NO_SUCH_TABLE
+                    self._deshacer()
+                    if not falta_tabla:
+                        # Fallo pasajero: ni historial ni totales, para que no diverjan
+                        return None
+                    # Las tablas de estadísticas no existen (sin migrar): solo el historial
+                    self._tablas_estadisticas = False
+                    id_accion = self._insertar_historial(base, columns)
+                    if id_accion is None:
+                        self._deshacer()
+                        return None
+                self.connection.commit()
+                return id_accion
+            except Error as e:
+                print(f"Error agregando historial: {e}")
+                self._deshacer()
+                return None
+
+    def _deshacer(self):
+        """Rollback de la transacción abierta, si la conexión sigue viva."""
         try:
-            self.execute_query(query, (
-                user_id,
-                action_type,
-                datetime.now(),
-                json.dumps(details),
-                quarantine_path
-            ))
+            if self.conectado():
+                self.connection.rollback()
+        except Error:
+            pass
+    
+    def _insertar_historial(self, base: Tuple, columns: Dict[str, Any]) -> Optional[int]:
+        """INSERT en Historial sin confirmar (con columnas numéricas si la tabla las tiene)."""
+        if self._columnas_historial:
+            resultado = self.ejecutar_sentencia("agregar_historial", base + tuple(
+                columns.get(c) for c in COLUMNAS_HISTORIAL
+            ), commit=False)
+            if resultado is not None or self._ultimo_errno != ER_BAD_FIELD_ERROR:
+                return resultado
+            # Historial aún no tiene las columnas numéricas (sin migrar)
+            self._columnas_historial = False
+        return self.ejecutar_sentencia("agregar_historial_basico", base, commit=False)
+    
+    def add_moves(self, user_id: int, action_id: Optional[int], moves: Iterable[Tuple[str, str]],
+                  batch: int = MOVIMIENTOS_LOTE) -> bool:
+        """Guarda en Movimientos los pares (origen, destino) de una ejecución.
+
+        Se inserta por lotes, cada uno en su transacción: entre lote y lote el
+        candado queda libre para las consultas de la interfaz. ``moves`` se recorre
+        una sola vez, así que solo un lote de filas existe a la vez.
+        """
+        if not moves or not self._tabla_movimientos:
             return True
-        except Error as e:
-            print(f"Error agregando historial: {e}")
+        ahora = datetime.now()
+        query = """
+        INSERT INTO Movimientos (id_usuario, id_accion, fecha, nombre, ruta_origen, ruta_destino)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        """
+        pares = iter(moves)
+        while True:
+            filas = [
+                (user_id, action_id, ahora, os.path.basename(destino)[:255], origen, destino)
+                for origen, destino in islice(pares, batch)
+            ]
+            if not filas:
+                break
+            with self._lock:
+                if self.execute_many(query, filas):
+                    continue
+                if self._ultimo_errno == ER_NO_SUCH_TABLE:
+                    # La tabla Movimientos no existe (sin migrar): no se vuelve a intentar
+                    self._tabla_movimientos = False
             return False
+        return True
+    
+    def search_moves(self, user_id: int, text: str, limit: int = 100) -> List[Dict]:
+        """Movimientos del usuario cuyo nombre o rutas contienen las palabras de ``text``.
+
+        Las palabras de 3 o más letras van al índice FULLTEXT como prefijos obligatorios
+        (``+foto* +2023*``); si no hay ninguna se busca el texto en el nombre con LIKE.
+        """
+        palabras = [p for p in re.findall(r"\w+", text) if len(p) >= 3]
+        if palabras:
+            query = """
+            SELECT id_accion, fecha, nombre, ruta_origen, ruta_destino
+            FROM Movimientos
+            WHERE id_usuario = %s
+              AND MATCH(nombre, ruta_origen, ruta_destino) AGAINST (%s IN BOOLEAN MODE)
+            ORDER BY fecha DESC, id_movimiento DESC
+            LIMIT %s
+            """
+            params: Tuple = (user_id, " ".join(f"+{p}*" for p in palabras), limit)
+        else:
+            query = """
+            SELECT id_accion, fecha, nombre, ruta_origen, ruta_destino
+            FROM Movimientos
+            WHERE id_usuario = %s AND nombre LIKE %s
+            ORDER BY fecha DESC, id_movimiento DESC
+            LIMIT %s
+            """
+            patron = text.strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            params = (user_id, f"%{patron}%", limit)
+        return self.execute_query(query, params, fetch=True) or []
+    
+    def _sumar_estadisticas(self, user_id: int, stats: Dict[str, Any], fecha: datetime) -> bool:
+        """Upserts de EstadisticasUsuario y EstadisticasCategoria sin confirmar."""
+        if self.ejecutar_sentencia("sumar_estadisticas", (
+            user_id, stats.get("archivos", 0), stats.get("bytes", 0), stats.get("carpetas", 0), fecha,
+        ), commit=False) is None:
+            return False
+        return all(
+            self.ejecutar_sentencia("sumar_categoria", (user_id, categoria, n), commit=False) is not None
+            for categoria, n in (stats.get("por_categoria") or {}).items()
+        )
+    
+    def get_user_stats(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Totales acumulados del usuario y archivos por categoría (None si no se pudo leer)."""
+        fila = self.ejecutar_sentencia("estadisticas_usuario", (user_id,), fetch=True)
+        if fila is None:
+            return None
+        categorias = self.ejecutar_sentencia("estadisticas_categorias", (user_id,), fetch=True) or []
+        datos = fila[0] if fila else {}
+        return {
+            "ejecuciones": int(datos.get("ejecuciones") or 0),
+            "archivos_organizados": int(datos.get("archivos_organizados") or 0),
+            "bytes_organizados": int(datos.get("bytes_organizados") or 0),
+            "carpetas_eliminadas": int(datos.get("carpetas_eliminadas") or 0),
+            "ultima_ejecucion": datos.get("ultima_ejecucion"),
+            "por_categoria": {c["categoria"]: int(c["archivos"]) for c in categorias},
+        }
     
     def get_user_history(self, user_id: int, limit: int = 200) -> List[Dict]:
         """Obtiene el historial de un usuario."""
+        return self.ejecutar_sentencia("historial_usuario", (user_id, limit), fetch=True) or []
+    
+    def get_rule_profiles(self, user_id: int, limit: int) -> List[Dict]:
+        """Detalle de las últimas ``limit`` clasificaciones que guardaron perfil de reglas."""
+        return self.ejecutar_sentencia(
+            "perfiles_reglas", (user_id, '%"perfil_reglas"%', limit), fetch=True
+        ) or []
+    
+    def get_history_before(self, cutoff: datetime, limit: int, user_id: Optional[int] = None) -> List[Dict]:
+        """Filas de historial anteriores a ``cutoff`` (de un usuario o de todos), por id."""
+        query = "SELECT * FROM Historial WHERE fecha < %s"
+        params: Tuple = (cutoff,)
+        if user_id is not None:
+            query += " AND id_usuario = %s"
+            params += (user_id,)
+        query += " ORDER BY id_accion LIMIT %s"
+        return self.execute_query(query, params + (limit,), fetch=True) or []
+    
+    def delete_history_ids(self, ids: List[int]) -> bool:
+        """Borra filas de historial por id (en una sola sentencia)."""
+        if not ids:
+            return True
+        marcadores = ", ".join(["%s"] * len(ids))
+        query = f"DELETE FROM Historial WHERE id_accion IN ({marcadores})"
+        return self.execute_query(query, tuple(ids)) is not None
+    
+    def get_history_totals(self, user_id: int, since: Optional[datetime] = None) -> Dict[str, Any]:
+        """Sumas de las columnas numéricas del historial (desde ``since`` si se indica)."""
+        query = """
+        SELECT COUNT(*) AS acciones,
+               COALESCE(SUM(archivos_movidos), 0) AS archivos_movidos,
+               COALESCE(SUM(bytes_movidos), 0) AS bytes_movidos,
+               COALESCE(SUM(carpetas_eliminadas), 0) AS carpetas_eliminadas,
+               COALESCE(SUM(duracion_ms), 0) AS duracion_ms,
+               COALESCE(SUM(estado = 'cancelado'), 0) AS canceladas
+        FROM Historial
+        WHERE id_usuario = %s
+        """
+        params: Tuple = (user_id,)
+        if since is not None:
+            query += " AND fecha >= %s"
+            params += (since,)
+        result = self.execute_query(query, params, fetch=True)
+        return result[0] if result else {}
+    
+    def get_history_by_month(self, user_id: int, months: int = 6) -> List[Dict]:
+        """Archivos movidos, bytes y carpetas eliminadas por mes (más reciente primero)."""
         query = """
-        SELECT * FROM Historial 
-        WHERE id_usuario = %s 
-        ORDER BY fecha DESC 
+        SELECT DATE_FORMAT(fecha, '%Y-%m') AS mes,
+               COALESCE(SUM(archivos_movidos), 0) AS archivos_movidos,
+               COALESCE(SUM(bytes_movidos), 0) AS bytes_movidos,
+               COALESCE(SUM(carpetas_eliminadas), 0) AS carpetas_eliminadas
+        FROM Historial
+        WHERE id_usuario = %s
+        GROUP BY mes
+        ORDER BY mes DESC
         LIMIT %s
         """
-        return self.execute_query(query, (user_id, limit), fetch=True) or []
+        return self.execute_query(query, (user_id, months), fetch=True) or []
+    
+    def migrar_historial(self) -> List[str]:
+        """Agrega a Historial las columnas numéricas que falten y las rellena desde ``detalle``."""
+        existentes = {
+            c["COLUMN_NAME"].lower() for c in self.execute_query(
+                "SELECT COLUMN_NAME FROM information_schema.COLUMNS "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'Historial'",
+                fetch=True,
+            ) or []
+        }
+        if not existentes:
+            return []
+        faltantes = [c for c in COLUMNAS_HISTORIAL if c not in existentes]
+        if faltantes:
+            self.execute_query("ALTER TABLE Historial " + ", ".join(
+                f"ADD COLUMN {c} {TIPOS_COLUMNAS_HISTORIAL[c]}" for c in faltantes
+            ))
+            self.execute_query("CREATE INDEX idx_historial_usuario_fecha ON Historial(id_usuario, fecha)")
+            self.execute_query("""
+            UPDATE Historial SET
+                archivos_movidos = JSON_EXTRACT(detalle, '$.archivos_movidos'),
+                bytes_movidos = JSON_EXTRACT(detalle, '$.metricas.bytes_movidos'),
+                carpetas_eliminadas = JSON_EXTRACT(detalle, '$.carpetas_eliminadas'),
+                duracion_ms = JSON_EXTRACT(detalle, '$.metricas.duracion_ms'),
+                estado = JSON_UNQUOTE(JSON_EXTRACT(detalle, '$.estado'))
+            WHERE JSON_VALID(detalle)
+            """)
+            self._columnas_historial = True
+        return faltantes
+    
+    def migrar_estadisticas(self) -> bool:
+        """Crea las tablas de estadísticas si faltan y las inicia desde el historial."""
+        if self.table_exists("EstadisticasUsuario") is not False:
+            return False
+        self.execute_query("""
+        CREATE TABLE IF NOT EXISTS EstadisticasUsuario (
+            id_usuario INTEGER PRIMARY KEY,
+            ejecuciones INTEGER NOT NULL DEFAULT 0,
+            archivos_organizados BIGINT NOT NULL DEFAULT 0,
+            bytes_organizados BIGINT NOT NULL DEFAULT 0,
+            carpetas_eliminadas BIGINT NOT NULL DEFAULT 0,
+            ultima_ejecucion DATETIME,
+            FOREIGN KEY (id_usuario) REFERENCES Usuarios(id_usuario) ON DELETE CASCADE
+        )
+        """)
+        self.execute_query("""
+        CREATE TABLE IF NOT EXISTS EstadisticasCategoria (
+            id_usuario INTEGER NOT NULL,
+            categoria VARCHAR(255) NOT NULL,
+            archivos BIGINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (id_usuario, categoria),
+            FOREIGN KEY (id_usuario) REFERENCES Usuarios(id_usuario) ON DELETE CASCADE
+        )
+        """)
+        self.execute_query("""
+        INSERT INTO EstadisticasUsuario (id_usuario, ejecuciones, archivos_organizados,
+                                         bytes_organizados, carpetas_eliminadas, ultima_ejecucion)
+        SELECT id_usuario, COUNT(*), COALESCE(SUM(archivos_movidos), 0), COALESCE(SUM(bytes_movidos), 0),
+               COALESCE(SUM(carpetas_eliminadas), 0), MAX(fecha)
+        FROM Historial
+        WHERE archivos_movidos IS NOT NULL OR carpetas_eliminadas IS NOT NULL
+        GROUP BY id_usuario
+        ON DUPLICATE KEY UPDATE id_usuario = id_usuario
+        """)
+        self._tablas_estadisticas = True
+        return True
+    
+    def migrar_movimientos(self) -> bool:
+        """Crea la tabla Movimientos (con su índice FULLTEXT) si falta."""
+        if self.table_exists("Movimientos") is not False:
+            return False
+        self.execute_query("""
+        CREATE TABLE IF NOT EXISTS Movimientos (
+            id_movimiento BIGINT PRIMARY KEY AUTO_INCREMENT,
+            id_usuario INTEGER NOT NULL,
+            id_accion INTEGER,
+            fecha DATETIME NOT NULL,
+            nombre VARCHAR(255) NOT NULL,
+            ruta_origen TEXT NOT NULL,
+            ruta_destino TEXT NOT NULL,
+            FULLTEXT KEY ft_movimientos (nombre, ruta_origen, ruta_destino),
+            KEY idx_movimientos_usuario_fecha (id_usuario, fecha),
+            FOREIGN KEY (id_usuario) REFERENCES Usuarios(id_usuario) ON DELETE CASCADE,
+            FOREIGN KEY (id_accion) REFERENCES Historial(id_accion) ON DELETE SET NULL
+        ) ENGINE=InnoDB
+        """)
+        self._tabla_movimientos = True
+        return True
+    
+    def get_history_summary(self, user_id: int) -> List[Dict]:
+        """Cantidad de acciones y fecha de la última por tipo."""
+        query = """
+        SELECT tipo, COUNT(*) AS total, MAX(fecha) AS ultima
+        FROM Historial
+        WHERE id_usuario = %s
+        GROUP BY tipo
+        """
+        return self.execute_query(query, (user_id,), fetch=True) or []
     
     def get_user_config(self, user_id: int, key: str) -> Optional[str]:
         """Obtiene una configuración específica de un usuario."""
-        query = "SELECT valor FROM Configuraciones WHERE id_usuario = %s AND clave = %s"
-        result = self.execute_query(query, (user_id, key), fetch=True)
+        result = self.ejecutar_sentencia("config_usuario", (user_id, key), fetch=True)
         return result[0]['valor'] if result else None
     
     def set_user_config(self, user_id: int, key: str, value: str) -> bool:
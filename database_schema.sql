@@ -25,6 +25,12 @@ CREATE TABLE IF NOT EXISTS Historial (
     fecha DATETIME NOT NULL, -- Fecha y hora en formato 'YYYY-MM-DD HH:MM:SS'
     detalle TEXT, -- Detalles en JSON (ej. '{"accion": "organizar_basica", "archivos_movidos": 10}')
     ruta_cuarentena TEXT, -- Ruta para restauración (puede ser NULL)
+    -- Cifras del detalle en columnas propias para poder sumarlas en SQL (NULL si no aplica)
+    archivos_movidos INTEGER,
+    bytes_movidos BIGINT,
+    carpetas_eliminadas INTEGER,
+    duracion_ms INTEGER,
+    estado VARCHAR(20), -- 'completado' o 'cancelado'
     FOREIGN KEY (id_usuario) REFERENCES Usuarios(id_usuario) ON DELETE CASCADE
 );
 
@@ -55,12 +61,105 @@ CREATE TABLE IF NOT EXISTS Configuraciones (
     UNIQUE KEY unique_user_key (id_usuario, clave)
 );
 
+-- Creación de la tabla Movimientos
+-- Un registro por archivo movido, con índice FULLTEXT para buscar por nombre o ruta.
+-- Si la acción pasa al archivo (retención) el movimiento sigue siendo buscable.
+CREATE TABLE IF NOT EXISTS Movimientos (
+    id_movimiento BIGINT PRIMARY KEY AUTO_INCREMENT,
+    id_usuario INTEGER NOT NULL,
+    id_accion INTEGER, -- Acción de Historial que lo produjo (NULL si ya se archivó)
+    fecha DATETIME NOT NULL,
+    nombre VARCHAR(255) NOT NULL, -- Nombre del archivo
+    ruta_origen TEXT NOT NULL,
+    ruta_destino TEXT NOT NULL,
+    FULLTEXT KEY ft_movimientos (nombre, ruta_origen, ruta_destino),
+    KEY idx_movimientos_usuario_fecha (id_usuario, fecha),
+    FOREIGN KEY (id_usuario) REFERENCES Usuarios(id_usuario) ON DELETE CASCADE,
+    FOREIGN KEY (id_accion) REFERENCES Historial(id_accion) ON DELETE SET NULL
+) ENGINE=InnoDB;
+
+-- Creación de la tabla EstadisticasUsuario
+-- Totales acumulados por usuario; se actualizan en la misma transacción que cada
+-- registro de Historial para no tener que recorrerlo
+CREATE TABLE IF NOT EXISTS EstadisticasUsuario (
+    id_usuario INTEGER PRIMARY KEY, -- Un registro por usuario
+    ejecuciones INTEGER NOT NULL DEFAULT 0, -- Clasificaciones y limpiezas terminadas
+    archivos_organizados BIGINT NOT NULL DEFAULT 0,
+    bytes_organizados BIGINT NOT NULL DEFAULT 0,
+    carpetas_eliminadas BIGINT NOT NULL DEFAULT 0,
+    ultima_ejecucion DATETIME, -- Fin de la última ejecución
+    FOREIGN KEY (id_usuario) REFERENCES Usuarios(id_usuario) ON DELETE CASCADE
+);
+
+-- Creación de la tabla EstadisticasCategoria
+-- Archivos organizados por subcarpeta de destino (categoría o regla)
+CREATE TABLE IF NOT EXISTS EstadisticasCategoria (
+    id_usuario INTEGER NOT NULL,
+    categoria VARCHAR(255) NOT NULL,
+    archivos BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (id_usuario, categoria),
+    FOREIGN KEY (id_usuario) REFERENCES Usuarios(id_usuario) ON DELETE CASCADE
+);
+
 -- Crear índices para mejorar el rendimiento
 CREATE INDEX idx_usuarios_email ON Usuarios(correo_electronico);
 CREATE INDEX idx_usuarios_cedula ON Usuarios(cedula);
 CREATE INDEX idx_historial_usuario ON Historial(id_usuario);
 CREATE INDEX idx_historial_fecha ON Historial(fecha);
+CREATE INDEX idx_historial_usuario_fecha ON Historial(id_usuario, fecha);
 CREATE INDEX idx_reglas_usuario ON Reglas(id_usuario);
 CREATE INDEX idx_configuraciones_usuario ON Configuraciones(id_usuario);
 
 
+
+-- Procedimiento de arranque de sesión
+-- Autentica y devuelve en un solo viaje: usuario, reglas, configuraciones y
+-- resumen del historial (si las credenciales no coinciden, solo un conjunto vacío)
+DROP PROCEDURE IF EXISTS sp_arranque_sesion;
+DELIMITER //
+CREATE PROCEDURE sp_arranque_sesion(IN p_correo VARCHAR(255), IN p_hash VARCHAR(255))
+BEGIN
+    DECLARE v_id INTEGER DEFAULT NULL;
+
+    SELECT id_usuario INTO v_id
+    FROM Usuarios
+    WHERE correo_electronico = p_correo AND contrasena_hash = p_hash;
+
+    SELECT * FROM Usuarios WHERE id_usuario = v_id;
+
+    IF v_id IS NOT NULL THEN
+        SELECT * FROM Reglas WHERE id_usuario = v_id ORDER BY id_regla;
+        SELECT clave, valor FROM Configuraciones WHERE id_usuario = v_id;
+        SELECT tipo, COUNT(*) AS total, MAX(fecha) AS ultima
+        FROM Historial
+        WHERE id_usuario = v_id
+        GROUP BY tipo;
+    END IF;
+END //
+DELIMITER ;
+
+-- Migración: columnas numéricas del historial (bases creadas antes de que existieran)
+-- Ejecutar una sola vez; rellena las columnas a partir del JSON de `detalle`.
+-- ALTER TABLE Historial
+--     ADD COLUMN archivos_movidos INTEGER,
+--     ADD COLUMN bytes_movidos BIGINT,
+--     ADD COLUMN carpetas_eliminadas INTEGER,
+--     ADD COLUMN duracion_ms INTEGER,
+--     ADD COLUMN estado VARCHAR(20);
+-- CREATE INDEX idx_historial_usuario_fecha ON Historial(id_usuario, fecha);
+-- UPDATE Historial SET
+--     archivos_movidos = JSON_EXTRACT(detalle, '$.archivos_movidos'),
+--     bytes_movidos = JSON_EXTRACT(detalle, '$.metricas.bytes_movidos'),
+--     carpetas_eliminadas = JSON_EXTRACT(detalle, '$.carpetas_eliminadas'),
+--     duracion_ms = JSON_EXTRACT(detalle, '$.metricas.duracion_ms'),
+--     estado = JSON_UNQUOTE(JSON_EXTRACT(detalle, '$.estado'))
+-- WHERE JSON_VALID(detalle);
+-- Totales iniciales de EstadisticasUsuario a partir del historial (tras crear la tabla)
+-- INSERT INTO EstadisticasUsuario (id_usuario, ejecuciones, archivos_organizados,
+--                                  bytes_organizados, carpetas_eliminadas, ultima_ejecucion)
+-- SELECT id_usuario, COUNT(*), COALESCE(SUM(archivos_movidos), 0), COALESCE(SUM(bytes_movidos), 0),
+--        COALESCE(SUM(carpetas_eliminadas), 0), MAX(fecha)
+-- FROM Historial
+-- WHERE archivos_movidos IS NOT NULL OR carpetas_eliminadas IS NOT NULL
+-- GROUP BY id_usuario
+-- ON DUPLICATE KEY UPDATE id_usuario = id_usuario;
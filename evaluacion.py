@@ -0,0 +1,329 @@
+# organizador_inteligente/evaluacion.py
+# -------------------------------------------------------------
+# Evaluación de reglas sobre metadatos de archivos
+# - Sin dependencias de base de datos ni de UI, para poder
+#   ejecutarse dentro de procesos trabajadores.
+# - PerfilReglas cuenta evaluaciones, coincidencias y tiempo de cada regla.
+# - EvaluadorVectorizado (opcional, con numpy) evalúa cada regla sobre un lote
+#   entero como máscaras booleanas, con las mismas decisiones que regla por regla.
+# -------------------------------------------------------------
+
+import math
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import CATEGORIAS, CLASIFICACION_VECTORIZADA, CLASIFICACION_VECTORIZADA_MIN
+from contenido import DetectorContenido
+from models import ReglaClasificacion
+
+# (ruta, extensión sin punto en minúsculas, tamaño en bytes, mtime)
+RegistroArchivo = Tuple[str, str, int, float]
+# (ruta origen, subcarpeta destino, nombre de la regla o "basico", tamaño en bytes)
+Decision = Tuple[str, str, str, int]
+
+_CATEGORIA_POR_EXTENSION: Dict[str, str] = {}
+for _categoria, _extensiones in CATEGORIAS.items():
+    for _ext in _extensiones:
+        _CATEGORIA_POR_EXTENSION.setdefault(_ext, _categoria)
+
+
+def categoria_por_extension(ext: str) -> Optional[str]:
+    """Determina la categoría básica de una extensión (con o sin punto)."""
+    return _CATEGORIA_POR_EXTENSION.get(ext.lower().lstrip("."))
+
+
+class PerfilReglas:
+    """Evaluaciones, coincidencias y tiempo (ns) acumulados por regla, en el orden de la lista.
+
+    Una regla solo se evalúa con los archivos que no tomaron las anteriores, así que
+    las que nunca coinciden o las más caras al principio encarecen todo el recorrido.
+    """
+    def __init__(self, nombres: List[str]):
+        self.nombres = list(nombres)
+        self.evaluaciones = [0] * len(nombres)
+        self.coincidencias = [0] * len(nombres)
+        self.ns = [0] * len(nombres)
+
+    def como_tupla(self) -> Tuple[List[int], List[int], List[int]]:
+        """Contadores sin nombres (lo que devuelve un proceso trabajador)."""
+        return self.evaluaciones, self.coincidencias, self.ns
+
+    def sumar(self, contadores: Tuple[List[int], List[int], List[int]]):
+        """Acumula los contadores de otro perfil con las mismas reglas."""
+        for propios, ajenos in zip((self.evaluaciones, self.coincidencias, self.ns), contadores):
+            for i, valor in enumerate(ajenos):
+                propios[i] += valor
+
+    def como_lista(self) -> List[Dict[str, Any]]:
+        """Una entrada por regla, lista para guardar en el detalle del historial."""
+        return [
+            {"regla": nombre, "evaluaciones": ev, "coincidencias": co, "ms": round(ns / 1e6, 3)}
+            for nombre, ev, co, ns in zip(self.nombres, self.evaluaciones, self.coincidencias, self.ns)
+        ]
+
+
+def _regla_coincidente(reglas: List[ReglaClasificacion], registro: RegistroArchivo,
+                       perfil: Optional[PerfilReglas] = None) -> Optional[Decision]:
+    ruta, ext, tam, mtime = registro
+    if perfil is None:
+        for regla in reglas:
+            if regla.coincide_metadatos(ext, tam, mtime):
+                return (ruta, regla.destino_subcarpeta, regla.nombre, tam)
+        return None
+    reloj = time.perf_counter_ns
+    for i, regla in enumerate(reglas):
+        t = reloj()
+        coincide = regla.coincide_metadatos(ext, tam, mtime)
+        perfil.ns[i] += reloj() - t
+        perfil.evaluaciones[i] += 1
+        if coincide:
+            perfil.coincidencias[i] += 1
+            return (ruta, regla.destino_subcarpeta, regla.nombre, tam)
+    return None
+
+
+# ----- Evaluación vectorizada (numpy) -----
+_np = None
+_np_cargado = False
+
+# Fuera de este rango de mtime datetime.fromtimestamp puede fallar según la plataforma
+# (negativos en Windows, años > 3000): esos registros se evalúan regla por regla
+_MTIME_MAX = 32503680000.0  # 3000-01-01
+# Registros a menos de esto de una frontera de día se evalúan regla por regla:
+# fromtimestamp redondea a microsegundos y podría caer en el día siguiente
+_MARGEN_FRONTERA = 1e-3
+# int(tam / 1024) de coincide_metadatos es exacto por debajo de 2**53 bytes
+_TAM_MAX = 2 ** 53
+
+
+def _numpy():
+    """Importa numpy una sola vez; None si no está instalado."""
+    global _np, _np_cargado
+    if not _np_cargado:
+        try:
+            import numpy
+            _np = numpy
+        except ImportError:
+            _np = None
+        _np_cargado = True
+    return _np
+
+
+def _tam_columna(tam: Any) -> int:
+    """Tamaño para la columna int64; -1 (se evalúa regla por regla) si no es un entero exacto."""
+    return tam if isinstance(tam, int) and 0 <= tam < _TAM_MAX else -1
+
+
+def _mtime_columna(mtime: Any) -> float:
+    """mtime para la columna float64; NaN (se evalúa regla por regla) si no es un número en rango."""
+    if isinstance(mtime, float):
+        return mtime
+    if isinstance(mtime, int) and 0 <= mtime < _MTIME_MAX:
+        return float(mtime)
+    return math.nan
+
+
+def _inicio_dia(dia: date) -> float:
+    """Primer instante (timestamp local) cuyo fromtimestamp().date() es ``dia``.
+
+    Lanza ValueError si la hora local no es monótona alrededor de esa medianoche.
+    """
+    frontera = datetime.combine(dia, datetime.min.time()).timestamp()
+    if not (datetime.fromtimestamp(frontera).date() == dia
+            and datetime.fromtimestamp(frontera - _MARGEN_FRONTERA).date() < dia):
+        raise ValueError(f"medianoche ambigua: {dia}")
+    return frontera
+
+
+class _ReglaCompilada:
+    """Condiciones de una regla como límites numéricos (None = sin límite)."""
+    __slots__ = ("tabla", "kb_min", "kb_max", "desde", "hasta", "nunca")
+
+    def __init__(self, regla: ReglaClasificacion, codigos: Dict[str, int], np):
+        self.tabla = None
+        self.kb_min = self.kb_max = self.desde = self.hasta = None
+        self.nunca = False
+        try:
+            # Lo que en coincide_metadatos lanzaría una excepción hace que nunca coincida
+            if regla.extensiones:
+                self.tabla = np.zeros(len(codigos) + 1, dtype=bool)
+                for e in regla.extensiones:
+                    self.tabla[codigos[e.lower().lstrip(".")]] = True
+            for limite in (regla.tam_min_kb, regla.tam_max_kb):
+                if limite is not None and not isinstance(limite, (int, float)):
+                    raise TypeError(limite)
+            self.kb_min, self.kb_max = regla.tam_min_kb, regla.tam_max_kb
+            desde = datetime.fromisoformat(regla.fecha_desde).date() if regla.fecha_desde else None
+            hasta = datetime.fromisoformat(regla.fecha_hasta).date() if regla.fecha_hasta else None
+        except (AttributeError, TypeError, ValueError):
+            self.nunca = True
+            return
+        # fecha >= desde  <=>  mtime >= inicio de desde;  fecha <= hasta  <=>  mtime < inicio del día siguiente
+        if desde is not None:
+            self.desde = _inicio_dia(desde)
+        if hasta is not None and hasta < date.max:
+            self.hasta = _inicio_dia(hasta + timedelta(days=1))
+
+    def mascara(self, ext, kb, mtime, np):
+        if self.nunca:
+            return np.zeros(len(ext), dtype=bool)
+        mascara = np.ones(len(ext), dtype=bool) if self.tabla is None else self.tabla[ext]
+        if self.kb_min is not None:
+            mascara &= kb >= self.kb_min
+        if self.kb_max is not None:
+            mascara &= kb <= self.kb_max
+        if self.desde is not None:
+            mascara &= mtime >= self.desde
+        if self.hasta is not None:
+            mascara &= mtime < self.hasta
+        return mascara
+
+
+class EvaluadorVectorizado:
+    """Primera regla que coincide para un lote entero, con numpy.
+
+    Cada regla se evalúa solo sobre los registros que aún no tomó una anterior
+    (como en la evaluación de a uno), así que el perfil cuenta lo mismo; el
+    tiempo es el de cada máscara. Los registros con mtime fuera de rango o
+    pegado a una medianoche usada como frontera se evalúan regla por regla.
+    """
+    def __init__(self, reglas: List[ReglaClasificacion], np):
+        self.np = np
+        self.reglas = reglas
+        self.codigos: Dict[str, int] = {}
+        for regla in reglas:
+            for e in regla.extensiones or []:
+                if isinstance(e, str):
+                    self.codigos.setdefault(e.lower().lstrip("."), len(self.codigos) + 1)
+        self.compiladas = [_ReglaCompilada(r, self.codigos, np) for r in reglas]
+        self.fronteras = sorted({
+            f for c in self.compiladas for f in (c.desde, c.hasta) if f is not None
+        })
+
+    def coincidencias(self, registros: List[RegistroArchivo],
+                      perfil: Optional[PerfilReglas] = None) -> List[Optional[Decision]]:
+        """Lo mismo que ``[_regla_coincidente(reglas, r, perfil) for r in registros]``."""
+        np = self.np
+        n = len(registros)
+        codigos = self.codigos
+        ext = np.fromiter((codigos.get(r[1], 0) for r in registros), dtype=np.intp, count=n)
+        # Tamaños o fechas ausentes, no numéricos o fuera de rango quedan como dudosos
+        tam = np.fromiter((_tam_columna(r[2]) for r in registros), dtype=np.int64, count=n)
+        mtime = np.fromiter((_mtime_columna(r[3]) for r in registros), dtype=np.float64, count=n)
+        dudoso = ~((mtime >= 0) & (mtime < _MTIME_MAX)) | (tam < 0)
+        for frontera in self.fronteras:
+            dudoso |= np.abs(mtime - frontera) < _MARGEN_FRONTERA
+        kb = tam >> 10
+
+        resultado: List[Optional[Decision]] = [None] * n
+        pendientes = np.flatnonzero(~dudoso)
+        reloj = time.perf_counter_ns
+        for i, (regla, compilada) in enumerate(zip(self.reglas, self.compiladas)):
+            if not len(pendientes):
+                break
+            t = reloj()
+            mascara = compilada.mascara(ext[pendientes], kb[pendientes], mtime[pendientes], np)
+            ganadores = pendientes[mascara]
+            if perfil is not None:
+                perfil.ns[i] += reloj() - t
+                perfil.evaluaciones[i] += len(pendientes)
+                perfil.coincidencias[i] += len(ganadores)
+            for j in ganadores.tolist():
+                registro = registros[j]
+                resultado[j] = (registro[0], regla.destino_subcarpeta, regla.nombre, registro[2])
+            pendientes = pendientes[~mascara]
+        for j in np.flatnonzero(dudoso).tolist():
+            resultado[j] = _regla_coincidente(self.reglas, registros[j], perfil)
+        return resultado
+
+
+def compilar_vectorizado(reglas: List[ReglaClasificacion]) -> Optional[EvaluadorVectorizado]:
+    """Evaluador vectorizado para ``reglas``, o None (sin numpy, desactivado o sin reglas)."""
+    if not reglas or not CLASIFICACION_VECTORIZADA:
+        return None
+    np = _numpy()
+    if np is None:
+        return None
+    try:
+        return EvaluadorVectorizado(reglas, np)
+    except (ValueError, OverflowError, OSError):
+        return None  # fronteras de día no representables en la zona horaria local
+
+
+def decidir(reglas: List[ReglaClasificacion], registro: RegistroArchivo,
+            perfil: Optional[PerfilReglas] = None) -> Optional[Decision]:
+    """Primera regla que coincide o, en su defecto, la categoría por extensión."""
+    decision = _regla_coincidente(reglas, registro, perfil)
+    if decision is not None:
+        return decision
+    categoria = categoria_por_extension(registro[1])
+    if categoria is None:
+        return None
+    return (registro[0], categoria, "basico", registro[2])
+
+
+def evaluar_lote(reglas: List[ReglaClasificacion], registros: List[RegistroArchivo],
+                 detector: Optional[DetectorContenido] = None,
+                 perfil: Optional[PerfilReglas] = None,
+                 evaluador: Optional[EvaluadorVectorizado] = None) -> List[Decision]:
+    """Evalúa un lote de registros y devuelve solo los archivos que deben moverse.
+
+    Con ``detector``, los archivos que no coinciden con ninguna regla se clasifican
+    por su contenido cuando hay una firma concluyente (y por extensión si no).
+    Con ``perfil`` se cuenta y cronometra cada evaluación de regla. Con ``evaluador``
+    (compilado para las mismas reglas) los lotes grandes se evalúan con numpy.
+    """
+    if evaluador is not None and len(registros) >= CLASIFICACION_VECTORIZADA_MIN:
+        resultado: List[Optional[Decision]] = evaluador.coincidencias(registros, perfil)
+    elif detector is None:
+        decisiones = []
+        for registro in registros:
+            decision = decidir(reglas, registro, perfil)
+            if decision is not None:
+                decisiones.append(decision)
+        return decisiones
+    else:
+        resultado = [_regla_coincidente(reglas, r, perfil) for r in registros]
+
+    if detector is None:
+        for i, ((ruta, ext, tam, _mtime), decision) in enumerate(zip(registros, resultado)):
+            if decision is None:
+                categoria = categoria_por_extension(ext)
+                if categoria is not None:
+                    resultado[i] = (ruta, categoria, "basico", tam)
+        return [d for d in resultado if d is not None]
+
+    sin_regla = [
+        (ruta, ext, categoria_por_extension(ext), tam, mtime)
+        for (ruta, ext, tam, mtime), decision in zip(registros, resultado) if decision is None
+    ]
+    por_contenido = detector.categorias(sin_regla)
+    for i, ((ruta, ext, tam, _mtime), decision) in enumerate(zip(registros, resultado)):
+        if decision is None:
+            por_ext = categoria_por_extension(ext)
+            categoria = por_contenido.get(ruta) or por_ext
+            if categoria is not None:
+                resultado[i] = (ruta, categoria, "basico" if categoria == por_ext else "contenido", tam)
+    return [d for d in resultado if d is not None]
+
+
+# ----- Procesos trabajadores -----
+_reglas_trabajador: List[ReglaClasificacion] = []
+_detector_trabajador: Optional[DetectorContenido] = None
+_evaluador_trabajador: Optional[EvaluadorVectorizado] = None
+
+
+def inicializar_trabajador(reglas: List[ReglaClasificacion], detectar_contenido: bool = False):
+    """Recibe las reglas una sola vez por proceso (y las compila si hay numpy)."""
+    global _reglas_trabajador, _detector_trabajador, _evaluador_trabajador
+    _reglas_trabajador = reglas
+    _detector_trabajador = DetectorContenido() if detectar_contenido else None
+    _evaluador_trabajador = compilar_vectorizado(reglas)
+
+
+def evaluar_lote_trabajador(registros: List[RegistroArchivo]) -> Tuple[int, List[Decision], Optional[tuple]]:
+    """Punto de entrada del pool: devuelve (registros evaluados, decisiones, contadores del perfil)."""
+    perfil = PerfilReglas([r.nombre for r in _reglas_trabajador]) if _reglas_trabajador else None
+    decisiones = evaluar_lote(_reglas_trabajador, registros, _detector_trabajador, perfil, _evaluador_trabajador)
+    return len(registros), decisiones, perfil.como_tupla() if perfil else None
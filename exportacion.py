@@ -0,0 +1,168 @@
+# organizador_inteligente/exportacion.py
+# -------------------------------------------------------------
+# Exportación del historial de un usuario
+# - CSV o JSONL según la extensión del archivo; con ".gz" al final se comprime.
+# - Las filas llegan de MySQL por un cursor sin búfer (db_manager.stream_query):
+#   la memoria no crece con los años de historial.
+# - Los movimientos de archivos (tabla Movimientos) van a un segundo archivo
+#   junto al primero: historial.csv -> historial_movimientos.csv.
+# - Se escribe a un ".parcial" que solo se renombra al terminar.
+# -------------------------------------------------------------
+
+import csv
+import gzip
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, IO, Iterable, Optional, Tuple
+
+from config import EXPORTACION_LOTE
+from database import db_manager
+from retencion import ArchivoHistorial
+from tareas import TokenCancelacion
+
+FORMATOS = ("csv", "jsonl")
+
+COLUMNAS_HISTORIAL = (
+    "id_accion", "fecha", "tipo", "archivos_movidos", "bytes_movidos", "carpetas_eliminadas",
+    "duracion_ms", "estado", "ruta_cuarentena", "archivado", "detalle",
+)
+COLUMNAS_MOVIMIENTOS = ("id_accion", "fecha", "nombre", "ruta_origen", "ruta_destino")
+
+
+class ExportacionCancelada(Exception):
+    """Se pidió cancelar a mitad de la escritura."""
+
+
+def formato_de(ruta: Path) -> Tuple[str, bool]:
+    """(formato, comprimido) a partir de la extensión: .csv, .jsonl, .csv.gz, .jsonl.gz."""
+    sufijos = [s.lower() for s in ruta.suffixes]
+    comprimido = bool(sufijos) and sufijos[-1] == ".gz"
+    if comprimido:
+        sufijos.pop()
+    formato = sufijos[-1].lstrip(".") if sufijos else ""
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato de exportación no soportado: {ruta.name} (usa .csv o .jsonl, con .gz opcional)")
+    return formato, comprimido
+
+
+def ruta_movimientos(ruta: Path) -> Path:
+    """Archivo de movimientos que acompaña a ``ruta`` (mismas extensiones)."""
+    base, punto, extensiones = ruta.name.partition(".")
+    return ruta.with_name(f"{base}_movimientos{punto}{extensiones}")
+
+
+def _abrir(ruta: Path, comprimido: bool) -> IO[str]:
+    if comprimido:
+        return gzip.open(ruta, "wt", encoding="utf-8", newline="")
+    return open(ruta, "w", encoding="utf-8", newline="")
+
+
+def _valor_csv(valor: Any) -> Any:
+    if isinstance(valor, datetime):
+        return valor.isoformat(sep=" ")
+    if isinstance(valor, (dict, list)):
+        return json.dumps(valor, ensure_ascii=False)
+    return valor
+
+
+def _para_json(fila: Dict[str, Any]) -> Dict[str, Any]:
+    """El ``detalle`` guardado como texto se vuelve objeto en JSONL."""
+    detalle = fila.get("detalle")
+    if isinstance(detalle, str):
+        try:
+            fila = {**fila, "detalle": json.loads(detalle)}
+        except ValueError:
+            pass
+    return fila
+
+
+class ExportadorHistorial:
+    """Escribe el historial (y los movimientos) de un usuario en disco, fila a fila."""
+    def __init__(self, user_id: int):
+        self.user_id = user_id
+
+    def exportar(self, ruta: Path, movimientos: bool = True, incluir_archivado: bool = False,
+                 token: Optional[TokenCancelacion] = None,
+                 progreso_cb: Optional[Callable[[float], None]] = None) -> Dict[str, Any]:
+        """Exporta a ``ruta``; devuelve cuántas filas se escribieron y dónde."""
+        ruta = Path(ruta)
+        formato, comprimido = formato_de(ruta)
+        total = int(db_manager.get_history_totals(self.user_id).get("acciones") or 0)
+        con_movimientos = movimientos and bool(db_manager.table_exists("Movimientos"))
+        peso = 0.5 if con_movimientos else 1.0
+
+        def avance(n: int):
+            if progreso_cb and total:
+                progreso_cb(min(n / total, 1.0) * peso)
+
+        resultado: Dict[str, Any] = {
+            "ruta": str(ruta), "acciones": 0,
+            "ruta_movimientos": None, "movimientos": 0, "estado": "completado",
+        }
+        try:
+            resultado["acciones"] = self._escribir(
+                ruta, formato, comprimido, COLUMNAS_HISTORIAL,
+                self._filas_historial(incluir_archivado), token, avance,
+            )
+            if con_movimientos:
+                destino = ruta_movimientos(ruta)
+                resultado["movimientos"] = self._escribir(
+                    destino, formato, comprimido, COLUMNAS_MOVIMIENTOS,
+                    db_manager.stream_query(
+                        "SELECT id_accion, fecha, nombre, ruta_origen, ruta_destino FROM Movimientos "
+                        "WHERE id_usuario = %s ORDER BY fecha, id_movimiento",
+                        (self.user_id,),
+                    ),
+                    token, None,
+                )
+                resultado["ruta_movimientos"] = str(destino)
+        except ExportacionCancelada:
+            resultado["estado"] = "cancelado"
+        if progreso_cb:
+            progreso_cb(1.0)
+        return resultado
+
+    def _filas_historial(self, incluir_archivado: bool) -> Iterable[Dict[str, Any]]:
+        """Historial en MySQL (del más antiguo al más reciente) y, si se pide, el archivado."""
+        yield from db_manager.stream_query(
+            "SELECT * FROM Historial WHERE id_usuario = %s ORDER BY fecha, id_accion",
+            (self.user_id,),
+        )
+        if incluir_archivado:
+            for fila in ArchivoHistorial().leer(self.user_id):
+                yield {**fila, "archivado": True}
+
+    def _escribir(self, ruta: Path, formato: str, comprimido: bool, columnas: Tuple[str, ...],
+                  filas: Iterable[Dict[str, Any]], token: Optional[TokenCancelacion],
+                  avance: Optional[Callable[[int], None]]) -> int:
+        """Vuelca ``filas`` en ``ruta`` y devuelve cuántas fueron (nada queda a medias)."""
+        parcial = ruta.with_name(ruta.name + ".parcial")
+        n = 0
+        try:
+            with _abrir(parcial, comprimido) as f:
+                if formato == "csv":
+                    escritor = csv.DictWriter(f, columnas, extrasaction="ignore")
+                    escritor.writeheader()
+                for fila in filas:
+                    if formato == "csv":
+                        escritor.writerow({k: _valor_csv(v) for k, v in fila.items()})
+                    else:
+                        f.write(json.dumps(_para_json(fila), ensure_ascii=False, default=str) + "\n")
+                    n += 1
+                    if n % EXPORTACION_LOTE == 0:
+                        if token and not token.continuar():
+                            raise ExportacionCancelada()
+                        if avance:
+                            avance(n)
+            os.replace(parcial, ruta)
+            return n
+        except BaseException:
+            parcial.unlink(missing_ok=True)
+            raise
+        finally:
+            # Cierra el cursor de MySQL aunque la lectura se haya abandonado a medias
+            cerrar = getattr(filas, "close", None)
+            if cerrar:
+                cerrar()
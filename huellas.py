@@ -0,0 +1,171 @@
+# organizador_inteligente/huellas.py
+# -------------------------------------------------------------
+# Almacén local de huellas (hashes) de archivos
+# - SQLite en la carpeta de datos de la aplicación.
+# - Un hash guardado sigue siendo válido mientras el tamaño, el mtime
+#   y el inodo del archivo no cambien.
+# - Los movimientos hechos por el organizador conservan la huella si el
+#   tamaño y el mtime no cambiaron (y el inodo, dentro de la misma unidad).
+# - Índice en memoria con límite LRU.
+# -------------------------------------------------------------
+
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from config import HUELLAS_MAX_MEMORIA, HUELLAS_LOTE_ESCRITURA, ruta_huellas
+
+ETAPAS = ("parcial", "completo")
+
+# (tam, mtime_ns, inodo, parcial, completo)
+_Entrada = Tuple[int, int, int, Optional[bytes], Optional[bytes]]
+
+
+class AlmacenHuellas:
+    """Caché persistente de hashes por ruta, validada por (tamaño, mtime, inodo)."""
+    def __init__(self, ruta: Optional[Path] = None, max_memoria: int = HUELLAS_MAX_MEMORIA):
+        self.ruta = Path(ruta) if ruta else ruta_huellas()
+        self.max_memoria = max_memoria
+        self.aciertos = 0
+        self.fallos = 0
+        self._lock = threading.Lock()
+        self._memoria: "OrderedDict[str, _Entrada]" = OrderedDict()
+        self._pendientes: "OrderedDict[str, _Entrada]" = OrderedDict()
+        self._movimientos: List[Tuple[str, int, str, int, int, bool, int]] = []
+        self._conexion = sqlite3.connect(str(self.ruta), check_same_thread=False)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute("PRAGMA synchronous=NORMAL")
+        self._conexion.execute(
+            """CREATE TABLE IF NOT EXISTS huellas (
+                   ruta TEXT PRIMARY KEY,
+                   tam INTEGER NOT NULL,
+                   mtime_ns INTEGER NOT NULL,
+                   inodo INTEGER NOT NULL,
+                   parcial BLOB,
+                   completo BLOB
+               )"""
+        )
+        self._conexion.commit()
+
+    # ----- Memoria (LRU) -----
+    def _recordar(self, ruta: str, entrada: _Entrada):
+        self._memoria[ruta] = entrada
+        self._memoria.move_to_end(ruta)
+        while len(self._memoria) > self.max_memoria:
+            self._memoria.popitem(last=False)
+
+    def _buscar(self, ruta: str) -> Optional[_Entrada]:
+        entrada = self._memoria.get(ruta)
+        if entrada is not None:
+            self._memoria.move_to_end(ruta)
+            return entrada
+        fila = self._conexion.execute(
+            "SELECT tam, mtime_ns, inodo, parcial, completo FROM huellas WHERE ruta = ?", (ruta,)
+        ).fetchone()
+        if fila is None:
+            return None
+        entrada = tuple(fila)
+        self._recordar(ruta, entrada)
+        return entrada
+
+    # ----- API -----
+    def obtener(self, ruta: str, etapa: str, calcular: Callable[[str, int], bytes]) -> bytes:
+        """Devuelve el hash de la etapa indicada, calculándolo solo si no hay uno válido."""
+        st = os.stat(ruta)
+        firma = (st.st_size, st.st_mtime_ns, st.st_ino)
+        indice = 3 + ETAPAS.index(etapa)
+        with self._lock:
+            entrada = self._buscar(ruta)
+            if entrada is not None and entrada[:3] == firma and entrada[indice] is not None:
+                self.aciertos += 1
+                return entrada[indice]
+        digest = calcular(ruta, st.st_size)
+        with self._lock:
+            self.fallos += 1
+            entrada = self._buscar(ruta)
+            if entrada is None or entrada[:3] != firma:
+                entrada = (*firma, None, None)
+            entrada = entrada[:indice] + (digest,) + entrada[indice + 1:]
+            self._recordar(ruta, entrada)
+            self._pendientes[ruta] = entrada
+            if len(self._pendientes) >= HUELLAS_LOTE_ESCRITURA:
+                self._volcar()
+        return digest
+
+    def registrar_movimiento(self, origen: str, destino: str):
+        """Traslada la huella de un archivo que el organizador acaba de mover.
+
+        Solo se conserva si el tamaño y el mtime siguen iguales (rename y copy2 los
+        mantienen); dentro de la misma unidad el inodo también debe coincidir.
+        """
+        try:
+            st = os.stat(destino)
+        except OSError:
+            return
+        try:
+            exigir_inodo = os.stat(os.path.dirname(origen) or ".").st_dev == st.st_dev
+        except OSError:
+            exigir_inodo = True
+        with self._lock:
+            self._memoria.pop(destino, None)
+            self._pendientes.pop(destino, None)
+            entrada = self._memoria.pop(origen, None)
+            pendiente = self._pendientes.pop(origen, None)
+            entrada = pendiente or entrada
+            if (entrada is not None and entrada[0] == st.st_size and entrada[1] == st.st_mtime_ns
+                    and (not exigir_inodo or entrada[2] == st.st_ino)):
+                nueva = (st.st_size, st.st_mtime_ns, st.st_ino, entrada[3], entrada[4])
+                self._recordar(destino, nueva)
+                self._pendientes[destino] = nueva
+            # La fila en disco (si existe) se renombra al volcar con las mismas condiciones;
+            # si no las cumple se descarta.
+            self._movimientos.append(
+                (destino, st.st_ino, origen, st.st_size, st.st_mtime_ns, exigir_inodo, st.st_ino)
+            )
+            if len(self._movimientos) + len(self._pendientes) >= HUELLAS_LOTE_ESCRITURA:
+                self._volcar()
+
+    def _volcar(self):
+        """Escribe en SQLite los cambios acumulados (llamar con el lock tomado)."""
+        if self._movimientos:
+            self._conexion.executemany("DELETE FROM huellas WHERE ruta = ?", [(m[0],) for m in self._movimientos])
+            self._conexion.executemany(
+                "UPDATE huellas SET ruta = ?, inodo = ? "
+                "WHERE ruta = ? AND tam = ? AND mtime_ns = ? AND (NOT ? OR inodo = ?)",
+                self._movimientos,
+            )
+            self._conexion.executemany("DELETE FROM huellas WHERE ruta = ?", [(m[2],) for m in self._movimientos])
+            self._movimientos.clear()
+        if self._pendientes:
+            self._conexion.executemany(
+                "INSERT OR REPLACE INTO huellas (ruta, tam, mtime_ns, inodo, parcial, completo) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(ruta, *entrada) for ruta, entrada in self._pendientes.items()],
+            )
+            self._pendientes.clear()
+        self._conexion.commit()
+
+    def guardar(self):
+        """Fuerza la escritura de los cambios pendientes."""
+        with self._lock:
+            self._volcar()
+
+    def purgar(self) -> int:
+        """Elimina huellas de archivos que ya no existen; devuelve cuántas se borraron."""
+        self.guardar()
+        with self._lock:
+            rutas = [r for (r,) in self._conexion.execute("SELECT ruta FROM huellas")]
+            borrar = [(r,) for r in rutas if not os.path.exists(r)]
+            self._conexion.executemany("DELETE FROM huellas WHERE ruta = ?", borrar)
+            self._conexion.commit()
+            for (r,) in borrar:
+                self._memoria.pop(r, None)
+        return len(borrar)
+
+    def cerrar(self):
+        """Guarda lo pendiente y cierra la base de datos."""
+        self.guardar()
+        self._conexion.close()
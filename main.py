@@ -4,18 +4,50 @@
 # -------------------------------------------------------------
 
 from __future__ import annotations
-import flet as ft
 import os
 import sys
+import threading
+import time
+
+_INICIO = time.perf_counter()
 
 # Ajustar PYTHONPATH para resolver importaciones relativas
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 
-from ui import AppUI
+from metricas import CronometroFases
+
+# Tiempos de arranque hasta mostrar el login (ui y services se cargan después)
+arranque = CronometroFases()
+arranque.incluir_previo("preparacion", time.perf_counter() - _INICIO)
+_t = arranque.ahora()
+import flet as ft
+_t = arranque.sumar("importar_flet", _t)
 from auth import AuthManager
+_t = arranque.sumar("importar_auth", _t)
+_arranque_reportado = False
+
+
+def _reportar_arranque():
+    """Imprime el desglose del arranque hasta la pantalla de login."""
+    datos = arranque.como_dict()
+    fases = " · ".join(f"{f} {ms:.0f} ms" for f, ms in datos["fases_ms"].items())
+    print(f"Arranque hasta el login: {datos['duracion_ms']:.0f} ms ({fases})")
+
+
+def _precargar_interfaz():
+    """Importa la interfaz principal mientras el usuario escribe sus credenciales."""
+    t = arranque.ahora()
+    import ui  # noqa: F401
+    ms = (arranque.ahora() - t) * 1000
+    print(f"Interfaz principal precargada en {ms:.0f} ms")
+
 
 def main(page: ft.Page):
     """Inicia la aplicación con la interfaz gráfica."""
+    global _arranque_reportado
+    primera_sesion = not _arranque_reportado
+    if primera_sesion:
+        arranque.sumar("iniciar_flet", _t)
     page.title = "Organizador Inteligente"
     page.window_width = 1000
     page.window_height = 700
@@ -28,6 +60,7 @@ def main(page: ft.Page):
     
     def on_login_success():
         """Callback cuando el login es exitoso."""
+        from ui import AppUI
         page.clean()
         app_ui = AppUI(page)
         app_ui.auth_manager = auth_manager
@@ -35,6 +68,7 @@ def main(page: ft.Page):
         page.update()
     
     # Iniciar con autenticación
+    t = arranque.ahora()
     auth_manager = AuthManager(page, on_login_success)
     auth_view = auth_manager.build_auth_view()
     auth_manager.setup_event_handlers()
@@ -48,6 +82,11 @@ def main(page: ft.Page):
             padding=20
         )
     )
+    if primera_sesion:
+        _arranque_reportado = True
+        arranque.sumar("vista_login", t)
+        _reportar_arranque()
+        threading.Thread(target=_precargar_interfaz, name="precarga-ui", daemon=True).start()
 
 if __name__ == "__main__":
     ft.app(target=main)
@@ -0,0 +1,324 @@
+# organizador_inteligente/metricas.py
+# -------------------------------------------------------------
+# Métricas de ejecución de los servicios
+# - Tiempo por fase (escaneo, reglas, mkdir, mover, bd...).
+# - Bytes movidos y errores.
+# - Se guardan en el detalle del historial bajo "metricas".
+# - Contadores e histogramas del proceso exportables a Prometheus.
+# -------------------------------------------------------------
+
+import bisect
+import os
+import threading
+import time
+import weakref
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config import METRICAS_INTERVALO_TEXTFILE_S
+
+# Orden en que se muestran las fases
+FASES = ("escaneo", "reglas", "duplicados", "mkdir", "mover", "eliminar", "huellas", "bd")
+
+
+class CronometroFases:
+    """Acumula el tiempo de cada fase de una ejecución.
+
+    Pensado para bucles calientes: ``sumar`` recibe el instante de inicio y
+    devuelve el actual, de modo que fases consecutivas encadenan una sola
+    lectura del reloj.
+    """
+    def __init__(self):
+        self.segundos: Dict[str, float] = {}
+        self.bytes_movidos = 0
+        self.errores = 0
+        self._inicio = time.perf_counter()
+
+    @staticmethod
+    def ahora() -> float:
+        return time.perf_counter()
+
+    def sumar(self, fase: str, desde: float) -> float:
+        """Suma a ``fase`` el tiempo transcurrido desde ``desde``; devuelve el instante actual."""
+        ahora = time.perf_counter()
+        self.segundos[fase] = self.segundos.get(fase, 0.0) + (ahora - desde)
+        return ahora
+
+    def incluir_previo(self, fase: str, segundos: float):
+        """Agrega una fase medida antes de crear el cronómetro (cuenta en la duración)."""
+        self.segundos[fase] = self.segundos.get(fase, 0.0) + segundos
+        self._inicio -= segundos
+
+    def _orden(self) -> List[str]:
+        """Fases conocidas en su orden y luego las propias del llamador (p. ej. de arranque)."""
+        return [f for f in FASES if f in self.segundos] + [f for f in self.segundos if f not in FASES]
+
+    def como_dict(self) -> Dict[str, Any]:
+        """Resumen serializable para el historial (milisegundos)."""
+        return {
+            "duracion_ms": round((time.perf_counter() - self._inicio) * 1000, 1),
+            "fases_ms": {f: round(self.segundos[f] * 1000, 1) for f in self._orden()},
+            "bytes_movidos": self.bytes_movidos,
+            "errores": self.errores,
+        }
+
+
+def formatear_bytes(n: int) -> str:
+    """Tamaño legible (B, KB, MB, GB, TB)."""
+    valor = float(n)
+    for unidad in ("B", "KB", "MB", "GB"):
+        if valor < 1024:
+            return f"{valor:.0f} {unidad}" if unidad == "B" else f"{valor:.1f} {unidad}"
+        valor /= 1024
+    return f"{valor:.1f} TB"
+
+
+def resumen_metricas(metricas: Optional[Dict[str, Any]]) -> str:
+    """Línea de texto con la duración, las fases más relevantes, bytes y errores."""
+    if not metricas:
+        return ""
+    partes = [f"Duración: {metricas.get('duracion_ms', 0) / 1000:.2f} s"]
+    fases = metricas.get("fases_ms") or {}
+    partes.extend(f"{f} {fases[f]:.0f} ms" for f in FASES if fases.get(f, 0) >= 1)
+    if metricas.get("bytes_movidos"):
+        partes.append(formatear_bytes(metricas["bytes_movidos"]))
+    if metricas.get("errores"):
+        partes.append(f"{metricas['errores']} errores")
+    return " · ".join(partes)
+
+
+# ----- Exportación para monitoreo (formato de texto de Prometheus) -----
+
+BUCKETS_LATENCIA = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_TAREAS = (0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0, 3600.0)
+
+
+def _escapar(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _numero(valor: float) -> str:
+    if valor == float("inf"):
+        return "+Inf"
+    return repr(float(valor)) if isinstance(valor, float) and not valor.is_integer() else str(int(valor))
+
+
+class _Metrica:
+    tipo = "untyped"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Tuple[str, ...] = ()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = etiquetas
+        self._lock = threading.Lock()
+        self._valores: Dict[Tuple[str, ...], Any] = {}
+        REGISTRO.agregar(self)
+
+    def _clave(self, valores: Tuple[Any, ...]) -> Tuple[str, ...]:
+        if len(valores) != len(self.etiquetas):
+            raise ValueError(f"{self.nombre} espera las etiquetas {self.etiquetas}")
+        return tuple(str(v) for v in valores)
+
+    def _etiquetas(self, clave: Tuple[str, ...], extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+        pares = list(zip(self.etiquetas, clave)) + list(extra)
+        if not pares:
+            return ""
+        return "{" + ",".join(f'{k}="{_escapar(v)}"' for k, v in pares) + "}"
+
+    def _muestras(self) -> List[str]:
+        with self._lock:
+            return [f"{self.nombre}{self._etiquetas(k)} {_numero(v)}" for k, v in sorted(self._valores.items())]
+
+    def exportar(self) -> List[str]:
+        return [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {self.tipo}", *self._muestras()]
+
+
+class Contador(_Metrica):
+    """Valor que solo crece (archivos, bytes, errores...)."""
+    tipo = "counter"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Tuple[str, ...] = ()):
+        super().__init__(nombre, ayuda, etiquetas)
+        if not etiquetas:
+            # Exportar 0 desde el inicio para que rate() funcione desde la primera muestra
+            self._valores[()] = 0
+
+    def inc(self, cantidad: float = 1, *valores: Any):
+        clave = self._clave(valores)
+        with self._lock:
+            self._valores[clave] = self._valores.get(clave, 0) + cantidad
+
+
+class Medidor(_Metrica):
+    """Valor instantáneo; también puede leerse de funciones en el momento de exportar."""
+    tipo = "gauge"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Tuple[str, ...] = ()):
+        super().__init__(nombre, ayuda, etiquetas)
+        self._fuentes: List[weakref.WeakMethod] = []
+
+    def set(self, valor: float, *valores: Any):
+        clave = self._clave(valores)
+        with self._lock:
+            self._valores[clave] = valor
+
+    def observar(self, metodo: Callable[[], float]):
+        """Suma el resultado de ``metodo`` (método ligado) en cada exportación mientras su objeto viva."""
+        with self._lock:
+            self._fuentes.append(weakref.WeakMethod(metodo))
+
+    def _muestras(self) -> List[str]:
+        with self._lock:
+            fuentes = [f() for f in self._fuentes]
+            self._fuentes = [f for f, m in zip(self._fuentes, fuentes) if m is not None]
+        if not fuentes:
+            return super()._muestras()
+        total = sum(m() for m in fuentes if m is not None)
+        return [f"{self.nombre} {_numero(total)}"]
+
+
+class Histograma(_Metrica):
+    """Distribución de latencias en buckets acumulativos."""
+    tipo = "histogram"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = BUCKETS_LATENCIA):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, valor: float, *valores: Any):
+        clave = self._clave(valores)
+        indice = bisect.bisect_left(self.buckets, valor)
+        with self._lock:
+            datos = self._valores.get(clave)
+            if datos is None:
+                datos = self._valores[clave] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            datos[0][indice] += 1
+            datos[1] += valor
+            datos[2] += 1
+
+    def _muestras(self) -> List[str]:
+        lineas = []
+        with self._lock:
+            for clave, (conteos, suma, total) in sorted(self._valores.items()):
+                acumulado = 0
+                for limite, n in zip(self.buckets + (float("inf"),), conteos):
+                    acumulado += n
+                    le = (("le", _numero(limite) if limite != float("inf") else "+Inf"),)
+                    lineas.append(f"{self.nombre}_bucket{self._etiquetas(clave, le)} {acumulado}")
+                lineas.append(f"{self.nombre}_sum{self._etiquetas(clave)} {_numero(suma)}")
+                lineas.append(f"{self.nombre}_count{self._etiquetas(clave)} {total}")
+        return lineas
+
+
+class RegistroMetricas:
+    """Conjunto de métricas del proceso."""
+    def __init__(self):
+        self._metricas: List[_Metrica] = []
+        self._lock = threading.Lock()
+
+    def agregar(self, metrica: _Metrica):
+        with self._lock:
+            self._metricas.append(metrica)
+
+    def exportar(self) -> str:
+        """Texto en el formato de exposición de Prometheus (versión 0.0.4)."""
+        with self._lock:
+            metricas = list(self._metricas)
+        lineas: List[str] = []
+        for metrica in metricas:
+            lineas.extend(metrica.exportar())
+        return "\n".join(lineas) + "\n"
+
+
+REGISTRO = RegistroMetricas()
+
+# ----- Métricas de la aplicación -----
+INICIO_PROCESO = Medidor("organizador_inicio_timestamp_segundos", "Momento de inicio del proceso (epoch)")
+INICIO_PROCESO.set(time.time())
+ARCHIVOS_ESCANEADOS = Contador("organizador_archivos_escaneados_total", "Archivos evaluados por la clasificación")
+ARCHIVOS_MOVIDOS = Contador("organizador_archivos_movidos_total", "Archivos movidos", ("criterio",))
+BYTES_MOVIDOS = Contador("organizador_bytes_movidos_total", "Bytes de los archivos movidos")
+ERRORES = Contador("organizador_errores_total", "Operaciones fallidas", ("operacion",))
+MOVER_SEGUNDOS = Histograma("organizador_mover_segundos", "Latencia de cada movimiento de archivo")
+CARPETAS_ELIMINADAS = Contador("organizador_carpetas_eliminadas_total", "Carpetas vacías eliminadas")
+EJECUCIONES = Contador("organizador_ejecuciones_total", "Ejecuciones terminadas", ("servicio", "estado"))
+ULTIMA_EJECUCION = Medidor("organizador_ultima_ejecucion_timestamp_segundos",
+                           "Fin de la última ejecución (epoch)", ("servicio",))
+BD_SEGUNDOS = Histograma("organizador_bd_consulta_segundos", "Ida y vuelta de cada consulta a MySQL",
+                         ("tipo",))
+BD_ERRORES = Contador("organizador_bd_errores_total", "Consultas a MySQL con error")
+BD_SENTENCIA_SEGUNDOS = Histograma("organizador_bd_sentencia_segundos",
+                                   "Ida y vuelta de cada sentencia preparada con nombre", ("sentencia",))
+TAREAS_ACTIVAS = Medidor("organizador_tareas_activas", "Trabajos en ejecución en el coordinador")
+TAREAS_EN_COLA = Medidor("organizador_tareas_en_cola", "Trabajos esperando turno en el coordinador")
+TAREAS_SEGUNDOS = Histograma("organizador_tareas_segundos", "Duración de los trabajos del coordinador",
+                             ("estado",), BUCKETS_TAREAS)
+VIGILANCIA_PENDIENTES = Medidor("organizador_vigilancia_pendientes",
+                                "Archivos detectados esperando clasificación")
+VIGILANCIA_LATIDO = Medidor("organizador_vigilancia_latido_timestamp_segundos",
+                            "Última vuelta del bucle de vigilancia (epoch); sirve para alertar bloqueos")
+
+
+def registrar_ejecucion(servicio: str, estado: str):
+    """Cuenta una ejecución terminada y marca su hora."""
+    EJECUCIONES.inc(1, servicio, estado)
+    ULTIMA_EJECUCION.set(time.time(), servicio)
+
+
+# ----- Publicación -----
+def iniciar_servidor(puerto: int, host: str = "127.0.0.1"):
+    """Publica /metrics en un hilo de fondo; devuelve el servidor (``shutdown()`` para detenerlo)."""
+    # http.server solo se carga si se pide el endpoint (este módulo se importa al arrancar)
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class _ManejadorMetricas(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            cuerpo = REGISTRO.exportar().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+
+        def log_message(self, formato, *args):
+            pass
+
+    servidor = ThreadingHTTPServer((host, puerto), _ManejadorMetricas)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, name="metricas-http", daemon=True).start()
+    return servidor
+
+
+def escribir_textfile(ruta: Path):
+    """Escribe las métricas de forma atómica (para el textfile collector de node_exporter)."""
+    ruta = Path(ruta)
+    temporal = ruta.with_name(ruta.name + ".tmp")
+    temporal.write_text(REGISTRO.exportar(), encoding="utf-8")
+    os.replace(temporal, ruta)
+
+
+class EscritorTextfile:
+    """Reescribe el archivo de métricas cada ``intervalo_s`` segundos hasta ``detener()``."""
+    def __init__(self, ruta: Path, intervalo_s: float = METRICAS_INTERVALO_TEXTFILE_S):
+        self.ruta = Path(ruta)
+        self.intervalo_s = intervalo_s
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._bucle, name="metricas-textfile", daemon=True)
+        self._hilo.start()
+
+    def _bucle(self):
+        while not self._detener.wait(self.intervalo_s):
+            try:
+                escribir_textfile(self.ruta)
+            except OSError as e:
+                print(f"No se pudieron escribir las métricas: {e}")
+
+    def detener(self):
+        """Detiene el hilo y deja escrito el estado final."""
+        self._detener.set()
+        self._hilo.join()
+        escribir_textfile(self.ruta)
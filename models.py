@@ -23,22 +23,29 @@ class ReglaClasificacion:
         try:
             if not archivo.is_file():
                 return False
-            ext = archivo.suffix.lower().lstrip(".")
+            st = archivo.stat()
+            return self.coincide_metadatos(archivo.suffix.lower().lstrip("."), st.st_size, st.st_mtime)
+        except Exception:
+            return False
+
+    def coincide_metadatos(self, ext: str, tam_bytes: int, mtime: float) -> bool:
+        """Verifica la regla sobre metadatos ya leídos (extensión sin punto, bytes, mtime)."""
+        try:
             if self.extensiones and ext not in [e.lower().lstrip(".") for e in self.extensiones]:
                 return False
 
-            tam_kb = int(archivo.stat().st_size / 1024)
+            tam_kb = int(tam_bytes / 1024)
             if self.tam_min_kb is not None and tam_kb < self.tam_min_kb:
                 return False
             if self.tam_max_kb is not None and tam_kb > self.tam_max_kb:
                 return False
 
-            mtime = datetime.fromtimestamp(archivo.stat().st_mtime)
+            fecha = datetime.fromtimestamp(mtime).date()
             if self.fecha_desde:
-                if mtime.date() < datetime.fromisoformat(self.fecha_desde).date():
+                if fecha < datetime.fromisoformat(self.fecha_desde).date():
                     return False
             if self.fecha_hasta:
-                if mtime.date() > datetime.fromisoformat(self.fecha_hasta).date():
+                if fecha > datetime.fromisoformat(self.fecha_hasta).date():
                     return False
             return True
         except Exception:
@@ -5,19 +5,76 @@
 
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Optional, Tuple
 import json
+from config import MOVIMIENTOS_LIMITE_BUSQUEDA, PERFIL_REGLAS_EJECUCIONES
 from database import db_manager
+from retencion import ArchivoHistorial
+
+def _columnas_tipadas(detalle: Dict[str, Any]) -> Dict[str, Any]:
+    """Cifras del detalle que se guardan también en columnas propias (para sumarlas en SQL)."""
+    metricas = detalle.get("metricas") or {}
+    return {
+        "archivos_movidos": detalle.get("archivos_movidos"),
+        "bytes_movidos": metricas.get("bytes_movidos"),
+        "carpetas_eliminadas": detalle.get("carpetas_eliminadas"),
+        "duracion_ms": metricas.get("duracion_ms"),
+        "estado": detalle.get("estado"),
+    }
+
+
+def _estadisticas(detalle: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Lo que una ejecución suma a EstadisticasUsuario (None si el registro no es una ejecución)."""
+    if "archivos_movidos" not in detalle and "carpetas_eliminadas" not in detalle:
+        return None
+    return {
+        "archivos": detalle.get("archivos_movidos") or 0,
+        "bytes": (detalle.get("metricas") or {}).get("bytes_movidos") or 0,
+        "carpetas": detalle.get("carpetas_eliminadas") or 0,
+        "por_categoria": detalle.get("por_categoria") or {},
+    }
+
+
+def _estadisticas_vacias() -> Dict[str, Any]:
+    return {"ejecuciones": 0, "archivos_organizados": 0, "bytes_organizados": 0,
+            "carpetas_eliminadas": 0, "ultima_ejecucion": None, "por_categoria": {}}
+
+
+def _totales_vacios() -> Dict[str, int]:
+    return {"acciones": 0, "archivos_movidos": 0, "bytes_movidos": 0,
+            "carpetas_eliminadas": 0, "duracion_ms": 0, "canceladas": 0}
+
+
+def _entrada(h: Dict[str, Any], detalle: Dict[str, Any]) -> Dict[str, Any]:
+    """Fila de Historial (de MySQL o del archivo) en el formato que usa la aplicación."""
+    # Mapear tipos de MySQL a SQLite para compatibilidad
+    tipo_sqlite = "clasificacion" if h["tipo"] == "organizar" else "carpeta_vacia"
+    return {
+        "id": h["id_accion"],
+        "fecha": h["fecha"].strftime("%Y-%m-%d %H:%M:%S"),
+        "tipo": tipo_sqlite,
+        "detalle": detalle,
+        "ruta_origen": detalle.get("ruta_origen"),
+        "ruta_destino": detalle.get("ruta_destino"),
+        "ruta_cuarentena": h["ruta_cuarentena"],
+    }
+
 
 class RepositorioHistorial:
     def __init__(self, user_id: int):
         self.user_id = user_id
+        self._estadisticas: Optional[Dict[str, Any]] = None
 
     def registrar(self, tipo: str, detalle: Dict[str, Any],
                  ruta_origen: Optional[str] = None,
                  ruta_destino: Optional[str] = None,
-                 ruta_cuarentena: Optional[str] = None):
-        """Registra una acción en la base de datos."""
+                 ruta_cuarentena: Optional[str] = None,
+                 movimientos: Optional[Iterable[Tuple[str, str]]] = None):
+        """Registra una acción en la base de datos.
+
+        ``movimientos`` son los pares (origen, destino) de la ejecución; van a la
+        tabla Movimientos para poder buscar después dónde quedó cada archivo.
+        """
         # Mapear tipos de SQLite a MySQL
         tipo_mysql = "organizar" if tipo == "clasificacion" else "eliminar_carpetas"
         
@@ -27,31 +84,131 @@ class RepositorioHistorial:
         if ruta_destino:
             detalle["ruta_destino"] = ruta_destino
             
-        db_manager.add_history_record(
+        estadisticas = _estadisticas(detalle)
+        id_accion = db_manager.add_history_record(
             self.user_id, 
             tipo_mysql, 
             detalle, 
-            ruta_cuarentena
+            ruta_cuarentena,
+            _columnas_tipadas(detalle),
+            estadisticas,
         )
+        if estadisticas:
+            self._estadisticas = None
+        if movimientos and id_accion is not None:
+            db_manager.add_moves(self.user_id, id_accion, movimientos)
 
-    def listar(self, limite: int = 200) -> List[Dict[str, Any]]:
-        """Lista las acciones registradas, ordenadas por fecha descendente."""
-        historial = db_manager.get_user_history(self.user_id, limite)
-        
+    def estadisticas(self) -> Dict[str, Any]:
+        """Totales de toda la vida del usuario (EstadisticasUsuario), en caché hasta el próximo registro."""
+        if self._estadisticas is None:
+            datos = db_manager.get_user_stats(self.user_id)
+            if datos is None:
+                return _estadisticas_vacias()
+            self._estadisticas = datos
+        return self._estadisticas
+
+    def listar(self, limite: int = 200, incluir_archivado: bool = False) -> List[Dict[str, Any]]:
+        """Lista las acciones registradas, ordenadas por fecha descendente.
+
+        Con ``incluir_archivado`` completa hasta ``limite`` con el historial archivado (retencion.py).
+        """
         salida = []
-        for h in historial:
-            # Mapear tipos de MySQL a SQLite para compatibilidad
-            tipo_sqlite = "clasificacion" if h["tipo"] == "organizar" else "carpeta_vacia"
-            
+        for h in db_manager.get_user_history(self.user_id, limite):
             detalle = json.loads(h["detalle"]) if h["detalle"] else {}
-            
-            salida.append({
-                "id": h["id_accion"],
-                "fecha": h["fecha"].strftime("%Y-%m-%d %H:%M:%S"),
-                "tipo": tipo_sqlite,
-                "detalle": detalle,
-                "ruta_origen": detalle.get("ruta_origen"),
-                "ruta_destino": detalle.get("ruta_destino"),
-                "ruta_cuarentena": h["ruta_cuarentena"],
-            })
+            salida.append(_entrada(h, detalle))
+        if incluir_archivado and len(salida) < limite:
+            salida.extend(self.buscar_archivado(None, limite - len(salida)))
         return salida
+
+    def buscar_archivado(self, texto: Optional[str], limite: int = 200) -> List[Dict[str, Any]]:
+        """Acciones archivadas que contienen ``texto`` (todas si es None), de la más reciente a la más antigua."""
+        salida = []
+        for h in ArchivoHistorial().leer(self.user_id, texto):
+            detalle = h["detalle"] if isinstance(h["detalle"], dict) else {}
+            salida.append({**_entrada(h, detalle), "archivado": True})
+            if len(salida) >= limite:
+                break
+        return salida
+
+    def perfil_reglas(self, ejecuciones: int = PERFIL_REGLAS_EJECUCIONES) -> Dict[str, Dict[str, float]]:
+        """Evaluaciones, coincidencias y ms por regla, sumados de las últimas ``ejecuciones`` con perfil."""
+        suma: Dict[str, Dict[str, float]] = {}
+        for h in db_manager.get_rule_profiles(self.user_id, ejecuciones):
+            for r in json.loads(h["detalle"])["perfil_reglas"]:
+                acumulado = suma.setdefault(r["regla"], {"evaluaciones": 0, "coincidencias": 0, "ms": 0.0, "ejecuciones": 0})
+                acumulado["evaluaciones"] += r["evaluaciones"]
+                acumulado["coincidencias"] += r["coincidencias"]
+                acumulado["ms"] += r["ms"]
+                acumulado["ejecuciones"] += 1
+        return suma
+
+    def buscar_movimientos(self, texto: str, limite: int = MOVIMIENTOS_LIMITE_BUSQUEDA) -> List[Dict[str, Any]]:
+        """Archivos movidos cuyo nombre o rutas contienen ``texto`` (más recientes primero)."""
+        if not texto.strip():
+            return []
+        return [
+            {
+                "id_accion": m["id_accion"],
+                "fecha": m["fecha"].strftime("%Y-%m-%d %H:%M:%S"),
+                "nombre": m["nombre"],
+                "ruta_origen": m["ruta_origen"],
+                "ruta_destino": m["ruta_destino"],
+            }
+            for m in db_manager.search_moves(self.user_id, texto, limite)
+        ]
+
+    def totales(self, desde: Optional[datetime] = None) -> Dict[str, int]:
+        """Acciones, archivos y bytes movidos, carpetas eliminadas y tiempo total (sumados en SQL)."""
+        fila = db_manager.get_history_totals(self.user_id, desde)
+        return {k: int(fila.get(k) or 0) for k in _totales_vacios()}
+
+    def por_mes(self, meses: int = 6) -> List[Dict[str, Any]]:
+        """Archivos movidos, bytes y carpetas eliminadas de los últimos ``meses`` con actividad."""
+        return [
+            {
+                "mes": f["mes"],
+                "archivos_movidos": int(f["archivos_movidos"]),
+                "bytes_movidos": int(f["bytes_movidos"]),
+                "carpetas_eliminadas": int(f["carpetas_eliminadas"]),
+            }
+            for f in db_manager.get_history_by_month(self.user_id, meses)
+        ]
+
+class RepositorioHistorialNulo:
+    """Repositorio sin persistencia para ejecuciones sin usuario (CLI, pruebas de carga)."""
+    user_id = None
+
+    def registrar(self, tipo: str, detalle: Dict[str, Any],
+                 ruta_origen: Optional[str] = None,
+                 ruta_destino: Optional[str] = None,
+                 ruta_cuarentena: Optional[str] = None,
+                 movimientos: Optional[Iterable[Tuple[str, str]]] = None):
+        """No registra nada."""
+
+    def listar(self, limite: int = 200, incluir_archivado: bool = False) -> List[Dict[str, Any]]:
+        """Siempre vacío."""
+        return []
+
+    def buscar_archivado(self, texto: Optional[str], limite: int = 200) -> List[Dict[str, Any]]:
+        """Siempre vacío."""
+        return []
+
+    def perfil_reglas(self, ejecuciones: int = PERFIL_REGLAS_EJECUCIONES) -> Dict[str, Dict[str, float]]:
+        """Siempre vacío."""
+        return {}
+
+    def buscar_movimientos(self, texto: str, limite: int = MOVIMIENTOS_LIMITE_BUSQUEDA) -> List[Dict[str, Any]]:
+        """Siempre vacío."""
+        return []
+
+    def totales(self, desde: Optional[datetime] = None) -> Dict[str, int]:
+        """Siempre en cero."""
+        return _totales_vacios()
+
+    def por_mes(self, meses: int = 6) -> List[Dict[str, Any]]:
+        """Siempre vacío."""
+        return []
+
+    def estadisticas(self) -> Dict[str, Any]:
+        """Siempre en cero."""
+        return _estadisticas_vacias()
@@ -0,0 +1,126 @@
+# organizador_inteligente/retencion.py
+# -------------------------------------------------------------
+# Retención del historial
+# - Las filas de Historial más antiguas que HISTORIAL_RETENCION_DIAS pasan a
+#   archivos JSONL comprimidos: <datos>/historial_archivado/<id_usuario>/<AAAA-MM>.jsonl.gz
+# - Primero se escribe (y sincroniza) el archivo, después se borran las filas:
+#   si algo falla en medio, la fila queda en los dos sitios y la lectura la
+#   deduplica por id.
+# - Lectura y búsqueda en el archivo solo cuando se pide.
+# - Los archivos quedan en este equipo y las filas salen de la base compartida:
+#   archivar es siempre una acción explícita (CLI o botón del Historial) y, salvo
+#   que se pida todos=True, de un solo usuario.
+# -------------------------------------------------------------
+
+import gzip
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from config import HISTORIAL_LOTE_ARCHIVO, HISTORIAL_RETENCION_DIAS, ruta_historial_archivado
+from database import db_manager
+from tareas import TokenCancelacion
+
+# Compartido por todas las instancias: dos archivados a la vez no deben
+# intercalar escrituras en el mismo .jsonl.gz
+_LOCK_ESCRITURA = threading.Lock()
+
+
+def _serializar(fila: Dict[str, Any]) -> str:
+    """Fila de Historial como una línea JSON (detalle ya decodificado)."""
+    registro = dict(fila)
+    registro["fecha"] = fila["fecha"].isoformat()
+    try:
+        registro["detalle"] = json.loads(fila["detalle"]) if fila["detalle"] else {}
+    except ValueError:
+        pass  # se conserva el texto original
+    return json.dumps(registro, ensure_ascii=False, default=str)
+
+
+class ArchivoHistorial:
+    """Historial antiguo en archivos .jsonl.gz, uno por usuario y mes."""
+    def __init__(self, base: Optional[Path] = None):
+        self.base = Path(base) if base else ruta_historial_archivado()
+
+    def _ruta(self, user_id: int, mes: str) -> Path:
+        return self.base / str(user_id) / f"{mes}.jsonl.gz"
+
+    # ----- Escritura -----
+    def archivar(self, user_id: Optional[int], dias: int = HISTORIAL_RETENCION_DIAS,
+                 lote: int = HISTORIAL_LOTE_ARCHIVO, token: Optional[TokenCancelacion] = None,
+                 progreso_cb: Optional[Callable[[float], None]] = None,
+                 todos: bool = False) -> Dict[str, Any]:
+        """Mueve al archivo las filas anteriores a ``dias`` de ``user_id``.
+
+        Con ``user_id`` None hace falta ``todos=True``: se archiva el historial de
+        todos los usuarios, que deja de verse desde otros equipos.
+        """
+        if user_id is None and not todos:
+            raise ValueError("Archivar sin usuario afecta a todos: indica el usuario o todos=True")
+        corte = datetime.now() - timedelta(days=dias)
+        archivadas = 0
+        meses = set()
+        estado = "completado"
+        while True:
+            if token and not token.continuar():
+                estado = "cancelado"
+                break
+            filas = db_manager.get_history_before(corte, lote, user_id)
+            if not filas:
+                break
+            grupos: Dict[Path, List[str]] = {}
+            for fila in filas:
+                ruta = self._ruta(fila["id_usuario"], fila["fecha"].strftime("%Y-%m"))
+                grupos.setdefault(ruta, []).append(_serializar(fila))
+            with _LOCK_ESCRITURA:
+                for ruta, lineas in grupos.items():
+                    ruta.parent.mkdir(parents=True, exist_ok=True)
+                    # "ab" agrega otro miembro gzip: gzip.open los lee como un solo flujo
+                    with open(ruta, "ab") as f:
+                        f.write(gzip.compress(("\n".join(lineas) + "\n").encode("utf-8")))
+                        f.flush()
+                        os.fsync(f.fileno())
+                    meses.add(ruta)
+            if not db_manager.delete_history_ids([f["id_accion"] for f in filas]):
+                estado = "error"
+                break
+            archivadas += len(filas)
+            if progreso_cb:
+                progreso_cb(0.5)  # el total no se conoce sin contar todo el historial
+            if len(filas) < lote:
+                break
+        if progreso_cb:
+            progreso_cb(1.0)
+        return {"archivadas": archivadas, "archivos": len(meses), "estado": estado}
+
+    # ----- Lectura -----
+    def meses(self, user_id: int) -> List[str]:
+        """Meses archivados del usuario, del más reciente al más antiguo."""
+        carpeta = self.base / str(user_id)
+        if not carpeta.is_dir():
+            return []
+        return sorted((p.name[:-len(".jsonl.gz")] for p in carpeta.glob("*.jsonl.gz")), reverse=True)
+
+    def leer(self, user_id: int, texto: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Filas archivadas del usuario, de la más reciente a la más antigua.
+
+        Con ``texto`` solo las que lo contienen (sin distinguir mayúsculas); el filtro se
+        aplica a la línea sin decodificar, así que solo se decodifican las coincidencias.
+        """
+        aguja = texto.lower() if texto else None
+        vistos = set()
+        for mes in self.meses(user_id):
+            with gzip.open(self._ruta(user_id, mes), "rt", encoding="utf-8") as f:
+                lineas = f.readlines()
+            for linea in reversed(lineas):
+                if aguja and aguja not in linea.lower():
+                    continue
+                fila = json.loads(linea)
+                if fila["id_accion"] in vistos:
+                    continue
+                vistos.add(fila["id_accion"])
+                fila["fecha"] = datetime.fromisoformat(fila["fecha"])
+                yield fila
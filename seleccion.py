@@ -0,0 +1,120 @@
+# organizador_inteligente/seleccion.py
+# -------------------------------------------------------------
+# Resultados grandes con selección compacta (sin Flet)
+# - Un bit por fila para "seleccionada" y otro para "eliminada".
+# - Páginas de filas vivas para dibujar solo lo visible.
+# - Selección por patrón y eliminación incremental por ruta.
+# -------------------------------------------------------------
+
+import fnmatch
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+
+class ConjuntoBits:
+    """Conjunto de enteros en [0, n) con un bit por elemento."""
+    def __init__(self, n: int, lleno: bool = False):
+        self.n = n
+        self._bits = bytearray(b"\xff" if lleno else b"\x00") * ((n + 7) // 8)
+        if lleno and n % 8:
+            self._bits[-1] = (1 << (n % 8)) - 1
+        self._total = n if lleno else 0
+
+    def __contains__(self, i: int) -> bool:
+        return bool(self._bits[i >> 3] & (1 << (i & 7)))
+
+    def __len__(self) -> int:
+        return self._total
+
+    def poner(self, i: int, valor: bool = True) -> bool:
+        """Marca o desmarca i; devuelve True si cambió."""
+        mascara = 1 << (i & 7)
+        actual = bool(self._bits[i >> 3] & mascara)
+        if actual == valor:
+            return False
+        self._bits[i >> 3] ^= mascara
+        self._total += 1 if valor else -1
+        return True
+
+    def __iter__(self) -> Iterator[int]:
+        for byte_i, byte in enumerate(self._bits):
+            while byte:
+                bajo = byte & -byte
+                yield (byte_i << 3) + bajo.bit_length() - 1
+                byte ^= bajo
+
+
+class ResultadosSeleccionables:
+    """Lista de rutas con selección por bits, páginas y bajas incrementales."""
+    def __init__(self, rutas: Sequence[Path], seleccionadas: bool = True):
+        self.rutas: List[Path] = list(rutas)
+        self.seleccion = ConjuntoBits(len(self.rutas), lleno=seleccionadas)
+        self._eliminadas = ConjuntoBits(len(self.rutas))
+        self._indice_ruta: Optional[Dict[str, int]] = None
+        self._vivas: Optional[List[int]] = None
+
+    def __len__(self) -> int:
+        return len(self.rutas) - len(self._eliminadas)
+
+    def seleccionadas(self) -> int:
+        return len(self.seleccion)
+
+    def vivas(self) -> List[int]:
+        """Índices de las filas no eliminadas (se recalcula solo tras una baja)."""
+        if self._vivas is None:
+            if self._eliminadas:
+                self._vivas = [i for i in range(len(self.rutas)) if i not in self._eliminadas]
+            else:
+                self._vivas = list(range(len(self.rutas)))
+        return self._vivas
+
+    def paginas(self, por_pagina: int) -> int:
+        return max(1, -(-len(self) // por_pagina))
+
+    def pagina(self, numero: int, por_pagina: int) -> List[Tuple[int, Path, bool]]:
+        """Filas (índice, ruta, seleccionada) de la página ``numero`` (desde 0)."""
+        inicio = numero * por_pagina
+        return [(i, self.rutas[i], i in self.seleccion) for i in self.vivas()[inicio:inicio + por_pagina]]
+
+    def seleccionar(self, indice: int, valor: bool):
+        self.seleccion.poner(indice, valor)
+
+    def seleccionar_todas(self, valor: bool) -> int:
+        """Marca o desmarca todas las filas vivas; devuelve cuántas cambiaron."""
+        return sum(self.seleccion.poner(i, valor) for i in self.vivas())
+
+    def seleccionar_patron(self, patron: str, valor: bool) -> int:
+        """Marca o desmarca las filas cuya ruta casa con ``patron``; devuelve cuántas cambiaron.
+
+        Admite comodines de ``fnmatch`` (``*``, ``?``, ``[...]``); sin comodines se busca
+        como subcadena. Respeta mayúsculas según el sistema (``os.path.normcase``).
+        """
+        patron = os.path.normcase(patron.strip())
+        if not patron:
+            return 0
+        if not any(c in patron for c in "*?["):
+            patron = f"*{patron}*"
+        casa = re.compile(fnmatch.translate(patron)).match
+        return sum(
+            self.seleccion.poner(i, valor)
+            for i in self.vivas() if casa(os.path.normcase(str(self.rutas[i])))
+        )
+
+    def rutas_seleccionadas(self) -> List[Path]:
+        return [self.rutas[i] for i in self.seleccion]
+
+    def eliminar(self, rutas: Iterable[Path]) -> int:
+        """Da de baja las filas de ``rutas`` (coste proporcional a ``rutas``); devuelve cuántas."""
+        if self._indice_ruta is None:
+            self._indice_ruta = {str(r): i for i, r in enumerate(self.rutas)}
+        bajas = 0
+        for ruta in rutas:
+            i = self._indice_ruta.get(str(ruta))
+            if i is not None and self._eliminadas.poner(i):
+                self.seleccion.poner(i, False)
+                bajas += 1
+        if bajas:
+            self._vivas = None
+        return bajas
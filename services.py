@@ -3,28 +3,49 @@
 # Servicios de negocio (clasificación, reglas, carpetas)
 # -------------------------------------------------------------
 
+import hashlib
 import json
+import mmap
+import multiprocessing
 import os
 import shutil
+import stat
 import time
-import threading
-from dataclasses import asdict
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Callable
+from typing import List, Dict, Any, Optional, Callable, Iterator, Tuple
 
-from config import CATEGORIAS, EXCLUSIONES_POR_DEFECTO
+from config import (
+    EXCLUSIONES_POR_DEFECTO, CLASIFICACION_PROCESOS, CLASIFICACION_TAM_LOTE,
+    DUPLICADOS_BLOQUE, DUPLICADOS_HILOS, ruta_datos_app,
+)
 from models import ReglaClasificacion
+from analisis_reglas import Hallazgo, analizar, reglas_efectivas
+from evaluacion import (
+    Decision, PerfilReglas, RegistroArchivo, categoria_por_extension, compilar_vectorizado,
+    evaluar_lote, evaluar_lote_trabajador, inicializar_trabajador,
+)
 from repositories import RepositorioHistorial
 from database import db_manager
+from tareas import TokenCancelacion, CoordinadorTareas
+from huellas import AlmacenHuellas
+from tabla_archivos import TablaArchivos, TablaMovimientos
+from contenido import DetectorContenido
+from metricas import (
+    ARCHIVOS_ESCANEADOS, ARCHIVOS_MOVIDOS, BYTES_MOVIDOS, CARPETAS_ELIMINADAS, ERRORES,
+    MOVER_SEGUNDOS, CronometroFases, registrar_ejecucion,
+)
 
 class ServicioReglas:
     def __init__(self, user_id: int):
         self.user_id = user_id
 
-    def cargar(self) -> List[ReglaClasificacion]:
-        """Carga las reglas de clasificación desde la base de datos."""
-        reglas_db = db_manager.get_user_rules(self.user_id)
+    def cargar(self, filas: Optional[List[Dict[str, Any]]] = None) -> List[ReglaClasificacion]:
+        """Carga las reglas de clasificación desde la base de datos (o desde ``filas`` ya leídas)."""
+        reglas_db = filas if filas is not None else db_manager.get_user_rules(self.user_id)
         
         if not reglas_db:
             # Crear reglas de ejemplo si no hay ninguna
@@ -44,11 +65,9 @@ class ServicioReglas:
                 },
             ]
             
-            for regla_data in ejemplo:
-                db_manager.create_rule(self.user_id, regla_data)
-            
-            # Recargar las reglas
-            reglas_db = db_manager.get_user_rules(self.user_id)
+            # Un solo INSERT de varias filas; no hace falta volver a leerlas
+            db_manager.create_rules(self.user_id, ejemplo)
+            return [ReglaClasificacion(**r) for r in ejemplo]
         
         reglas = []
         for r in reglas_db:
@@ -65,8 +84,12 @@ class ServicioReglas:
         
         return reglas
 
-    def guardar(self, reglas: List[ReglaClasificacion]):
-        """Guarda las reglas de clasificación en la base de datos."""
+    def guardar(self, reglas: List[ReglaClasificacion]) -> List[Hallazgo]:
+        """Guarda las reglas de clasificación en la base de datos.
+
+        Devuelve los avisos del análisis estático (reglas sombreadas, solapadas o
+        inalcanzables); se guardan igual, el orden lo decide el usuario.
+        """
         # Eliminar reglas existentes
         reglas_existentes = db_manager.get_user_rules(self.user_id)
         for regla_existente in reglas_existentes:
@@ -84,107 +107,536 @@ class ServicioReglas:
                 "fecha_hasta": regla.fecha_hasta,
             }
             db_manager.create_rule(self.user_id, regla_data)
+        return analizar(reglas)
+
+class ServicioDuplicados:
+    """Busca archivos duplicados acotando candidatos por etapas.
+
+    1. Agrupa por tamaño (sin leer contenido).
+    2. Hash de los primeros y últimos ``DUPLICADOS_BLOQUE`` bytes.
+    3. Hash completo con lectura mapeada en memoria, solo para los que siguen empatados.
+    Las etapas 2 y 3 se calculan en paralelo en un pool de hilos y, con un
+    ``AlmacenHuellas``, se reutilizan entre ejecuciones.
+    """
+    def __init__(self, hilos: int = DUPLICADOS_HILOS, almacen: Optional[AlmacenHuellas] = None):
+        self.hilos = hilos
+        self.almacen = almacen
+
+    def _hash_parcial(self, ruta: str, tam: int) -> bytes:
+        """Hash de los extremos, desde el almacén de huellas si es válido."""
+        if self.almacen is not None:
+            return self.almacen.obtener(ruta, "parcial", self._calcular_parcial)
+        return self._calcular_parcial(ruta, tam)
+
+    def _hash_completo(self, ruta: str, tam: int) -> bytes:
+        """Hash completo, desde el almacén de huellas si es válido."""
+        if self.almacen is not None:
+            return self.almacen.obtener(ruta, "completo", self._calcular_completo)
+        return self._calcular_completo(ruta, tam)
+
+    def _calcular_parcial(self, ruta: str, tam: int) -> bytes:
+        """Hash de los extremos del archivo (cubre el archivo entero si es pequeño)."""
+        h = hashlib.blake2b(digest_size=20)
+        with open(ruta, "rb") as f:
+            h.update(f.read(DUPLICADOS_BLOQUE))
+            if tam > 2 * DUPLICADOS_BLOQUE:
+                f.seek(tam - DUPLICADOS_BLOQUE)
+            h.update(f.read(DUPLICADOS_BLOQUE))
+        return h.digest()
+
+    def _calcular_completo(self, ruta: str, tam: int) -> bytes:
+        """Hash de todo el contenido usando mmap."""
+        h = hashlib.blake2b(digest_size=20)
+        with open(ruta, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                h.update(m)
+        return h.digest()
+
+    def _refinar(self, grupos: List[List[Tuple[str, int]]], funcion: Callable[[str, int], bytes],
+                 token: Optional[TokenCancelacion]) -> List[List[Tuple[str, int]]]:
+        """Subdivide cada grupo por el hash indicado, descartando los que quedan solos."""
+        candidatos = [c for grupo in grupos for c in grupo]
+
+        def calcular(candidato: Tuple[str, int]) -> Optional[bytes]:
+            if token and not token.continuar():
+                return None
+            try:
+                return funcion(*candidato)
+            except OSError:
+                return None
+
+        por_hash: Dict[Tuple[int, bytes], List[Tuple[str, int]]] = {}
+        with ThreadPoolExecutor(max_workers=self.hilos) as pool:
+            for candidato, digest in zip(candidatos, pool.map(calcular, candidatos)):
+                if digest is not None:
+                    por_hash.setdefault((candidato[1], digest), []).append(candidato)
+        return [g for g in por_hash.values() if len(g) > 1]
+
+    def buscar(self, fuente: Path, exclusiones: Optional[List[str]] = None,
+               progreso_cb: Optional[Callable[[float], None]] = None,
+               token: Optional[TokenCancelacion] = None) -> List[List[Path]]:
+        """Devuelve los grupos de archivos con contenido idéntico (archivos vacíos excluidos)."""
+        exclusiones = set(exclusiones or []) | EXCLUSIONES_POR_DEFECTO
+        # El recorrido entero va a una tabla compacta; solo los tamaños repetidos
+        # se vuelven tuplas (ruta, tam)
+        tabla = TablaArchivos()
+        vistos = set()
+        for dirpath, dirnames, filenames in os.walk(fuente):
+            if token and not token.continuar():
+                return []
+            dirnames[:] = [d for d in dirnames if d not in exclusiones]
+            id_carpeta = None
+            for nombre in filenames:
+                try:
+                    st = os.stat(os.path.join(dirpath, nombre))
+                except OSError:
+                    continue
+                if not stat.S_ISREG(st.st_mode) or st.st_size == 0:
+                    continue
+                # Los enlaces duros son el mismo archivo, no un duplicado
+                if st.st_nlink > 1:
+                    if (st.st_dev, st.st_ino) in vistos:
+                        continue
+                    vistos.add((st.st_dev, st.st_ino))
+                if id_carpeta is None:
+                    id_carpeta = tabla.carpeta(dirpath)
+                tabla.agregar_en(id_carpeta, nombre, st.st_size, st.st_mtime)
+        if progreso_cb:
+            progreso_cb(0.2)
+
+        repetidos = {tam for tam, n in Counter(tabla.tam).items() if n > 1}
+        por_tam: Dict[int, List[Tuple[str, int]]] = {}
+        for i, tam in enumerate(tabla.tam):
+            if tam in repetidos:
+                por_tam.setdefault(tam, []).append((tabla.ruta(i), tam))
+        del tabla
+        grupos = list(por_tam.values())
+        grupos = self._refinar(grupos, self._hash_parcial, token)
+        if progreso_cb:
+            progreso_cb(0.5)
+        # Si el hash parcial ya cubrió el archivo completo no hace falta releerlo
+        completos = [g for g in grupos if g[0][1] <= 2 * DUPLICADOS_BLOQUE]
+        grandes = [g for g in grupos if g[0][1] > 2 * DUPLICADOS_BLOQUE]
+        grupos = completos + self._refinar(grandes, self._hash_completo, token)
+        if self.almacen is not None:
+            self.almacen.guardar()
+        if token and token.cancelado:
+            return []
+        if progreso_cb:
+            progreso_cb(1.0)
+        return sorted([sorted(Path(r) for r, _ in g) for g in grupos], key=lambda g: str(g[0]))
+
+    def son_identicos(self, a: Path, b: Path) -> bool:
+        """Compara dos archivos por tamaño, extremos y, si hace falta, contenido completo."""
+        try:
+            sa, sb = a.stat(), b.stat()
+            if (sa.st_dev, sa.st_ino) == (sb.st_dev, sb.st_ino):
+                return True
+            if sa.st_size != sb.st_size:
+                return False
+            tam = sa.st_size
+            if tam == 0:
+                return True
+            if self._hash_parcial(str(a), tam) != self._hash_parcial(str(b), tam):
+                return False
+            if tam <= 2 * DUPLICADOS_BLOQUE:
+                return True
+            return self._hash_completo(str(a), tam) == self._hash_completo(str(b), tam)
+        except OSError:
+            return False
+
+@dataclass
+class _EjecucionClasificacion:
+    """Estado acumulado durante una ejecución de clasificación."""
+    destino_base: Path
+    movidos: TablaMovimientos = field(default_factory=TablaMovimientos)
+    duplicados: List[tuple] = field(default_factory=list)
+    carpeta_cuarentena: Optional[Path] = None
+    crono: CronometroFases = field(default_factory=CronometroFases)
+    por_categoria: Dict[str, int] = field(default_factory=dict)  # subcarpeta -> archivos movidos
+    perfil: Optional[PerfilReglas] = None  # solo con reglas personalizadas
 
 class ServicioClasificacion:
-    def __init__(self, repo_historial: RepositorioHistorial):
+    POLITICAS_DUPLICADOS = ("renombrar", "omitir", "cuarentena")
+
+    def __init__(self, repo_historial: RepositorioHistorial, duplicados: str = "renombrar",
+                 almacen_huellas: Optional[AlmacenHuellas] = None,
+                 detector_contenido: Optional[DetectorContenido] = None):
+        """``duplicados`` decide qué hacer si el destino ya tiene un archivo idéntico:
+        renombrar (copia con sufijo), omitir (dejarlo en su sitio) o cuarentena.
+        Con ``almacen_huellas`` las huellas conocidas siguen a los archivos movidos.
+        Con ``detector_contenido`` los archivos sin regla se clasifican también por
+        sus primeros bytes (extensión ausente, desconocida o engañosa)."""
+        if duplicados not in self.POLITICAS_DUPLICADOS:
+            raise ValueError(f"Política de duplicados desconocida: {duplicados}")
         self.repo = repo_historial
+        self.duplicados = duplicados
+        self.almacen_huellas = almacen_huellas
+        self.detector_duplicados = ServicioDuplicados(almacen=almacen_huellas)
+        self.detector_contenido = detector_contenido
 
     def _categoria_por_extension(self, ext: str) -> Optional[str]:
         """Determina la categoría basada en la extensión del archivo."""
-        ext = ext.lower().lstrip(".")
-        for cat, lista in CATEGORIAS.items():
-            if ext in lista:
-                return cat
-        return None
+        return categoria_por_extension(ext)
+
+    def _registro(self, ruta: str) -> Optional[RegistroArchivo]:
+        """Lee los metadatos de un archivo regular; None si no existe o no es un archivo."""
+        try:
+            st = os.stat(ruta)
+        except OSError:
+            return None
+        if not stat.S_ISREG(st.st_mode):
+            return None
+        ext = os.path.splitext(ruta)[1].lower().lstrip(".")
+        return (ruta, ext, st.st_size, st.st_mtime)
+
+    def _lotes_por_carpeta(self, fuente: Path) -> Iterator[List[RegistroArchivo]]:
+        """Recorre la fuente entregando los metadatos de los archivos de cada carpeta como un lote."""
+        for dirpath, _dirnames, filenames in os.walk(fuente):
+            lote = []
+            for nombre in filenames:
+                registro = self._registro(os.path.join(dirpath, nombre))
+                if registro is not None:
+                    lote.append(registro)
+            if lote:
+                yield lote
+
+    def _lotes_agrupados(self, fuente: Path, tam_lote: int,
+                         token: Optional[TokenCancelacion] = None) -> Iterator[List[RegistroArchivo]]:
+        """Como _lotes_por_carpeta, pero juntando carpetas hasta ``tam_lote`` registros (evaluación vectorizada).
+
+        El token se consulta en cada carpeta; al cancelar se termina sin entregar lo acumulado.
+        """
+        acumulado: List[RegistroArchivo] = []
+        for lote in self._lotes_por_carpeta(fuente):
+            if token and not token.continuar():
+                return
+            acumulado.extend(lote)
+            if len(acumulado) >= tam_lote:
+                yield acumulado
+                acumulado = []
+        if acumulado:
+            yield acumulado
+
+    @staticmethod
+    def _contar_archivos(fuente: Path, token: Optional[TokenCancelacion]) -> Optional[int]:
+        """Cuenta los archivos de la fuente para el progreso; None si se cancela durante el recorrido."""
+        total = 0
+        for _dirpath, _dirnames, filenames in os.walk(fuente):
+            if token and not token.continuar():
+                return None
+            total += len(filenames)
+        return total
+
+    def _mover(self, archivo: Path, destino: Path, crono: CronometroFases) -> Optional[Path]:
+        """Mueve el archivo a la carpeta destino evitando sobrescribir; devuelve la nueva ruta."""
+        t = crono.ahora()
+        destino.mkdir(exist_ok=True)
+        t = crono.sumar("mkdir", t)
+        try:
+            nuevo = destino / archivo.name
+            if nuevo.exists():
+                marca = int(time.time())
+                nuevo = destino / f"{archivo.stem}_{marca}{archivo.suffix}"
+                i = 1
+                while nuevo.exists():
+                    nuevo = destino / f"{archivo.stem}_{marca}_{i}{archivo.suffix}"
+                    i += 1
+            shutil.move(str(archivo), str(nuevo))
+            return nuevo
+        except Exception:
+            crono.errores += 1
+            ERRORES.inc(1, "mover")
+            return None
+        finally:
+            MOVER_SEGUNDOS.observe(crono.sumar("mover", t) - t)
+
+    def _resolver_duplicado(self, archivo: Path, ejecucion: _EjecucionClasificacion) -> bool:
+        """Aplica la política de duplicados a un archivo idéntico al del destino."""
+        if self.duplicados == "omitir":
+            ejecucion.duplicados.append((str(archivo), None))
+            return True
+        if ejecucion.carpeta_cuarentena is None:
+            ejecucion.carpeta_cuarentena = (
+                ruta_datos_app() / "cuarentena" / f"duplicados_{datetime.now():%Y%m%d_%H%M%S}"
+            )
+        nuevo = self._mover(archivo, ejecucion.carpeta_cuarentena, ejecucion.crono)
+        if nuevo is None:
+            return False
+        ejecucion.duplicados.append((str(archivo), str(nuevo)))
+        return True
 
-    def clasificar_basico(self, fuente: Path, destino_base: Optional[Path] = None, progreso_cb: Optional[Callable[[float], None]] = None) -> Dict[str, Any]:
+    def _aplicar(self, decisiones: List[Decision], ejecucion: _EjecucionClasificacion):
+        """Ejecuta los movimientos decididos y los acumula en la ejecución."""
+        crono = ejecucion.crono
+        for origen, subcarpeta, regla, tam in decisiones:
+            archivo = Path(origen)
+            destino = ejecucion.destino_base / subcarpeta
+            if self.duplicados != "renombrar":
+                t = crono.ahora()
+                existente = destino / archivo.name
+                identico = existente.exists() and self.detector_duplicados.son_identicos(archivo, existente)
+                crono.sumar("duplicados", t)
+                if identico and self._resolver_duplicado(archivo, ejecucion):
+                    continue
+            nuevo = self._mover(archivo, destino, crono)
+            if nuevo is not None:
+                crono.bytes_movidos += tam
+                BYTES_MOVIDOS.inc(tam)
+                ARCHIVOS_MOVIDOS.inc(1, regla if regla in ("basico", "contenido") else "regla")
+                ejecucion.movidos.agregar(origen, str(nuevo), regla)
+                ejecucion.por_categoria[subcarpeta] = ejecucion.por_categoria.get(subcarpeta, 0) + 1
+                if self.almacen_huellas is not None:
+                    self.almacen_huellas.registrar_movimiento(origen, str(nuevo))
+
+    def _detalle(self, ejecucion: _EjecucionClasificacion) -> Dict[str, Any]:
+        """Campos comunes del detalle de historial."""
+        detalle: Dict[str, Any] = {"archivos_movidos": len(ejecucion.movidos)}
+        if ejecucion.por_categoria:
+            detalle["por_categoria"] = dict(ejecucion.por_categoria)
+        if self.duplicados != "renombrar":
+            detalle["politica_duplicados"] = self.duplicados
+            detalle["duplicados"] = len(ejecucion.duplicados)
+        if self.detector_contenido is not None:
+            detalle["por_contenido"] = ejecucion.movidos.contar("contenido")
+        if ejecucion.perfil is not None:
+            detalle["perfil_reglas"] = ejecucion.perfil.como_lista()
+        return detalle
+
+    def _registrar(self, detalle: Dict[str, Any], ejecucion: _EjecucionClasificacion):
+        """Guarda el detalle; si hubo cuarentena queda como ruta restaurable.
+
+        El tiempo de la propia escritura del historial no puede ir en el registro
+        que se está escribiendo: solo se agrega al detalle devuelto.
+        """
+        crono = ejecucion.crono
+        if self.almacen_huellas is not None:
+            t = crono.ahora()
+            self.almacen_huellas.guardar()
+            crono.sumar("huellas", t)
+        cuarentena = ejecucion.carpeta_cuarentena
+        detalle["metricas"] = crono.como_dict()
+        t = crono.ahora()
+        self.repo.registrar("clasificacion", detalle,
+                            ruta_cuarentena=str(cuarentena) if cuarentena else None,
+                            movimientos=ejecucion.movidos)
+        crono.sumar("bd", t)
+        detalle["metricas"] = crono.como_dict()
+        registrar_ejecucion("clasificacion", detalle.get("estado", "completado"))
+
+    def _clasificar(self, fuente: Path, reglas: List[ReglaClasificacion], destino_base: Path,
+                    progreso_cb: Optional[Callable[[float], None]], token: Optional[TokenCancelacion],
+                    procesos: int, tam_lote: int) -> Tuple[Dict[str, Any], _EjecucionClasificacion]:
+        """Recorre, decide y mueve; devuelve los contadores comunes del detalle."""
+        ejecucion = _EjecucionClasificacion(destino_base)
+        if reglas:
+            ejecucion.perfil = PerfilReglas([r.nombre for r in reglas])
+        crono = ejecucion.crono
+        t = crono.ahora()
+        total = self._contar_archivos(fuente, token)
+        crono.sumar("escaneo", t)
+        procesados = 0
+        cancelado = total is None
+        total = total or 0
+
+        def aplicar(decisiones: List[Decision]):
+            self._aplicar(decisiones, ejecucion)
+
+        def avanzar(n: int):
+            nonlocal procesados
+            antes = procesados
+            procesados += n
+            ARCHIVOS_ESCANEADOS.inc(n)
+            if progreso_cb and procesados // 25 != antes // 25:
+                progreso_cb(min(0.95, procesados / max(1, total)))
+
+        if not cancelado:
+            if procesos > 0:
+                cancelado = self._clasificar_en_procesos(
+                    fuente, reglas, aplicar, avanzar, token, procesos, tam_lote, crono, ejecucion.perfil
+                )
+            else:
+                evaluador = compilar_vectorizado(reglas)
+                lotes = (self._lotes_por_carpeta(fuente) if evaluador is None
+                         else self._lotes_agrupados(fuente, tam_lote, token))
+                t = crono.ahora()
+                for lote in lotes:
+                    t = crono.sumar("escaneo", t)
+                    if token and not token.continuar():
+                        break
+                    decisiones = evaluar_lote(reglas, lote, self.detector_contenido,
+                                              ejecucion.perfil, evaluador)
+                    crono.sumar("reglas", t)
+                    aplicar(decisiones)
+                    avanzar(len(lote))
+                    t = crono.ahora()
+                # _lotes_agrupados también termina antes si se cancela entre carpetas
+                cancelado = token is not None and token.cancelado
+        if self.detector_contenido is not None:
+            # Los hilos de lectura no quedan vivos entre ejecuciones; la caché sí
+            self.detector_contenido.cerrar()
+
+        detalle = self._detalle(ejecucion)
+        detalle.update({
+            "archivos_procesados": procesados,
+            "archivos_totales": total,
+            "estado": "cancelado" if cancelado else "completado",
+        })
+        return detalle, ejecucion
+
+    def _clasificar_en_procesos(self, fuente: Path, reglas: List[ReglaClasificacion],
+                                aplicar: Callable[[List[Decision]], None], avanzar: Callable[[int], None],
+                                token: Optional[TokenCancelacion], procesos: int, tam_lote: int,
+                                crono: CronometroFases, perfil: Optional[PerfilReglas] = None) -> bool:
+        """Evalúa lotes de metadatos en un pool de procesos; los movimientos se aplican aquí.
+
+        Devuelve True si la tarea fue cancelada. Los lotes pendientes al cancelar
+        se descartan sin mover nada, de modo que el resultado parcial es consistente.
+        La fase "reglas" mide aquí la espera de resultados, no el CPU de los trabajadores.
+        """
+        pendientes: deque = deque()
+        max_en_vuelo = procesos * 2
+        # "spawn" evita heredar hilos de la UI en un fork
+        contexto = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=procesos, mp_context=contexto,
+                                 initializer=inicializar_trabajador,
+                                 initargs=(reglas, self.detector_contenido is not None)) as pool:
+
+            def recoger(hasta: int):
+                while len(pendientes) > hasta:
+                    t = crono.ahora()
+                    evaluados, decisiones, contadores = pendientes.popleft().result()
+                    crono.sumar("reglas", t)
+                    if perfil is not None and contadores is not None:
+                        perfil.sumar(contadores)
+                    aplicar(decisiones)
+                    avanzar(evaluados)
+
+            acumulado: List[RegistroArchivo] = []
+            t = crono.ahora()
+            for lote in self._lotes_por_carpeta(fuente):
+                crono.sumar("escaneo", t)
+                if token and not token.continuar():
+                    pool.shutdown(wait=True, cancel_futures=True)
+                    return True
+                acumulado.extend(lote)
+                while len(acumulado) >= tam_lote:
+                    pendientes.append(pool.submit(evaluar_lote_trabajador, acumulado[:tam_lote]))
+                    del acumulado[:tam_lote]
+                    recoger(max_en_vuelo)
+                t = crono.ahora()
+            if acumulado:
+                pendientes.append(pool.submit(evaluar_lote_trabajador, acumulado))
+            recoger(0)
+        return False
+
+    def clasificar_basico(self, fuente: Path, destino_base: Optional[Path] = None,
+                          progreso_cb: Optional[Callable[[float], None]] = None,
+                          token: Optional[TokenCancelacion] = None) -> Dict[str, Any]:
         """Clasifica archivos de manera básica por tipo de extensión."""
         if destino_base is None:
             destino_base = fuente
-        movidos = []
-        total = sum(1 for _ in fuente.rglob("*") if _.is_file())
-        procesados = 0
-        for archivo in fuente.rglob("*"):
-            if archivo.is_file():
-                procesados += 1
-                if progreso_cb and procesados % 25 == 0:
-                    progreso_cb(min(0.95, procesados / max(1, total)))
-                categoria = self._categoria_por_extension(archivo.suffix)
-                if categoria is None:
-                    continue
-                destino = destino_base / categoria
-                destino.mkdir(exist_ok=True)
-                try:
-                    nuevo = destino / archivo.name
-                    if nuevo.exists():
-                        nuevo = destino / f"{archivo.stem}_{int(time.time())}{archivo.suffix}"
-                    shutil.move(str(archivo), str(nuevo))
-                    movidos.append((str(archivo), str(nuevo)))
-                except Exception:
-                    pass
-        detalle = {"archivos_movidos": len(movidos)}
-        self.repo.registrar("clasificacion", detalle)
+        detalle, ejecucion = self._clasificar(
+            fuente, [], destino_base, progreso_cb, token, 0, CLASIFICACION_TAM_LOTE
+        )
+        self._registrar(detalle, ejecucion)
         if progreso_cb:
             progreso_cb(1.0)
         return detalle
 
-    def clasificar_avanzado(self, fuente: Path, reglas: List[ReglaClasificacion], destino_base: Optional[Path] = None, progreso_cb: Optional[Callable[[float], None]] = None) -> Dict[str, Any]:
-        """Clasifica archivos usando reglas avanzadas con fallback a clasificación básica."""
+    def clasificar_avanzado(self, fuente: Path, reglas: List[ReglaClasificacion],
+                            destino_base: Optional[Path] = None,
+                            progreso_cb: Optional[Callable[[float], None]] = None,
+                            token: Optional[TokenCancelacion] = None,
+                            procesos: Optional[int] = None,
+                            tam_lote: Optional[int] = None) -> Dict[str, Any]:
+        """Clasifica archivos usando reglas avanzadas con fallback a clasificación básica.
+
+        Con ``procesos`` > 0 las reglas se evalúan en un pool de procesos por lotes
+        de ``tam_lote`` registros (por defecto, los valores de config).
+        """
         if destino_base is None:
             destino_base = fuente
-        movidos = []
-        total = sum(1 for _ in fuente.rglob("*") if _.is_file())
-        procesados = 0
-        for archivo in fuente.rglob("*"):
-            if not archivo.is_file():
-                continue
-            procesados += 1
-            if progreso_cb and procesados % 25 == 0:
-                progreso_cb(min(0.95, procesados / max(1, total)))
-            aplicado = False
-            for regla in reglas:
-                if regla.coincide(archivo):
-                    destino = destino_base / regla.destino_subcarpeta
-                    destino.mkdir(exist_ok=True)
-                    try:
-                        nuevo = destino / archivo.name
-                        if nuevo.exists():
-                            nuevo = destino / f"{archivo.stem}_{int(time.time())}{archivo.suffix}"
-                        shutil.move(str(archivo), str(nuevo))
-                        movidos.append((str(archivo), str(nuevo), regla.nombre))
-                        aplicado = True
-                        break
-                    except Exception:
-                        pass
-            if not aplicado:
-                categoria = self._categoria_por_extension(archivo.suffix)
-                if categoria is None:
-                    continue
-                destino = destino_base / categoria
-                destino.mkdir(exist_ok=True)
-                try:
-                    nuevo = destino / archivo.name
-                    if nuevo.exists():
-                        nuevo = destino / f"{archivo.stem}_{int(time.time())}{archivo.suffix}"
-                    shutil.move(str(archivo), str(nuevo))
-                    movidos.append((str(archivo), str(nuevo), "basico"))
-                except Exception:
-                    pass
-        detalle = {"archivos_movidos": len(movidos), "reglas": [r.nombre for r in reglas]}
-        self.repo.registrar("clasificacion", detalle)
+        procesos = CLASIFICACION_PROCESOS if procesos is None else procesos
+        tam_lote = tam_lote or CLASIFICACION_TAM_LOTE
+        efectivas = reglas_efectivas(reglas)
+        detalle, ejecucion = self._clasificar(
+            fuente, efectivas, destino_base, progreso_cb, token, procesos, tam_lote
+        )
+        detalle["reglas"] = [r.nombre for r in reglas]
+        if len(efectivas) < len(reglas):
+            vivas = {id(r) for r in efectivas}
+            detalle["reglas_descartadas"] = [r.nombre for r in reglas if id(r) not in vivas]
+        self._registrar(detalle, ejecucion)
         if progreso_cb:
             progreso_cb(1.0)
         return detalle
 
+    def clasificar_archivos(self, archivos: List[Path], reglas: List[ReglaClasificacion],
+                            destino_base: Path) -> Dict[str, Any]:
+        """Clasifica solo los archivos indicados (p. ej. los detectados por la vigilancia)."""
+        ejecucion = _EjecucionClasificacion(destino_base)
+        todas, reglas = reglas, reglas_efectivas(reglas)
+        if reglas:
+            ejecucion.perfil = PerfilReglas([r.nombre for r in reglas])
+        crono = ejecucion.crono
+        t = crono.ahora()
+        lote = [r for r in (self._registro(str(a)) for a in archivos) if r is not None]
+        ARCHIVOS_ESCANEADOS.inc(len(lote))
+        t = crono.sumar("escaneo", t)
+        decisiones = evaluar_lote(reglas, lote, self.detector_contenido, ejecucion.perfil,
+                                  compilar_vectorizado(reglas))
+        crono.sumar("reglas", t)
+        if self.detector_contenido is not None:
+            self.detector_contenido.cerrar()
+        self._aplicar(decisiones, ejecucion)
+        detalle = self._detalle(ejecucion)
+        detalle.update({
+            "archivos_procesados": len(lote),
+            "archivos_totales": len(archivos),
+            "estado": "completado",
+            "reglas": [r.nombre for r in todas],
+            "origen": "vigilancia",
+        })
+        if ejecucion.movidos or ejecucion.duplicados:
+            self._registrar(detalle, ejecucion)
+        else:
+            detalle["metricas"] = crono.como_dict()
+            registrar_ejecucion("clasificacion", "completado")
+        return detalle
+
 class ServicioCarpetas:
     def __init__(self, repo_historial: RepositorioHistorial):
         self.repo = repo_historial
 
-    def detectar_vacias(self, carpeta: Path, exclusiones: Optional[List[str]] = None) -> List[Path]:
+    def detectar_vacias(self, carpeta: Path, exclusiones: Optional[List[str]] = None,
+                        token: Optional[TokenCancelacion] = None) -> List[Path]:
         """Detecta carpetas vacías en la ruta especificada, excluyendo las definidas."""
+        return self.detectar_vacias_con_tiempo(carpeta, exclusiones, token)[0]
+
+    def detectar_vacias_con_tiempo(self, carpeta: Path, exclusiones: Optional[List[str]] = None,
+                                   token: Optional[TokenCancelacion] = None) -> Tuple[List[Path], float]:
+        """Como detectar_vacias, junto con los segundos del recorrido (para ``eliminar_vacias``).
+
+        Si se cancela, la lista es parcial (``token.cancelado`` lo indica) y se deja
+        constancia en el historial con las carpetas encontradas hasta ese momento.
+        """
         exclusiones = set(exclusiones or []) | EXCLUSIONES_POR_DEFECTO
+        inicio = time.perf_counter()
         candidatas = []
         for dirpath, dirnames, filenames in os.walk(carpeta, topdown=False):
+            if token and not token.continuar():
+                escaneo_s = time.perf_counter() - inicio
+                crono = CronometroFases()
+                crono.incluir_previo("escaneo", escaneo_s)
+                self.repo.registrar("carpeta_vacia", {
+                    "accion": "detectar",
+                    "estado": "cancelado",
+                    "carpetas_encontradas": len(candidatas),
+                    "metricas": crono.como_dict(),
+                }, ruta_origen=str(carpeta))
+                registrar_ejecucion("carpetas", "cancelado")
+                return candidatas, escaneo_s
             p = Path(dirpath)
             if p == carpeta:
                 continue
@@ -192,27 +644,53 @@ class ServicioCarpetas:
                 continue
             if len(dirnames) == 0 and len(filenames) == 0:
                 candidatas.append(p)
-        return candidatas
+        return candidatas, time.perf_counter() - inicio
 
-    def eliminar_vacias(self, carpetas: List[Path], progreso_cb: Optional[Callable[[float], None]] = None) -> List[Path]:
-        """Elimina carpetas vacías y registra la acción."""
+    def eliminar_vacias(self, carpetas: List[Path], progreso_cb: Optional[Callable[[float], None]] = None,
+                        token: Optional[TokenCancelacion] = None, escaneo_s: float = 0.0) -> List[Path]:
+        """Elimina carpetas vacías y registra la acción.
+
+        Se guarda un solo registro por ejecución, con el estado, la cantidad de
+        carpetas eliminadas y las métricas; ``escaneo_s`` es el tiempo de la detección
+        que produjo ``carpetas`` (detectar_vacias_con_tiempo), si se quiere incluir.
+        """
+        crono = CronometroFases()
+        if escaneo_s:
+            crono.incluir_previo("escaneo", escaneo_s)
         eliminadas = []
         total = len(carpetas)
         procesados = 0
+        cancelado = False
         for c in carpetas:
+            if token and not token.continuar():
+                cancelado = True
+                break
+            procesados += 1
+            t = crono.ahora()
             try:
                 shutil.rmtree(str(c))
-                eliminadas.append(c)
-                self.repo.registrar(
-                    "carpeta_vacia",
-                    {"accion": "eliminar"},
-                    ruta_origen=str(c),
-                )
-                procesados += 1
-                if progreso_cb and procesados % 10 == 0:
-                    progreso_cb(min(0.95, procesados / max(1, total)))
             except Exception:
-                pass
+                crono.errores += 1
+                ERRORES.inc(1, "eliminar")
+                crono.sumar("eliminar", t)
+                continue
+            crono.sumar("eliminar", t)
+            CARPETAS_ELIMINADAS.inc()
+            eliminadas.append(c)
+            if progreso_cb and procesados % 10 == 0:
+                progreso_cb(min(0.95, procesados / max(1, total)))
+        if total:
+            # Dejar constancia del resultado (parcial si se canceló)
+            resumen = {
+                "accion": "eliminar",
+                "estado": "cancelado" if cancelado else "completado",
+                "carpetas_eliminadas": len(eliminadas),
+                "metricas": crono.como_dict(),
+            }
+            if cancelado:
+                resumen["carpetas_pendientes"] = total - procesados
+            self.repo.registrar("carpeta_vacia", resumen)
+            registrar_ejecucion("carpetas", resumen["estado"])
         if progreso_cb:
             progreso_cb(1.0)
         return eliminadas
@@ -235,24 +713,3 @@ class ServicioCarpetas:
             return True
         except Exception:
             return False
-
-class CoordinadorTareas:
-    def __init__(self):
-        self.hilo: Optional[threading.Thread] = None
-        self.cancelar = threading.Event()
-
-    def en_ejecucion(self) -> bool:
-        """Verifica si hay una tarea en ejecución."""
-        return self.hilo is not None and self.hilo.is_alive()
-
-    def ejecutar(self, funcion, *args, **kwargs):
-        """Ejecuta una tarea en un hilo separado."""
-        if self.en_ejecucion():
-            raise RuntimeError("Ya hay una tarea en ejecución")
-        self.cancelar.clear()
-        self.hilo = threading.Thread(target=funcion, args=args, kwargs=kwargs, daemon=True)
-        self.hilo.start()
-
-    def detener(self):
-        """Detiene la tarea actual."""
-        self.cancelar.set()
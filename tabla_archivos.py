@@ -0,0 +1,140 @@
+# organizador_inteligente/tabla_archivos.py
+# -------------------------------------------------------------
+# Tablas compactas de archivos para recorridos muy grandes
+# - Una fila por archivo en columnas de ``array``: id de carpeta (internada),
+#   fin del nombre dentro de un búfer compartido, tamaño y fecha de modificación.
+# - Ni Path ni tuplas por archivo: unas decenas de bytes por fila en lugar de
+#   cientos; las rutas se rearman solo al leerlas.
+# - Los nombres se guardan con os.fsencode, así que cualquier ruta vuelve igual.
+# - columnas_numpy() entrega tamaño y fecha como vistas de NumPy (opcional).
+# -------------------------------------------------------------
+
+import os
+import sys
+from array import array
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+
+from evaluacion import RegistroArchivo, _numpy
+
+if TYPE_CHECKING:
+    import numpy
+
+
+class TablaArchivos:
+    """Archivos en columnas; ``metadatos=False`` omite las de tamaño y fecha."""
+    def __init__(self, metadatos: bool = True):
+        self._carpetas: List[str] = []
+        self._ids_carpeta: Dict[str, int] = {}
+        self._carpeta = array("I")
+        self._fin_nombre = array("Q")
+        self._nombres = bytearray()
+        self.tam: Optional[array] = array("q") if metadatos else None
+        self.mtime: Optional[array] = array("d") if metadatos else None
+
+    def __len__(self) -> int:
+        return len(self._carpeta)
+
+    # ----- Escritura -----
+    def carpeta(self, ruta: str) -> int:
+        """Id de la carpeta, internándola la primera vez."""
+        id_carpeta = self._ids_carpeta.get(ruta)
+        if id_carpeta is None:
+            id_carpeta = self._ids_carpeta[ruta] = len(self._carpetas)
+            self._carpetas.append(ruta)
+        return id_carpeta
+
+    def agregar_en(self, id_carpeta: int, nombre: str, tam: int = 0, mtime: float = 0.0) -> int:
+        """Agrega ``nombre`` dentro de una carpeta ya internada; devuelve el índice de la fila."""
+        self._carpeta.append(id_carpeta)
+        self._nombres += os.fsencode(nombre)
+        self._fin_nombre.append(len(self._nombres))
+        if self.tam is not None:
+            self.tam.append(tam)
+            self.mtime.append(mtime)
+        return len(self._carpeta) - 1
+
+    def agregar(self, ruta: str, tam: int = 0, mtime: float = 0.0) -> int:
+        """Agrega una ruta completa; devuelve el índice de la fila."""
+        carpeta, nombre = os.path.split(ruta)
+        return self.agregar_en(self.carpeta(carpeta), nombre, tam, mtime)
+
+    # ----- Lectura -----
+    def nombre(self, i: int) -> str:
+        inicio = self._fin_nombre[i - 1] if i else 0
+        return os.fsdecode(bytes(self._nombres[inicio:self._fin_nombre[i]]))
+
+    def carpeta_de(self, i: int) -> str:
+        return self._carpetas[self._carpeta[i]]
+
+    def ruta(self, i: int) -> str:
+        return os.path.join(self.carpeta_de(i), self.nombre(i))
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(len(self)):
+            yield self.ruta(i)
+
+    def registros(self) -> Iterator[RegistroArchivo]:
+        """Filas como RegistroArchivo (ruta, ext, tam, mtime), de a una."""
+        if self.tam is None:
+            raise ValueError("La tabla no guarda tamaño ni fecha")
+        for i in range(len(self)):
+            ruta = self.ruta(i)
+            ext = os.path.splitext(ruta)[1].lower().lstrip(".")
+            yield (ruta, ext, self.tam[i], self.mtime[i])
+
+    def columnas_numpy(self) -> Optional[Tuple["numpy.ndarray", "numpy.ndarray"]]:
+        """(tamaños, fechas) como vistas de NumPy sin copia; None sin numpy o sin metadatos.
+
+        Las vistas dejan de ser válidas si se agregan filas después.
+        """
+        np = _numpy()
+        if np is None or self.tam is None:
+            return None
+        return np.frombuffer(self.tam, dtype=np.int64), np.frombuffer(self.mtime, dtype=np.float64)
+
+    def bytes_usados(self) -> int:
+        """Memoria ocupada por las columnas, el búfer de nombres y las carpetas internadas."""
+        total = sum(sys.getsizeof(c) for c in (self._carpeta, self._fin_nombre, self._nombres))
+        if self.tam is not None:
+            total += sys.getsizeof(self.tam) + sys.getsizeof(self.mtime)
+        total += sys.getsizeof(self._carpetas) + sys.getsizeof(self._ids_carpeta)
+        return total + sum(sys.getsizeof(c) for c in self._carpetas)
+
+
+class TablaMovimientos:
+    """Pares (origen, destino) de una ejecución con la regla que decidió cada uno."""
+    def __init__(self):
+        self.origenes = TablaArchivos(metadatos=False)
+        self.destinos = TablaArchivos(metadatos=False)
+        self._reglas: List[str] = []
+        self._ids_regla: Dict[str, int] = {}
+        self._regla = array("I")
+
+    def __len__(self) -> int:
+        return len(self._regla)
+
+    def agregar(self, origen: str, destino: str, regla: str):
+        id_regla = self._ids_regla.get(regla)
+        if id_regla is None:
+            id_regla = self._ids_regla[regla] = len(self._reglas)
+            self._reglas.append(regla)
+        self.origenes.agregar(origen)
+        self.destinos.agregar(destino)
+        self._regla.append(id_regla)
+
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        """Pares (origen, destino) en el orden en que se movieron."""
+        for i in range(len(self)):
+            yield self.origenes.ruta(i), self.destinos.ruta(i)
+
+    def regla(self, i: int) -> str:
+        return self._reglas[self._regla[i]]
+
+    def contar(self, regla: str) -> int:
+        """Movimientos decididos por ``regla``."""
+        id_regla = self._ids_regla.get(regla)
+        return 0 if id_regla is None else self._regla.count(id_regla)
+
+    def bytes_usados(self) -> int:
+        return (self.origenes.bytes_usados() + self.destinos.bytes_usados()
+                + sys.getsizeof(self._regla) + sum(sys.getsizeof(r) for r in self._reglas))
@@ -0,0 +1,277 @@
+# organizador_inteligente/tareas.py
+# -------------------------------------------------------------
+# Planificador de tareas en segundo plano
+# - Cola con prioridades e identificador por trabajo.
+# - Límite de concurrencia global y por unidad de almacenamiento.
+# - Cancelación y pausa cooperativas mediante TokenCancelacion.
+# -------------------------------------------------------------
+
+import heapq
+import itertools
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from metricas import TAREAS_ACTIVAS, TAREAS_EN_COLA, TAREAS_SEGUNDOS
+
+PRIORIDAD_ALTA = 0
+PRIORIDAD_NORMAL = 5
+PRIORIDAD_BAJA = 10
+
+ESTADOS_FINALES = {"completado", "cancelado", "error"}
+
+
+class TokenCancelacion:
+    """Señal cooperativa de cancelación y pausa que los servicios consultan por lote."""
+    def __init__(self):
+        self._cancelado = threading.Event()
+        self._reanudado = threading.Event()
+        self._reanudado.set()
+
+    @property
+    def cancelado(self) -> bool:
+        """Indica si se solicitó cancelar la tarea."""
+        return self._cancelado.is_set()
+
+    @property
+    def pausado(self) -> bool:
+        """Indica si la tarea está en pausa."""
+        return not self._reanudado.is_set()
+
+    def cancelar(self):
+        """Solicita la cancelación (también libera una tarea en pausa)."""
+        self._cancelado.set()
+        self._reanudado.set()
+
+    def pausar(self):
+        """Pone la tarea en pausa en el próximo punto de control."""
+        if not self._cancelado.is_set():
+            self._reanudado.clear()
+
+    def reanudar(self):
+        """Reanuda una tarea en pausa."""
+        self._reanudado.set()
+
+    def reiniciar(self):
+        """Deja el token listo para una nueva tarea."""
+        self._cancelado.clear()
+        self._reanudado.set()
+
+    def continuar(self) -> bool:
+        """Punto de control: espera mientras esté en pausa y devuelve False si fue cancelada."""
+        self._reanudado.wait()
+        return not self._cancelado.is_set()
+
+
+def clave_almacenamiento(ruta: Optional[Path]) -> Optional[str]:
+    """Identifica la unidad de almacenamiento de una ruta (dispositivo o unidad de Windows)."""
+    if ruta is None:
+        return None
+    ruta = Path(ruta)
+    actual = ruta
+    while True:
+        try:
+            return f"dev:{os.stat(actual).st_dev}"
+        except OSError:
+            if actual.parent == actual:
+                break
+            actual = actual.parent
+    return ruta.anchor or str(ruta)
+
+
+@dataclass
+class Trabajo:
+    id: int
+    nombre: str
+    funcion: Callable[..., Any]
+    args: tuple = ()
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+    prioridad: int = PRIORIDAD_NORMAL
+    raiz: Optional[str] = None
+    estado: str = "en_cola"
+    progreso: float = 0.0
+    resultado: Any = None
+    error: Optional[str] = None
+    token: TokenCancelacion = field(default_factory=TokenCancelacion)
+    creado: float = field(default_factory=time.time)
+    iniciado: Optional[float] = None
+    finalizado: Optional[float] = None
+    _notificar: Optional[Callable[["Trabajo"], None]] = field(default=None, repr=False)
+
+    @property
+    def terminado(self) -> bool:
+        """Indica si el trabajo ya no volverá a ejecutarse."""
+        return self.estado in ESTADOS_FINALES
+
+    def reportar_progreso(self, valor: float):
+        """Callback de progreso compatible con los servicios (0.0 – 1.0)."""
+        self.progreso = valor
+        if self._notificar:
+            self._notificar(self)
+
+
+class CoordinadorTareas:
+    """Planificador de varios trabajos simultáneos con cola por prioridad.
+
+    Cada trabajo recibe su propio ``Trabajo`` como primer argumento para poder
+    reportar progreso y consultar su ``token``. Los trabajos que comparten unidad
+    de almacenamiento se serializan según ``limite_por_raiz``.
+    """
+    def __init__(self, max_concurrentes: int = 4, limite_por_raiz: int = 1,
+                 historial_terminados: int = 50):
+        self.max_concurrentes = max_concurrentes
+        self.limite_por_raiz = limite_por_raiz
+        self.historial_terminados = historial_terminados
+        self._lock = threading.RLock()
+        self._cola: List[tuple] = []
+        self._ids = itertools.count(1)
+        self._trabajos: Dict[int, Trabajo] = {}
+        self._activos_por_raiz: Dict[Optional[str], int] = {}
+        self._hilos: Dict[int, threading.Thread] = {}
+        self._suscriptores: List[Callable[[Trabajo], None]] = []
+        TAREAS_ACTIVAS.observar(self.activos)
+        TAREAS_EN_COLA.observar(self.en_cola)
+
+    # ----- Observadores -----
+    def suscribir(self, callback: Callable[[Trabajo], None]):
+        """Registra un callback que se invoca en cada cambio de estado o progreso."""
+        self._suscriptores.append(callback)
+
+    def _notificar(self, trabajo: Trabajo):
+        for cb in list(self._suscriptores):
+            try:
+                cb(trabajo)
+            except Exception:
+                pass
+
+    # ----- Consulta -----
+    def en_ejecucion(self) -> bool:
+        """Verifica si hay alguna tarea en ejecución."""
+        with self._lock:
+            return any(t.estado == "en_ejecucion" for t in self._trabajos.values())
+
+    def trabajos(self) -> List[Trabajo]:
+        """Lista los trabajos conocidos (activos, en cola y terminados recientes)."""
+        with self._lock:
+            return sorted(self._trabajos.values(), key=lambda t: t.id)
+
+    def obtener(self, id_trabajo: int) -> Optional[Trabajo]:
+        """Obtiene un trabajo por su identificador."""
+        with self._lock:
+            return self._trabajos.get(id_trabajo)
+
+    def activos(self) -> int:
+        """Cantidad de trabajos en ejecución."""
+        with self._lock:
+            return len(self._hilos)
+
+    def en_cola(self) -> int:
+        """Cantidad de trabajos esperando turno."""
+        with self._lock:
+            return sum(1 for t in self._trabajos.values() if t.estado == "en_cola")
+
+    # ----- Control -----
+    def encolar(self, funcion: Callable[..., Any], *args, nombre: str = "Tarea",
+                prioridad: int = PRIORIDAD_NORMAL, ruta: Optional[Path] = None,
+                **kwargs) -> Trabajo:
+        """Agrega un trabajo a la cola y lo inicia en cuanto haya capacidad."""
+        with self._lock:
+            trabajo = Trabajo(
+                id=next(self._ids),
+                nombre=nombre,
+                funcion=funcion,
+                args=args,
+                kwargs=kwargs,
+                prioridad=prioridad,
+                raiz=clave_almacenamiento(ruta),
+                _notificar=self._notificar,
+            )
+            self._trabajos[trabajo.id] = trabajo
+            heapq.heappush(self._cola, (trabajo.prioridad, trabajo.id))
+        self._notificar(trabajo)
+        self._despachar()
+        return trabajo
+
+    def detener(self, id_trabajo: Optional[int] = None):
+        """Cancela un trabajo (o todos si no se indica id)."""
+        with self._lock:
+            objetivos = [self._trabajos[id_trabajo]] if id_trabajo in self._trabajos else (
+                list(self._trabajos.values()) if id_trabajo is None else []
+            )
+            for trabajo in objetivos:
+                if trabajo.terminado:
+                    continue
+                trabajo.token.cancelar()
+                if trabajo.estado == "en_cola":
+                    trabajo.estado = "cancelado"
+                    trabajo.finalizado = time.time()
+        for trabajo in objetivos:
+            self._notificar(trabajo)
+
+    def pausar(self, id_trabajo: int):
+        """Pausa un trabajo en su próximo punto de control."""
+        trabajo = self.obtener(id_trabajo)
+        if trabajo and not trabajo.terminado:
+            trabajo.token.pausar()
+            self._notificar(trabajo)
+
+    def reanudar(self, id_trabajo: int):
+        """Reanuda un trabajo en pausa."""
+        trabajo = self.obtener(id_trabajo)
+        if trabajo and not trabajo.terminado:
+            trabajo.token.reanudar()
+            self._notificar(trabajo)
+
+    # ----- Ejecución -----
+    def _despachar(self):
+        """Inicia los trabajos en cola que caben en los límites de concurrencia."""
+        iniciados = []
+        with self._lock:
+            pendientes = []
+            while self._cola and len(self._hilos) < self.max_concurrentes:
+                prioridad, id_trabajo = heapq.heappop(self._cola)
+                trabajo = self._trabajos.get(id_trabajo)
+                if trabajo is None or trabajo.estado != "en_cola":
+                    continue
+                if trabajo.raiz is not None and self._activos_por_raiz.get(trabajo.raiz, 0) >= self.limite_por_raiz:
+                    pendientes.append((prioridad, id_trabajo))
+                    continue
+                self._activos_por_raiz[trabajo.raiz] = self._activos_por_raiz.get(trabajo.raiz, 0) + 1
+                trabajo.estado = "en_ejecucion"
+                trabajo.iniciado = time.time()
+                hilo = threading.Thread(target=self._correr, args=(trabajo,), daemon=True)
+                self._hilos[trabajo.id] = hilo
+                iniciados.append((trabajo, hilo))
+            for item in pendientes:
+                heapq.heappush(self._cola, item)
+        for trabajo, hilo in iniciados:
+            self._notificar(trabajo)
+            hilo.start()
+
+    def _correr(self, trabajo: Trabajo):
+        try:
+            trabajo.resultado = trabajo.funcion(trabajo, *trabajo.args, **trabajo.kwargs)
+            trabajo.estado = "cancelado" if trabajo.token.cancelado else "completado"
+        except Exception as e:
+            trabajo.error = str(e)
+            trabajo.estado = "error"
+        finally:
+            trabajo.finalizado = time.time()
+            TAREAS_SEGUNDOS.observe(trabajo.finalizado - trabajo.iniciado, trabajo.estado)
+            with self._lock:
+                self._hilos.pop(trabajo.id, None)
+                self._activos_por_raiz[trabajo.raiz] -= 1
+                if not self._activos_por_raiz[trabajo.raiz]:
+                    del self._activos_por_raiz[trabajo.raiz]
+                self._purgar_terminados()
+            self._notificar(trabajo)
+            self._despachar()
+
+    def _purgar_terminados(self):
+        terminados = [t for t in self._trabajos.values() if t.terminado]
+        sobrantes = len(terminados) - self.historial_terminados
+        for trabajo in sorted(terminados, key=lambda t: t.id)[:max(0, sobrantes)]:
+            del self._trabajos[trabajo.id]
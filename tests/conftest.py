@@ -0,0 +1,9 @@
+# organizador_inteligente/tests/conftest.py
+# -------------------------------------------------------------
+# Los módulos del proyecto están en la raíz (sin paquete): se agrega al path
+# -------------------------------------------------------------
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
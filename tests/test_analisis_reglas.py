@@ -0,0 +1,127 @@
+# organizador_inteligente/tests/test_analisis_reglas.py
+# -------------------------------------------------------------
+# Veredictos del análisis de reglas sobre conjuntos pequeños armados a mano,
+# y reglas_efectivas contra la evaluación regla por regla
+# -------------------------------------------------------------
+
+import random
+from datetime import datetime
+
+from analisis_reglas import analizar, caja_de, reglas_efectivas
+from models import ReglaClasificacion
+
+
+def regla(nombre, extensiones=(), destino=None, **limites) -> ReglaClasificacion:
+    return ReglaClasificacion(nombre, destino or nombre.upper(), list(extensiones), **limites)
+
+
+def veredictos(reglas):
+    return [(h.tipo, h.regla, h.anteriores) for h in analizar(reglas)]
+
+
+# ----- Inalcanzables -----
+def test_limites_de_tamano_contradictorios():
+    assert veredictos([regla("a", ["jpg"], tam_min_kb=100, tam_max_kb=10)]) == [("inalcanzable", "a", [])]
+
+
+def test_tamano_entre_dos_kb_enteros_es_inalcanzable():
+    # Se compara int(bytes / 1024): entre 10.2 y 10.8 KB no hay ningún entero
+    assert caja_de(regla("a", tam_min_kb=10.2, tam_max_kb=10.8)) is None
+
+
+def test_fechas_invertidas_o_invalidas():
+    assert veredictos([
+        regla("a", fecha_desde="2024-02-01", fecha_hasta="2024-01-31"),
+        regla("b", fecha_desde="no es fecha"),
+    ]) == [("inalcanzable", "a", []), ("inalcanzable", "b", [])]
+
+
+def test_maximo_negativo():
+    assert caja_de(regla("a", tam_max_kb=-1)) is None
+
+
+# ----- Sombreadas -----
+def test_sombreada_por_una_regla_mas_amplia():
+    reglas = [regla("fotos", ["jpg", "png"]), regla("fotos_grandes", ["JPG"], tam_min_kb=500)]
+    assert veredictos(reglas) == [("sombreada", "fotos_grandes", ["fotos"])]
+
+
+def test_sombreada_por_la_union_de_varias():
+    reglas = [
+        regla("chicas", ["jpg"], tam_max_kb=99),
+        regla("grandes", ["jpg"], tam_min_kb=100),
+        regla("todas", [".jpg"]),
+    ]
+    assert veredictos(reglas) == [("sombreada", "todas", ["chicas", "grandes"])]
+
+
+def test_sin_extensiones_cubre_cualquier_extension():
+    reglas = [regla("recientes", fecha_desde="2024-01-01"), regla("pdf_2024", ["pdf"], fecha_desde="2024-06-01")]
+    assert veredictos(reglas) == [("sombreada", "pdf_2024", ["recientes"])]
+
+
+def test_una_sombreada_no_se_reporta_como_solapamiento_de_las_siguientes():
+    reglas = [regla("a", ["jpg"]), regla("b", ["jpg"], tam_min_kb=10), regla("c", ["jpg", "png"])]
+    assert veredictos(reglas) == [("sombreada", "b", ["a"]), ("solapada", "c", ["a"])]
+
+
+# ----- Solapadas -----
+def test_solapada_con_destino_distinto():
+    reglas = [regla("docs", ["pdf", "docx"]), regla("pdf_grandes", ["pdf", "epub"], tam_min_kb=1000)]
+    assert veredictos(reglas) == [("solapada", "pdf_grandes", ["docs"])]
+
+
+def test_solapamiento_con_el_mismo_destino_no_se_reporta():
+    reglas = [regla("a", ["pdf"], destino="Docs"), regla("b", ["pdf", "txt"], destino="Docs")]
+    assert veredictos(reglas) == []
+
+
+def test_limites_en_kb_enteros():
+    # tam_min_kb=10.5 equivale a >= 11 KB: no comparte archivos con <= 10 KB
+    assert veredictos([regla("a", ["jpg"], tam_max_kb=10), regla("b", ["jpg"], tam_min_kb=10.5)]) == []
+    assert veredictos([regla("a", ["jpg"], tam_max_kb=10), regla("b", ["jpg"], tam_min_kb=10)]) == [
+        ("solapada", "b", ["a"])
+    ]
+
+
+def test_fechas_disjuntas_no_se_solapan():
+    reglas = [regla("viejos", fecha_hasta="2023-12-31"), regla("nuevos", fecha_desde="2024-01-01")]
+    assert veredictos(reglas) == []
+
+
+# ----- reglas_efectivas -----
+def test_reglas_efectivas_quita_solo_las_muertas():
+    a, b, c, d = (regla("a", ["jpg"]), regla("b", ["jpg"], tam_min_kb=5),
+                  regla("c", ["png"], tam_min_kb=9, tam_max_kb=1), regla("d", ["png"]))
+    efectivas = reglas_efectivas([a, b, c, d])
+    assert [r.nombre for r in efectivas] == ["a", "d"]
+
+
+def _primera(reglas, ext, tam, mtime):
+    return next((r.destino_subcarpeta for r in reglas if r.coincide_metadatos(ext, tam, mtime)), None)
+
+
+def test_reglas_efectivas_decide_lo_mismo():
+    rnd = random.Random(7)
+    extensiones = ["jpg", "png", "pdf", "txt", ""]
+    fechas = ["2023-06-01", "2024-01-01", "2024-06-30"]
+    inicio = datetime(2023, 1, 1).timestamp()
+    fin = datetime(2025, 1, 1).timestamp()
+    for _ in range(200):
+        reglas = []
+        for i in range(rnd.randint(1, 8)):
+            r = regla(f"r{i}", rnd.sample(extensiones[:4], rnd.randint(0, 2)), destino=f"D{rnd.randint(0, 3)}")
+            if rnd.random() < 0.5:
+                r.tam_min_kb = rnd.choice([0, 1, 10, 10.5, 100])
+            if rnd.random() < 0.4:
+                r.tam_max_kb = rnd.choice([0, 9, 10, 50, 1000])
+            if rnd.random() < 0.3:
+                r.fecha_desde = rnd.choice(fechas)
+            if rnd.random() < 0.3:
+                r.fecha_hasta = rnd.choice(fechas)
+            reglas.append(r)
+        efectivas = reglas_efectivas(reglas)
+        for _ in range(50):
+            archivo = (rnd.choice(extensiones), rnd.choice([0, 1023, 1024, 10 * 1024, 11 * 1024, 10 ** 6]),
+                       rnd.uniform(inicio, fin))
+            assert _primera(efectivas, *archivo) == _primera(reglas, *archivo)
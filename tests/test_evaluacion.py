@@ -0,0 +1,142 @@
+# organizador_inteligente/tests/test_evaluacion.py
+# -------------------------------------------------------------
+# La evaluación vectorizada (numpy) debe decidir exactamente lo mismo que
+# coincide_metadatos regla por regla, y contar lo mismo en el perfil
+# -------------------------------------------------------------
+
+import math
+import os
+import random
+import time
+from datetime import datetime
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from config import CLASIFICACION_VECTORIZADA_MIN
+from evaluacion import (
+    EvaluadorVectorizado, PerfilReglas, _regla_coincidente, compilar_vectorizado, evaluar_lote,
+)
+from models import ReglaClasificacion
+
+FECHAS = ["2023-03-12", "2023-11-05", "2024-01-01", "2024-02-29", "2024-09-08"]
+
+
+def regla(nombre, extensiones=(), **limites) -> ReglaClasificacion:
+    return ReglaClasificacion(nombre, nombre.upper(), list(extensiones), **limites)
+
+
+def escalar(reglas, registros, perfil=None):
+    return [_regla_coincidente(reglas, r, perfil) for r in registros]
+
+
+def vectorizado(reglas, registros, perfil=None):
+    return EvaluadorVectorizado(reglas, np).coincidencias(registros, perfil)
+
+
+@pytest.fixture(params=["UTC", "America/Santiago", "America/Havana"])
+def zona_horaria(request):
+    """Zonas con cambio de hora a medianoche, donde el inicio del día es delicado."""
+    if not hasattr(time, "tzset"):
+        pytest.skip("sin time.tzset")
+    anterior = os.environ.get("TZ")
+    os.environ["TZ"] = request.param
+    time.tzset()
+    yield request.param
+    if anterior is None:
+        os.environ.pop("TZ", None)
+    else:
+        os.environ["TZ"] = anterior
+    time.tzset()
+
+
+def test_extensiones_y_archivos_sin_extension():
+    reglas = [regla("fotos", [".JPG", "png"]), regla("sin_ext", [""]), regla("resto")]
+    registros = [("a.jpg", "jpg", 10, 1.7e9), ("b", "", 10, 1.7e9), ("c.txt", "txt", 10, 1.7e9),
+                 ("d.PNG", "png", 10, 1.7e9)]
+    assert vectorizado(reglas, registros) == escalar(reglas, registros)
+    assert [d[2] for d in vectorizado(reglas, registros)] == ["fotos", "sin_ext", "resto", "fotos"]
+
+
+def test_limites_de_tamano_en_kb_enteros():
+    reglas = [regla("chico", tam_max_kb=10), regla("medio", tam_min_kb=10.5, tam_max_kb=100), regla("resto")]
+    tamanos = [0, 1023, 1024, 10 * 1024, 11 * 1024 - 1, 11 * 1024, 100 * 1024 + 1023, 101 * 1024]
+    registros = [(f"f{t}", "bin", t, 1.7e9) for t in tamanos]
+    assert vectorizado(reglas, registros) == escalar(reglas, registros)
+
+
+def test_tamanos_y_fechas_ausentes_o_invalidos():
+    reglas = [regla("kb", ["jpg"], tam_min_kb=1), regla("fecha", fecha_desde="2020-01-01"), regla("todo")]
+    registros = [
+        ("a", "jpg", None, 1.6e9), ("b", "jpg", math.nan, 1.6e9), ("c", "jpg", 4096, None),
+        ("d", "jpg", 4096, math.nan), ("e", "", 2 ** 70, 1.6e9), ("f", "jpg", 4096.0, 1.6e9),
+        ("g", "jpg", -5, 1.6e9), ("h", "", 5, -1.0), ("i", "", 5, 1e13), ("j", "jpg", 2048, 1.6e9),
+    ]
+    assert vectorizado(reglas, registros) == escalar(reglas, registros)
+
+
+def test_reglas_invalidas_nunca_coinciden():
+    reglas = [regla("fecha_rota", fecha_desde="ayer"), regla("tam_raro", tam_min_kb="10"), regla("resto")]
+    registros = [("a", "jpg", 20000, 1.7e9)]
+    assert vectorizado(reglas, registros) == escalar(reglas, registros)
+    assert vectorizado(reglas, registros)[0][2] == "resto"
+
+
+def test_fronteras_de_fecha(zona_horaria):
+    reglas = [
+        regla("antes", fecha_hasta="2023-11-05"),
+        regla("bisiesto", fecha_desde="2024-02-29", fecha_hasta="2024-02-29"),
+        regla("despues", fecha_desde="2024-09-08"),
+    ]
+    registros = []
+    for dia in FECHAS:
+        medianoche = datetime.fromisoformat(dia).timestamp()
+        for delta in (-3600, -1, -1e-4, -1e-7, 0, 1e-7, 1e-4, 1, 3600, 86399.9999):
+            registros.append((f"{dia}{delta}", "txt", 1, medianoche + delta))
+    assert vectorizado(reglas, registros) == escalar(reglas, registros)
+
+
+def test_aleatorio_con_perfil(zona_horaria):
+    rnd = random.Random(3)
+    inicio = datetime(2023, 1, 1).timestamp()
+    extensiones = ["jpg", "png", "pdf", "", "tar.gz"]
+    for _ in range(30):
+        reglas = []
+        for i in range(rnd.randint(1, 10)):
+            r = regla(f"r{i}", rnd.sample(extensiones, rnd.randint(0, 2)))
+            if rnd.random() < 0.5:
+                r.tam_min_kb = rnd.choice([0, 1, 10, 10.5, 500])
+            if rnd.random() < 0.4:
+                r.tam_max_kb = rnd.choice([0, 10, 99.9, 1000])
+            if rnd.random() < 0.4:
+                r.fecha_desde = rnd.choice(FECHAS)
+            if rnd.random() < 0.4:
+                r.fecha_hasta = rnd.choice(FECHAS)
+            reglas.append(r)
+        registros = [
+            (f"f{j}", rnd.choice(extensiones), rnd.choice([0, 1024, 10 * 1024, rnd.randrange(10 ** 7)]),
+             inicio + rnd.uniform(0, 2 * 365 * 86400))
+            for j in range(300)
+        ]
+        perfil_v = PerfilReglas([r.nombre for r in reglas])
+        perfil_e = PerfilReglas([r.nombre for r in reglas])
+        assert vectorizado(reglas, registros, perfil_v) == escalar(reglas, registros, perfil_e)
+        assert perfil_v.evaluaciones == perfil_e.evaluaciones
+        assert perfil_v.coincidencias == perfil_e.coincidencias
+
+
+def test_evaluar_lote_con_y_sin_evaluador():
+    reglas = [regla("fotos", ["jpg"], tam_min_kb=1), regla("viejos", fecha_hasta="2023-12-31")]
+    base = datetime(2024, 1, 1).timestamp()
+    registros = [
+        (f"f{i}", ["jpg", "pdf", "mp3", "", "xyz"][i % 5], (i * 7919) % 5000, base + (i - 500) * 3600.0)
+        for i in range(max(CLASIFICACION_VECTORIZADA_MIN, 1000))
+    ]
+    evaluador = compilar_vectorizado(reglas)
+    assert evaluador is not None
+    assert evaluar_lote(reglas, registros, evaluador=evaluador) == evaluar_lote(reglas, registros)
+
+
+def test_sin_reglas_no_se_compila():
+    assert compilar_vectorizado([]) is None
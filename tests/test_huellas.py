@@ -0,0 +1,113 @@
+# organizador_inteligente/tests/test_huellas.py
+# -------------------------------------------------------------
+# Almacén de huellas: un movimiento conserva el hash solo si el archivo
+# movido es el mismo que se hasheó (tamaño, mtime e inodo)
+# -------------------------------------------------------------
+
+import os
+
+import pytest
+
+from huellas import AlmacenHuellas
+
+
+def _escribir(ruta, contenido: bytes):
+    with open(ruta, "wb") as f:
+        f.write(contenido)
+
+
+class _Calculo:
+    """Cuenta las llamadas y devuelve el contenido del archivo como hash."""
+    def __init__(self):
+        self.llamadas = 0
+
+    def __call__(self, ruta, tam):
+        self.llamadas += 1
+        with open(ruta, "rb") as f:
+            return f.read()
+
+
+@pytest.fixture
+def abrir(tmp_path):
+    almacenes = []
+
+    def _abrir():
+        almacen = AlmacenHuellas(tmp_path / "huellas.sqlite3")
+        almacenes.append(almacen)
+        return almacen
+
+    yield _abrir
+    for almacen in almacenes:
+        try:
+            almacen.cerrar()
+        except Exception:
+            pass
+
+
+def _reabrir(almacen, abrir):
+    almacen.cerrar()
+    return abrir()
+
+
+@pytest.mark.parametrize("volcar_antes", [False, True])
+def test_movimiento_sin_cambios_conserva_la_huella(tmp_path, abrir, volcar_antes):
+    origen, destino = str(tmp_path / "a.bin"), str(tmp_path / "b.bin")
+    _escribir(origen, b"contenido-1")
+    almacen, calcular = abrir(), _Calculo()
+    almacen.obtener(origen, "completo", calcular)
+    if volcar_antes:
+        almacen.guardar()
+
+    os.rename(origen, destino)
+    almacen.registrar_movimiento(origen, destino)
+
+    assert almacen.obtener(destino, "completo", calcular) == b"contenido-1"
+    almacen = _reabrir(almacen, abrir)
+    assert almacen.obtener(destino, "completo", calcular) == b"contenido-1"
+    assert calcular.llamadas == 1
+
+
+@pytest.mark.parametrize("volcar_antes", [False, True])
+def test_editado_con_el_mismo_tamano_antes_de_mover_no_conserva_la_huella(tmp_path, abrir, volcar_antes):
+    origen, destino = str(tmp_path / "a.bin"), str(tmp_path / "b.bin")
+    _escribir(origen, b"contenido-1")
+    almacen, calcular = abrir(), _Calculo()
+    almacen.obtener(origen, "completo", calcular)
+    if volcar_antes:
+        almacen.guardar()
+
+    mtime_ns = os.stat(origen).st_mtime_ns
+    _escribir(origen, b"contenido-2")
+    os.utime(origen, ns=(mtime_ns + 10**9, mtime_ns + 10**9))
+    os.rename(origen, destino)
+    almacen.registrar_movimiento(origen, destino)
+    almacen = _reabrir(almacen, abrir)
+
+    assert almacen.obtener(destino, "completo", calcular) == b"contenido-2"
+    assert calcular.llamadas == 2
+
+
+@pytest.mark.parametrize("volcar_antes", [False, True])
+def test_otro_inodo_en_la_misma_unidad_no_conserva_la_huella(tmp_path, abrir, volcar_antes):
+    origen, destino = str(tmp_path / "a.bin"), str(tmp_path / "b.bin")
+    _escribir(origen, b"contenido-1")
+    almacen, calcular = abrir(), _Calculo()
+    almacen.obtener(origen, "completo", calcular)
+    if volcar_antes:
+        almacen.guardar()
+
+    # Mismo tamaño y mtime, pero es otro archivo (otro inodo) el que se mueve
+    st = os.stat(origen)
+    reemplazo = str(tmp_path / "c.bin")
+    _escribir(reemplazo, b"contenido-2")
+    os.utime(reemplazo, ns=(st.st_atime_ns, st.st_mtime_ns))
+    os.replace(reemplazo, origen)
+    if os.stat(origen).st_ino == st.st_ino:
+        pytest.skip("el sistema de archivos reutilizó el inodo")
+    os.rename(origen, destino)
+    almacen.registrar_movimiento(origen, destino)
+
+    assert almacen.obtener(destino, "completo", calcular) == b"contenido-2"
+    almacen = _reabrir(almacen, abrir)
+    assert almacen.obtener(destino, "completo", calcular) == b"contenido-2"
+    assert calcular.llamadas == 2
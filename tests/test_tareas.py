@@ -0,0 +1,166 @@
+# organizador_inteligente/tests/test_tareas.py
+# -------------------------------------------------------------
+# Planificador: orden por prioridad, límites por unidad de almacenamiento,
+# pausa y cancelación cooperativas
+# -------------------------------------------------------------
+
+import os
+import threading
+import time
+
+import pytest
+
+import tareas
+from tareas import PRIORIDAD_ALTA, PRIORIDAD_BAJA, PRIORIDAD_NORMAL, CoordinadorTareas, clave_almacenamiento
+
+ESPERA = 5.0
+
+
+def esperar(condicion, limite: float = ESPERA):
+    fin = time.monotonic() + limite
+    while not condicion():
+        if time.monotonic() > fin:
+            raise AssertionError("tiempo de espera agotado")
+        time.sleep(0.005)
+
+
+class Registro:
+    """Anota inicios y fines y cuántos trabajos de cada unidad corren a la vez."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.orden = []
+        self.activos = {}
+        self.maximo = {}
+
+    def tarea(self, nombre, unidad=None, liberar=None):
+        def funcion(trabajo):
+            with self.lock:
+                self.orden.append(nombre)
+                self.activos[unidad] = self.activos.get(unidad, 0) + 1
+                self.maximo[unidad] = max(self.maximo.get(unidad, 0), self.activos[unidad])
+            try:
+                if liberar is not None:
+                    assert liberar.wait(ESPERA)
+                else:
+                    time.sleep(0.02)
+            finally:
+                with self.lock:
+                    self.activos[unidad] -= 1
+            return nombre
+        return funcion
+
+
+@pytest.fixture
+def unidades(monkeypatch):
+    """Rutas falsas "dev1/...", "dev2/..." → una unidad por prefijo (sin depender de los discos reales)."""
+    monkeypatch.setattr(tareas, "clave_almacenamiento", lambda ruta: None if ruta is None else str(ruta).split("/")[0])
+
+
+def test_orden_por_prioridad_y_llegada():
+    coordinador = CoordinadorTareas(max_concurrentes=1)
+    registro = Registro()
+    bloqueo = threading.Event()
+    primero = coordinador.encolar(registro.tarea("bloqueante", liberar=bloqueo))
+    esperar(lambda: primero.estado == "en_ejecucion")
+    trabajos = [
+        coordinador.encolar(registro.tarea(nombre), prioridad=prioridad)
+        for nombre, prioridad in [("baja", PRIORIDAD_BAJA), ("normal_1", PRIORIDAD_NORMAL),
+                                  ("alta", PRIORIDAD_ALTA), ("normal_2", PRIORIDAD_NORMAL)]
+    ]
+    assert coordinador.en_cola() == 4
+    bloqueo.set()
+    esperar(lambda: all(t.terminado for t in trabajos))
+    assert registro.orden == ["bloqueante", "alta", "normal_1", "normal_2", "baja"]
+    assert [t.resultado for t in trabajos] == ["baja", "normal_1", "alta", "normal_2"]
+
+
+def test_limite_por_unidad(unidades):
+    coordinador = CoordinadorTareas(max_concurrentes=4, limite_por_raiz=1)
+    registro = Registro()
+    bloqueo = threading.Event()
+    misma = [coordinador.encolar(registro.tarea(f"a{i}", "dev1", bloqueo), ruta=f"dev1/x{i}") for i in range(3)]
+    otra = coordinador.encolar(registro.tarea("b", "dev2", bloqueo), ruta="dev2/y")
+    sin_ruta = coordinador.encolar(registro.tarea("c", None, bloqueo))
+    # Solo uno de dev1 arranca; dev2 y el trabajo sin ruta no esperan a dev1
+    esperar(lambda: otra.estado == "en_ejecucion" and sin_ruta.estado == "en_ejecucion")
+    assert [t.estado for t in misma] == ["en_ejecucion", "en_cola", "en_cola"]
+    bloqueo.set()
+    esperar(lambda: all(t.terminado for t in misma + [otra, sin_ruta]))
+    assert registro.maximo["dev1"] == 1
+    assert registro.orden.index("a1") > registro.orden.index("b")
+
+
+def test_limite_por_unidad_mayor_que_uno(unidades):
+    coordinador = CoordinadorTareas(max_concurrentes=8, limite_por_raiz=2)
+    registro = Registro()
+    trabajos = [coordinador.encolar(registro.tarea(f"a{i}", "dev1"), ruta=f"dev1/{i}") for i in range(6)]
+    esperar(lambda: all(t.terminado for t in trabajos))
+    assert registro.maximo["dev1"] == 2
+    assert coordinador.activos() == 0
+
+
+def test_limite_global():
+    coordinador = CoordinadorTareas(max_concurrentes=2)
+    registro = Registro()
+    trabajos = [coordinador.encolar(registro.tarea(f"t{i}")) for i in range(6)]
+    esperar(lambda: all(t.terminado for t in trabajos))
+    assert registro.maximo[None] <= 2
+
+
+def test_pausa_reanudacion_y_cancelacion():
+    coordinador = CoordinadorTareas()
+    vueltas = []
+
+    def funcion(trabajo):
+        while trabajo.token.continuar():
+            vueltas.append(1)
+            time.sleep(0.005)
+        return len(vueltas)
+
+    trabajo = coordinador.encolar(funcion)
+    esperar(lambda: len(vueltas) > 3)
+    coordinador.pausar(trabajo.id)
+    assert trabajo.token.pausado
+    time.sleep(0.05)
+    pausadas = len(vueltas)
+    time.sleep(0.1)
+    assert len(vueltas) <= pausadas + 1  # a lo sumo la vuelta que estaba en curso
+    coordinador.reanudar(trabajo.id)
+    esperar(lambda: len(vueltas) > pausadas + 3)
+    coordinador.pausar(trabajo.id)
+    # Cancelar también libera una tarea en pausa
+    coordinador.detener(trabajo.id)
+    esperar(lambda: trabajo.terminado)
+    assert trabajo.estado == "cancelado"
+
+
+def test_cancelar_en_cola_no_ejecuta():
+    coordinador = CoordinadorTareas(max_concurrentes=1)
+    bloqueo = threading.Event()
+    ejecutados = []
+    primero = coordinador.encolar(lambda t: bloqueo.wait(ESPERA))
+    en_cola = coordinador.encolar(lambda t: ejecutados.append(t.id))
+    coordinador.detener(en_cola.id)
+    assert en_cola.estado == "cancelado"
+    bloqueo.set()
+    esperar(lambda: primero.terminado)
+    time.sleep(0.05)
+    assert ejecutados == []
+
+
+def test_error_queda_registrado():
+    coordinador = CoordinadorTareas()
+
+    def falla(trabajo):
+        raise RuntimeError("sin permiso")
+
+    trabajo = coordinador.encolar(falla)
+    esperar(lambda: trabajo.terminado)
+    assert trabajo.estado == "error" and trabajo.error == "sin permiso"
+
+
+def test_clave_almacenamiento_por_dispositivo(tmp_path):
+    assert clave_almacenamiento(None) is None
+    assert clave_almacenamiento(tmp_path) == f"dev:{os.stat(tmp_path).st_dev}"
+    # Una ruta que aún no existe usa el dispositivo de su antecesor más cercano
+    assert clave_almacenamiento(tmp_path / "nueva" / "sub") == clave_almacenamiento(tmp_path)
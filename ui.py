@@ -7,15 +7,33 @@
 # -------------------------------------------------------------
 
 import flet as ft
+import json
+import threading
+import time
+from datetime import datetime
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-from config import APP_NOMBRE, ruta_bd, EXCLUSIONES_POR_DEFECTO
+from config import (
+    APP_NOMBRE, ruta_bd, EXCLUSIONES_POR_DEFECTO, HISTORIAL_RETENCION_DIAS, PERFIL_REGLAS_EJECUCIONES,
+    VACIAS_POR_PAGINA,
+)
 from models import ReglaClasificacion
+from analisis_reglas import Hallazgo, analizar
 from repositories import RepositorioHistorial
 from services import ServicioReglas, ServicioClasificacion, ServicioCarpetas, CoordinadorTareas
+from tareas import Trabajo, PRIORIDAD_ALTA, PRIORIDAD_BAJA
+from retencion import ArchivoHistorial
+from exportacion import ExportadorHistorial
+from huellas import AlmacenHuellas
+from contenido import DetectorContenido
+from metricas import formatear_bytes, resumen_metricas
+from seleccion import ResultadosSeleccionables
 from auth import AuthManager
 
+# Orden de las secciones en la navegación lateral (cada una tiene su _build_seccion_<nombre>)
+SECCIONES = ("inicio", "clasificar", "reglas", "vacias", "historial", "premium")
+
 class AppUI:
     """Clase principal para la interfaz de usuario intuitiva y atractiva."""
     def __init__(self, page: ft.Page):
@@ -47,23 +65,48 @@ class AppUI:
         self.servicio_clasif = None
         self.servicio_carpetas = None
         self.servicio_reglas = None
+        self._almacen_huellas: Optional[AlmacenHuellas] = None
+        self._detector_contenido: Optional[DetectorContenido] = None
         self.coordinador = CoordinadorTareas()
+        self.coordinador.suscribir(self._on_cambio_trabajo)
+        self._ultimo_refresco_trabajos = 0.0
+
+        self._version_secciones: Dict[str, int] = {}
+        self._reiniciar_secciones()
+        # Secciones con datos de MySQL: se leen al mostrarlas si no están en caché
+        self._lectores_secciones: Dict[str, Callable[[], None]] = {
+            "inicio": self._leer_inicio,
+            "historial": self._leer_historial,
+            "reglas": self._leer_perfil_reglas,
+        }
 
         # Estado
         self.carpeta_fuente: Optional[Path] = None
         self.carpeta_destino: Optional[Path] = None
         self.reglas: List[ReglaClasificacion] = []
-        self._carpetas_vacias_detectadas: List[Path] = []
         self.current_user = None
+        self.configuraciones: Dict[str, str] = {}
+        self.resumen_historial: List[dict] = []
 
         # Selectores de archivos
         self.selector_fuente = ft.FilePicker(on_result=self._elegir_fuente)
         self.selector_destino = ft.FilePicker(on_result=self._elegir_destino)
-        self.page.overlay.extend([self.selector_fuente, self.selector_destino])
+        self.selector_exportacion = ft.FilePicker(on_result=self._exportar_historial)
+        self.page.overlay.extend([self.selector_fuente, self.selector_destino, self.selector_exportacion])
 
         # Barra de progreso global
         self.barra_progreso = ft.ProgressBar(value=0, color=ft.colors.INDIGO_600, visible=False, height=4)
 
+        # Lista en vivo de trabajos (en cola, en ejecución y terminados recientes)
+        self.lista_trabajos = ft.Column(spacing=4)
+        self.panel_trabajos = ft.Container(
+            content=self.lista_trabajos,
+            padding=ft.padding.symmetric(horizontal=15, vertical=8),
+            bgcolor=ft.colors.GREY_50,
+            border=ft.border.only(bottom=ft.BorderSide(1, ft.colors.GREY_200)),
+            visible=False,
+        )
+
         # No iniciar con autenticación aquí, se maneja en main.py
 
     def _on_login_success(self):
@@ -76,14 +119,77 @@ class AppUI:
         self.servicio_clasif = ServicioClasificacion(self.repo)
         self.servicio_carpetas = ServicioCarpetas(self.repo)
         self.servicio_reglas = ServicioReglas(user_id)
+        self._reiniciar_secciones()
         
-        # Cargar reglas del usuario
-        self.reglas = self.servicio_reglas.cargar()
+        # Datos que el login ya trajo (reglas, configuraciones, resumen del historial)
+        datos = self.auth_manager.datos_sesion or {}
+        self.configuraciones = datos.get("configuraciones", {})
+        self.resumen_historial = datos.get("resumen_historial", [])
+        filas_reglas = datos.get("reglas")
+        if filas_reglas:
+            self.reglas = self.servicio_reglas.cargar(filas_reglas)
+            self._reglas_cargadas.set()
+        else:
+            # Sin reglas aún (se crean las de ejemplo): no retrasar el primer cuadro
+            threading.Thread(
+                target=self._cargar_reglas, args=(self.servicio_reglas, filas_reglas),
+                name="carga-reglas", daemon=True,
+            ).start()
         
         self.page.clean()
         self._construir_ui_principal()
         self.page.update()
 
+    def _encolar_archivado(self):
+        """Pasa al archivo comprimido el historial antiguo del usuario, sin competir con su trabajo."""
+        self._cerrar_dialogo()
+        user_id = self.current_user['id_usuario']
+
+        def tarea(trabajo: Trabajo):
+            resultado = ArchivoHistorial().archivar(
+                user_id, token=trabajo.token, progreso_cb=trabajo.reportar_progreso,
+            )
+            if resultado["archivadas"]:
+                self._cargar_historial()
+            return resultado
+
+        self.coordinador.encolar(tarea, nombre="Archivar historial antiguo", prioridad=PRIORIDAD_BAJA)
+
+    def _reiniciar_secciones(self):
+        """Olvida las secciones construidas y sus datos (al iniciar cada sesión).
+
+        Cada sección se construye la primera vez que se muestra y sus datos (MySQL)
+        se leen en segundo plano y quedan en caché hasta invalidarse.
+        """
+        self._secciones: Dict[int, ft.Control] = {}
+        self._cache_secciones: Dict[str, Any] = {}
+        for clave in list(self._version_secciones):
+            self._invalidar_seccion(clave)
+        self._reglas_cargadas = threading.Event()
+        self.reglas = []
+        self._perfil_reglas: Dict[str, Dict[str, float]] = {}
+        self.txt_fuente = self.txt_destino = self.txt_estado = None
+        self.tabla_reglas = None
+        self.btn_nueva_regla = self.btn_guardar_reglas = None
+        self.lista_historial = None
+        self._busqueda_historial = ""
+        self.panel_resumen_inicio = None
+        self._resultados_vacias: Optional[ResultadosSeleccionables] = None
+        self._escaneo_vacias: Optional[Tuple[ResultadosSeleccionables, float]] = None
+        self._pagina_vacias = 0
+
+    def _cargar_reglas(self, servicio: ServicioReglas, filas: Optional[List[dict]] = None):
+        """Lee las reglas del usuario (en un hilo) y habilita su edición."""
+        reglas = servicio.cargar(filas)
+        if servicio is not self.servicio_reglas:
+            return  # la sesión cambió mientras se leía
+        self.reglas = reglas
+        self._reglas_cargadas.set()
+        if self.tabla_reglas is not None:
+            self._refrescar_tabla_reglas()
+            self.btn_nueva_regla.disabled = self.btn_guardar_reglas.disabled = False
+            self.page.update()
+
     def _construir_ui_principal(self):
         """Construye el diseño principal con navegación lateral."""
         # Header con información del usuario
@@ -142,26 +248,8 @@ class AppUI:
             on_change=self._cambiar_seccion,
         )
 
-        # Construir secciones
-        self.seccion_inicio = self._build_seccion_inicio()
-        self.seccion_clasificar = self._build_seccion_clasificar()
-        self.seccion_reglas = self._build_seccion_reglas()
-        self.seccion_vacias = self._build_seccion_vacias()
-        self.seccion_historial = self._build_seccion_historial()
-        self.seccion_premium = self._build_seccion_premium()
-
-        # Contenedor de secciones
-        self.contenedor_secciones = ft.Stack(
-            [
-                self.seccion_inicio,
-                self.seccion_clasificar,
-                self.seccion_reglas,
-                self.seccion_vacias,
-                self.seccion_historial,
-                self.seccion_premium,
-            ],
-            expand=True
-        )
+        # Contenedor de secciones (se llena a medida que se visitan)
+        self.contenedor_secciones = ft.Stack([], expand=True)
 
         # Mostrar solo la primera sección
         self._mostrar_seccion(0)
@@ -171,6 +259,7 @@ class AppUI:
             [
                 self.header,
                 self.barra_progreso,
+                self.panel_trabajos,
                 ft.Row(
                     [
                         self.rail,
@@ -192,14 +281,125 @@ class AppUI:
         self._mostrar_seccion(index)
 
     def _mostrar_seccion(self, index: int):
-        """Muestra solo la sección seleccionada."""
-        for i, seccion in enumerate(self.contenedor_secciones.controls):
-            seccion.visible = (i == index)
+        """Muestra solo la sección seleccionada, construyéndola en la primera visita."""
+        seccion = self._secciones.get(index)
+        if seccion is None:
+            seccion = getattr(self, f"_build_seccion_{SECCIONES[index]}")()
+            self._secciones[index] = seccion
+            self.contenedor_secciones.controls.append(seccion)
+        for control in self.contenedor_secciones.controls:
+            control.visible = control is seccion
+        self.rail.selected_index = index
         self.page.update()
+        nombre = SECCIONES[index]
+        if nombre in self._lectores_secciones and nombre not in self._cache_secciones:
+            self._lectores_secciones[nombre]()
+
+    def _seccion_visible(self, nombre: str) -> bool:
+        seccion = self._secciones.get(SECCIONES.index(nombre))
+        return seccion is not None and seccion.visible
+
+    def _cargar_datos_seccion(self, clave: str, leer: Callable[[], Any], pintar: Callable[[Any], None]):
+        """Lee los datos de una sección en segundo plano y los pinta; usa la caché si está vigente.
+
+        Si la caché se invalida mientras se lee, el resultado se descarta y se vuelve a leer.
+        """
+        if clave in self._cache_secciones:
+            pintar(self._cache_secciones[clave])
+            self.page.update()
+            return
+        version = self._version_secciones.get(clave, 0) + 1
+        self._version_secciones[clave] = version
+
+        def trabajo():
+            datos = leer()
+            if self._version_secciones.get(clave) != version:
+                return
+            self._cache_secciones[clave] = datos
+            pintar(datos)
+            self.page.update()
+
+        threading.Thread(target=trabajo, name=f"carga-{clave}", daemon=True).start()
+
+    def _invalidar_seccion(self, clave: str):
+        """Descarta los datos en caché de una sección (y cualquier lectura en curso)."""
+        self._cache_secciones.pop(clave, None)
+        self._version_secciones[clave] = self._version_secciones.get(clave, 0) + 1
 
     # ----- Secciones -----
+    def _texto_resumen_historial(self) -> str:
+        """Resumen del historial traído con el login (sin consultar la base de datos)."""
+        if not self.resumen_historial:
+            return "Aún no hay acciones registradas"
+        nombres = {"organizar": "clasificaciones", "eliminar_carpetas": "limpiezas de carpetas"}
+        partes = [f"{r['total']} {nombres.get(r['tipo'], r['tipo'])}" for r in self.resumen_historial]
+        ultima = max(r["ultima"] for r in self.resumen_historial)
+        return f"{' · '.join(partes)} · última: {ultima:%Y-%m-%d %H:%M}"
+
+    def _tarjeta_cifra(self, titulo: str, valor: str, detalle: str, color) -> ft.Container:
+        return ft.Container(
+            content=ft.Column(
+                [
+                    ft.Text(titulo, size=12, color=ft.colors.GREY_600),
+                    ft.Text(valor, size=22, weight=ft.FontWeight.BOLD, color=color),
+                    ft.Text(detalle, size=11, color=ft.colors.GREY_500),
+                ],
+                horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+                spacing=4,
+            ),
+            bgcolor=ft.colors.GREY_50,
+            padding=15,
+            border_radius=12,
+            width=200,
+        )
+
+    def _leer_inicio(self):
+        """Lee en segundo plano las cifras del panel de inicio.
+
+        Los totales de toda la vida salen de EstadisticasUsuario (en caché en el repositorio);
+        solo las cifras del mes se suman sobre Historial, acotadas por fecha.
+        """
+        if not self.repo:
+            return
+        repo = self.repo
+
+        def leer():
+            inicio_mes = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+            return {"mes": repo.totales(inicio_mes), "total": repo.estadisticas()}
+
+        self._cargar_datos_seccion("inicio", leer, self._pintar_inicio)
+
+    def _pintar_inicio(self, datos: Dict[str, Dict[str, Any]]):
+        mes, total = datos["mes"], datos["total"]
+        ultima = total["ultima_ejecucion"]
+        self.panel_resumen_inicio.controls = [
+            self._tarjeta_cifra(
+                "Archivos organizados", f"{total['archivos_organizados']:,}",
+                f"{formatear_bytes(total['bytes_organizados'])} · {mes['archivos_movidos']:,} este mes",
+                ft.colors.TEAL_700,
+            ),
+            self._tarjeta_cifra(
+                "Carpetas eliminadas", f"{total['carpetas_eliminadas']:,}",
+                f"{mes['carpetas_eliminadas']:,} este mes", ft.colors.ORANGE_700,
+            ),
+            self._tarjeta_cifra(
+                "Ejecuciones", f"{total['ejecuciones']:,}",
+                f"última: {ultima:%Y-%m-%d %H:%M}" if ultima else "sin ejecuciones aún", ft.colors.PURPLE_700,
+            ),
+        ]
+        categorias = list(total["por_categoria"].items())[:3]
+        self.txt_categorias_inicio.value = (
+            "Más organizadas: " + " · ".join(f"{c} ({n:,})" for c, n in categorias) if categorias else ""
+        )
+
     def _build_seccion_inicio(self) -> ft.Container:
         """Sección de bienvenida."""
+        self.txt_categorias_inicio = ft.Text("", size=12, color=ft.colors.GREY_600)
+        self.panel_resumen_inicio = ft.Row(
+            [ft.ProgressRing(width=24, height=24)],
+            alignment=ft.MainAxisAlignment.CENTER,
+            spacing=15,
+        )
         return ft.Container(
             content=ft.Column(
                 [
@@ -209,6 +409,7 @@ class AppUI:
                                 ft.Icon(ft.icons.FOLDER_SPECIAL, size=80, color=ft.colors.INDIGO_600),
                                 ft.Text("Organizador Inteligente", size=32, weight=ft.FontWeight.BOLD, color=ft.colors.INDIGO_700),
                                 ft.Text("Organiza tus archivos de forma profesional y automática", size=18, color=ft.colors.GREY_600),
+                                ft.Text(self._texto_resumen_historial(), size=13, color=ft.colors.GREY_500),
                             ],
                             horizontal_alignment=ft.CrossAxisAlignment.CENTER,
                             spacing=15,
@@ -271,6 +472,8 @@ class AppUI:
                         alignment=ft.MainAxisAlignment.CENTER,
                         spacing=15,
                     ),
+                    self.panel_resumen_inicio,
+                    self.txt_categorias_inicio,
                     ft.Container(height=25),
                     ft.ElevatedButton(
                         "Comenzar a Organizar",
@@ -340,6 +543,22 @@ class AppUI:
             on_click=self._accion_clasificar_avanzado
         )
         
+        self.dd_duplicados = ft.Dropdown(
+            label="Si ya existe un archivo idéntico en el destino",
+            value="renombrar",
+            options=[
+                ft.dropdown.Option("renombrar", "Guardar una copia renombrada"),
+                ft.dropdown.Option("omitir", "Omitir (dejar el archivo donde está)"),
+                ft.dropdown.Option("cuarentena", "Mover a cuarentena"),
+            ],
+            border_radius=12,
+            width=420,
+        )
+        self.chk_contenido = ft.Checkbox(
+            label="Detectar el tipo por contenido (sin extensión o con extensión engañosa)",
+            value=False,
+        )
+
         # Crear txt_estado primero
         self.txt_estado = ft.Text("Listo para organizar archivos", italic=True, color=ft.colors.GREY_700, size=14)
         
@@ -398,6 +617,8 @@ class AppUI:
                         ),
                         ft.Text("Organiza por tipo o con reglas personalizadas", size=14, color=ft.colors.GREY_600),
                         ft.Container(height=20),
+                        self.dd_duplicados,
+                        self.chk_contenido,
                         ft.Row(
                             [
                                 self.btn_clasificar_basico,
@@ -436,6 +657,10 @@ class AppUI:
                 ft.DataColumn(ft.Text("Tamaño Máx (KB)", weight=ft.FontWeight.BOLD)),
                 ft.DataColumn(ft.Text("Desde", weight=ft.FontWeight.BOLD)),
                 ft.DataColumn(ft.Text("Hasta", weight=ft.FontWeight.BOLD)),
+                ft.DataColumn(ft.Text("Evaluada", weight=ft.FontWeight.BOLD), numeric=True,
+                              tooltip="Archivos con los que se probó la regla (los que no tomó una regla anterior)"),
+                ft.DataColumn(ft.Text("Coincidencias", weight=ft.FontWeight.BOLD), numeric=True),
+                ft.DataColumn(ft.Text("Tiempo (ms)", weight=ft.FontWeight.BOLD), numeric=True),
                 ft.DataColumn(ft.Text("Acciones", weight=ft.FontWeight.BOLD)),
             ],
             rows=[],
@@ -444,6 +669,31 @@ class AppUI:
             heading_row_color=ft.colors.INDIGO_50,
         )
         self._refrescar_tabla_reglas()
+        cargando = not self._reglas_cargadas.is_set()
+        self.btn_nueva_regla = ft.ElevatedButton(
+            "Nueva Regla", 
+            icon=ft.icons.ADD_CIRCLE,
+            bgcolor=ft.colors.GREEN_600,
+            color=ft.colors.WHITE,
+            style=ft.ButtonStyle(
+                padding=15,
+                shape=ft.RoundedRectangleBorder(radius=8),
+            ),
+            on_click=self._agregar_regla,
+            disabled=cargando,
+        )
+        self.btn_guardar_reglas = ft.ElevatedButton(
+            "Guardar Reglas", 
+            icon=ft.icons.SAVE,
+            bgcolor=ft.colors.INDIGO_600,
+            color=ft.colors.WHITE,
+            style=ft.ButtonStyle(
+                padding=15,
+                shape=ft.RoundedRectangleBorder(radius=8),
+            ),
+            on_click=self._guardar_reglas,
+            disabled=cargando,
+        )
         
         card = ft.Card(
             content=ft.Container(
@@ -457,6 +707,11 @@ class AppUI:
                             spacing=10,
                         ),
                         ft.Text("Define cómo clasificar tus archivos automáticamente con reglas avanzadas", size=14, color=ft.colors.GREY_600),
+                        ft.Text(
+                            f"Evaluada, coincidencias y tiempo suman las últimas {PERFIL_REGLAS_EJECUCIONES} "
+                            "clasificaciones avanzadas: mueve arriba las reglas que más coinciden y revisa las que nunca lo hacen",
+                            size=12, color=ft.colors.GREY_500,
+                        ),
                         ft.Container(height=20),
                         ft.Container(
                             content=self.tabla_reglas, 
@@ -468,28 +723,8 @@ class AppUI:
                         ft.Container(height=15),
                         ft.Row(
                             [
-                                ft.ElevatedButton(
-                                    "Nueva Regla", 
-                                    icon=ft.icons.ADD_CIRCLE,
-                                    bgcolor=ft.colors.GREEN_600,
-                                    color=ft.colors.WHITE,
-                                    style=ft.ButtonStyle(
-                                        padding=15,
-                                        shape=ft.RoundedRectangleBorder(radius=8),
-                                    ),
-                                    on_click=self._agregar_regla
-                                ),
-                                ft.ElevatedButton(
-                                    "Guardar Reglas", 
-                                    icon=ft.icons.SAVE,
-                                    bgcolor=ft.colors.INDIGO_600,
-                                    color=ft.colors.WHITE,
-                                    style=ft.ButtonStyle(
-                                        padding=15,
-                                        shape=ft.RoundedRectangleBorder(radius=8),
-                                    ),
-                                    on_click=self._guardar_reglas
-                                ),
+                                self.btn_nueva_regla,
+                                self.btn_guardar_reglas,
                             ],
                             alignment=ft.MainAxisAlignment.END,
                             spacing=15,
@@ -504,11 +739,22 @@ class AppUI:
         )
         return ft.Container(content=card, padding=25, expand=True, visible=False)
 
+    def _exclusiones_guardadas(self) -> str:
+        """Exclusiones de la configuración del usuario (lista JSON o texto), o las de por defecto."""
+        valor = self.configuraciones.get("exclusiones_vacias")
+        if not valor:
+            return ", ".join(EXCLUSIONES_POR_DEFECTO)
+        try:
+            lista = json.loads(valor)
+        except ValueError:
+            return valor
+        return ", ".join(lista) if isinstance(lista, list) else valor
+
     def _build_seccion_vacias(self) -> ft.Container:
         """Sección de carpetas vacías."""
         self.txt_exclusiones = ft.TextField(
             label="Excluir Carpetas (separadas por coma)",
-            value=", ".join(EXCLUSIONES_POR_DEFECTO),
+            value=self._exclusiones_guardadas(),
             expand=True,
             border_radius=8,
             filled=True,
@@ -517,6 +763,24 @@ class AppUI:
             hint_text="Ej: .git, node_modules, __pycache__"
         )
         self.lista_vacias = ft.ListView(expand=True, spacing=5)
+        self.txt_patron_vacias = ft.TextField(
+            label="Patrón",
+            hint_text="Ej: node_modules o */tmp/*",
+            expand=True,
+            dense=True,
+            border_radius=8,
+            on_submit=lambda e: self._seleccionar_vacias_patron(True),
+        )
+        self.txt_resumen_vacias = ft.Text("", size=12, color=ft.colors.GREY_700)
+        self.txt_pagina_vacias = ft.Text("", size=12)
+        self.btn_pagina_anterior = ft.IconButton(
+            ft.icons.CHEVRON_LEFT, tooltip="Página anterior", disabled=True,
+            on_click=lambda e: self._cambiar_pagina_vacias(-1),
+        )
+        self.btn_pagina_siguiente = ft.IconButton(
+            ft.icons.CHEVRON_RIGHT, tooltip="Página siguiente", disabled=True,
+            on_click=lambda e: self._cambiar_pagina_vacias(1),
+        )
         self.btn_detectar_vacias = ft.ElevatedButton(
             "Detectar Carpetas Vacías",
             icon=ft.icons.SEARCH,
@@ -567,6 +831,25 @@ class AppUI:
                         ),
                         ft.Container(height=15),
                         ft.Text("Carpetas Vacías Encontradas:", size=16, weight=ft.FontWeight.BOLD),
+                        ft.Row(
+                            [
+                                self.txt_patron_vacias,
+                                ft.TextButton("Marcar", on_click=lambda e: self._seleccionar_vacias_patron(True)),
+                                ft.TextButton("Desmarcar", on_click=lambda e: self._seleccionar_vacias_patron(False)),
+                                ft.TextButton("Todas", on_click=lambda e: self._seleccionar_vacias_todas(True)),
+                                ft.TextButton("Ninguna", on_click=lambda e: self._seleccionar_vacias_todas(False)),
+                            ],
+                            spacing=5,
+                        ),
+                        ft.Row(
+                            [
+                                self.txt_resumen_vacias,
+                                ft.Container(expand=True),
+                                self.btn_pagina_anterior,
+                                self.txt_pagina_vacias,
+                                self.btn_pagina_siguiente,
+                            ],
+                        ),
                         ft.Container(
                             content=self.lista_vacias,
                             height=200,
@@ -587,7 +870,18 @@ class AppUI:
     def _build_seccion_historial(self) -> ft.Container:
         """Sección de historial."""
         self.lista_historial = ft.ListView(expand=True, spacing=10)
-        self._cargar_historial()
+        self.sw_historial_archivado = ft.Switch(
+            label="Incluir historial archivado",
+            value=False,
+            on_change=lambda e: self._cargar_historial(),
+        )
+        self.txt_buscar_movimientos = ft.TextField(
+            label="¿Dónde quedó un archivo?",
+            hint_text="Nombre o parte de la ruta (Enter para buscar, vacío para ver el historial)",
+            prefix_icon=ft.icons.SEARCH,
+            border_radius=8,
+            on_submit=self._buscar_movimientos,
+        )
         
         card = ft.Card(
             content=ft.Container(
@@ -602,6 +896,7 @@ class AppUI:
                         ),
                         ft.Text("Revisa y restaura acciones realizadas anteriormente", size=14, color=ft.colors.GREY_600),
                         ft.Container(height=20),
+                        self.txt_buscar_movimientos,
                         ft.Container(
                             content=self.lista_historial,
                             height=400,
@@ -623,8 +918,25 @@ class AppUI:
                                     ),
                                     on_click=lambda e: self._cargar_historial()
                                 ),
+                                ft.OutlinedButton(
+                                    "Exportar",
+                                    icon=ft.icons.DOWNLOAD,
+                                    tooltip="CSV o JSONL (agrega .gz para comprimir); incluye los movimientos de archivos",
+                                    on_click=lambda e: self.selector_exportacion.save_file(
+                                        dialog_title="Exportar historial",
+                                        file_name="historial.csv.gz",
+                                    ),
+                                ),
+                                ft.OutlinedButton(
+                                    "Archivar antiguo",
+                                    icon=ft.icons.ARCHIVE,
+                                    tooltip=f"Pasar a este equipo las acciones de más de {HISTORIAL_RETENCION_DIAS} días",
+                                    on_click=lambda e: self._confirmar_archivado(),
+                                ),
+                                self.sw_historial_archivado,
                             ],
                             alignment=ft.MainAxisAlignment.CENTER,
+                            spacing=20,
                         ),
                     ],
                     spacing=15,
@@ -641,83 +953,149 @@ class AppUI:
         """Maneja selección de carpeta fuente."""
         if e.path:
             self.carpeta_fuente = Path(e.path)
-            self.txt_fuente.value = str(self.carpeta_fuente)
+            if self.txt_fuente is not None:
+                self.txt_fuente.value = str(self.carpeta_fuente)
             self.page.update()
 
     def _elegir_destino(self, e: ft.FilePickerResultEvent):
         """Maneja selección de carpeta destino."""
         if e.path:
             self.carpeta_destino = Path(e.path)
-            self.txt_destino.value = str(self.carpeta_destino)
+            if self.txt_destino is not None:
+                self.txt_destino.value = str(self.carpeta_destino)
             self.page.update()
 
     def _anunciar(self, mensaje: str):
         """Muestra mensajes en snackbar."""
-        self.txt_estado.value = "Listo"
+        if self.txt_estado is not None:
+            self.txt_estado.value = "Listo"
         self.page.show_snack_bar(ft.SnackBar(content=ft.Text(mensaje), duration=3000))
         self.page.update()
 
-    def _actualizar_progreso(self, valor: float):
-        """Actualiza barra de progreso."""
-        self.barra_progreso.value = valor
-        self.barra_progreso.visible = (valor > 0)
-        self.page.update()
+    def _on_cambio_trabajo(self, trabajo: Trabajo):
+        """Refresca la lista de trabajos (limitado a ~5 veces por segundo salvo cambios de estado)."""
+        ahora = time.monotonic()
+        if trabajo.estado == "en_ejecucion" and ahora - self._ultimo_refresco_trabajos < 0.2:
+            return
+        self._ultimo_refresco_trabajos = ahora
+        self._refrescar_trabajos()
 
-    def _congelar_controles(self, congelar: bool):
-        """Habilita/deshabilita controles durante operaciones."""
-        self.btn_clasificar_basico.disabled = congelar
-        self.btn_clasificar_avanzado.disabled = congelar
-        self.btn_detectar_vacias.disabled = congelar
-        self.btn_eliminar_vacias.disabled = congelar if not self._carpetas_vacias_detectadas else False
+    def _refrescar_trabajos(self):
+        """Reconstruye la lista de trabajos y la barra de progreso global."""
+        trabajos = self.coordinador.trabajos()
+        corriendo = [t for t in trabajos if t.estado == "en_ejecucion"]
+        self.barra_progreso.visible = bool(corriendo)
+        self.barra_progreso.value = (
+            sum(t.progreso for t in corriendo) / len(corriendo) if corriendo else 0
+        )
+        self.lista_trabajos.controls = [self._fila_trabajo(t) for t in trabajos[-8:]]
+        self.panel_trabajos.visible = bool(trabajos)
         self.page.update()
 
+    def _fila_trabajo(self, trabajo: Trabajo) -> ft.Row:
+        """Fila de la lista de trabajos con su estado y controles."""
+        etiquetas = {
+            "en_cola": ("En cola", ft.colors.GREY_600),
+            "en_ejecucion": ("En ejecución", ft.colors.INDIGO_600),
+            "completado": ("Completado", ft.colors.GREEN_600),
+            "cancelado": ("Cancelado", ft.colors.ORANGE_600),
+            "error": ("Error", ft.colors.RED_600),
+        }
+        texto, color = etiquetas.get(trabajo.estado, (trabajo.estado, ft.colors.GREY_600))
+        if trabajo.estado == "en_ejecucion" and trabajo.token.pausado:
+            texto = "En pausa"
+        if trabajo.error:
+            texto = f"{texto}: {trabajo.error}"
+        controles = []
+        if not trabajo.terminado:
+            if trabajo.token.pausado:
+                controles.append(ft.IconButton(
+                    ft.icons.PLAY_ARROW, tooltip="Reanudar", icon_size=18,
+                    on_click=lambda e, i=trabajo.id: self.coordinador.reanudar(i),
+                ))
+            else:
+                controles.append(ft.IconButton(
+                    ft.icons.PAUSE, tooltip="Pausar", icon_size=18,
+                    on_click=lambda e, i=trabajo.id: self.coordinador.pausar(i),
+                ))
+            controles.append(ft.IconButton(
+                ft.icons.STOP, tooltip="Detener", icon_size=18, icon_color=ft.colors.RED_600,
+                on_click=lambda e, i=trabajo.id: self.coordinador.detener(i),
+            ))
+        return ft.Row(
+            [
+                ft.Text(f"#{trabajo.id} {trabajo.nombre}", size=12, weight=ft.FontWeight.BOLD, width=260),
+                ft.ProgressBar(value=trabajo.progreso, width=160, height=4, color=color),
+                ft.Text(texto, size=12, color=color, expand=True),
+                *controles,
+            ],
+            spacing=10,
+            vertical_alignment=ft.CrossAxisAlignment.CENTER,
+        )
+
+    def _servicio_clasificacion(self) -> ServicioClasificacion:
+        """Servicio con las opciones elegidas (huellas si hace falta comparar, detector si se pidió)."""
+        politica = self.dd_duplicados.value
+        if politica != "renombrar" and self._almacen_huellas is None:
+            self._almacen_huellas = AlmacenHuellas()
+        if self.chk_contenido.value and self._detector_contenido is None:
+            self._detector_contenido = DetectorContenido()
+        return ServicioClasificacion(
+            self.repo, duplicados=politica,
+            almacen_huellas=self._almacen_huellas if politica != "renombrar" else None,
+            detector_contenido=self._detector_contenido if self.chk_contenido.value else None,
+        )
+
     def _accion_clasificar_basico(self, e):
         """Clasifica archivos por tipo."""
         if not self.carpeta_fuente:
             self._anunciar("Selecciona una carpeta fuente")
             return
-        if self.coordinador.en_ejecucion():
-            self._anunciar("Tarea en ejecución, espera a que termine")
-            return
+        fuente, destino = self.carpeta_fuente, self.carpeta_destino
+        servicio = self._servicio_clasificacion()
 
-        def tarea():
+        def tarea(trabajo: Trabajo):
             try:
-                self._congelar_controles(True)
-                self._actualizar_progreso(0.01)
-                detalle = self.servicio_clasif.clasificar_basico(
-                    self.carpeta_fuente, self.carpeta_destino, progreso_cb=self._actualizar_progreso
+                detalle = servicio.clasificar_basico(
+                    fuente, destino, progreso_cb=trabajo.reportar_progreso, token=trabajo.token,
                 )
-                self._anunciar(f"Clasificación básica completada: {detalle['archivos_movidos']} archivos movidos")
+                estado = "cancelada" if detalle["estado"] == "cancelado" else "completada"
+                self._anunciar(f"Clasificación básica {estado}: {detalle['archivos_movidos']} archivos movidos")
+                return detalle
             finally:
-                self._congelar_controles(False)
-                self._actualizar_progreso(0.0)
                 self._cargar_historial()
 
-        self.coordinador.ejecutar(tarea)
+        self.coordinador.encolar(
+            tarea, nombre=f"Clasificación básica · {fuente.name}", ruta=destino or fuente,
+        )
 
     def _accion_clasificar_avanzado(self, e):
         """Clasifica archivos con reglas personalizadas."""
         if not self.carpeta_fuente:
             self._anunciar("Selecciona una carpeta fuente")
             return
-        if self.coordinador.en_ejecucion():
-            self._anunciar("Tarea en ejecución, espera a que termine")
-            return
+        fuente, destino = self.carpeta_fuente, self.carpeta_destino
+        reglas = list(self.reglas) if self._reglas_cargadas.is_set() else None
+        servicio = self._servicio_clasificacion()
 
-        def tarea():
+        def tarea(trabajo: Trabajo):
             try:
-                self._congelar_controles(True)
-                self._actualizar_progreso(0.01)
-                detalle = self.servicio_clasif.clasificar_avanzado(
-                    self.carpeta_fuente, self.reglas, self.carpeta_destino, progreso_cb=self._actualizar_progreso
+                if reglas is None:
+                    # Se encoló antes de terminar la carga inicial de reglas
+                    self._reglas_cargadas.wait()
+                detalle = servicio.clasificar_avanzado(
+                    fuente, reglas if reglas is not None else list(self.reglas), destino,
+                    progreso_cb=trabajo.reportar_progreso, token=trabajo.token,
                 )
-                self._anunciar(f"Clasificación avanzada completada: {detalle['archivos_movidos']} archivos movidos")
+                estado = "cancelada" if detalle["estado"] == "cancelado" else "completada"
+                self._anunciar(f"Clasificación avanzada {estado}: {detalle['archivos_movidos']} archivos movidos")
+                return detalle
             finally:
-                self._congelar_controles(False)
-                self._actualizar_progreso(0.0)
                 self._cargar_historial()
 
-        self.coordinador.ejecutar(tarea)
+        self.coordinador.encolar(
+            tarea, nombre=f"Clasificación avanzada · {fuente.name}", ruta=destino or fuente,
+        )
 
     def _accion_detectar_vacias(self, e):
         """Detecta carpetas vacías."""
@@ -725,103 +1103,105 @@ class AppUI:
             self._anunciar("Selecciona una carpeta fuente primero")
             return
         
+        fuente = self.carpeta_fuente
         exclusiones = [x.strip() for x in self.txt_exclusiones.value.split(",") if x.strip()]
-        self._carpetas_vacias_detectadas = self.servicio_carpetas.detectar_vacias(self.carpeta_fuente, exclusiones)
-        
-        # Crear lista con checkboxes para selección
-        self.lista_vacias.controls = []
-        for i, carpeta in enumerate(self._carpetas_vacias_detectadas):
-            checkbox = ft.Checkbox(
-                value=True,  # Seleccionado por defecto
-                on_change=lambda e, idx=i: self._toggle_carpeta_seleccion(idx, e.control.value)
-            )
-            self.lista_vacias.controls.append(
-                ft.ListTile(
-                    leading=checkbox,
-                    title=ft.Text(str(carpeta), size=12),
-                    subtitle=ft.Text(f"Ruta: {carpeta.parent}", size=10, color=ft.colors.GREY_600),
-                    trailing=ft.Icon(ft.icons.FOLDER_OPEN, color=ft.colors.ORANGE_600, size=20),
-                )
+
+        def tarea(trabajo: Trabajo):
+            detectadas, escaneo_s = self.servicio_carpetas.detectar_vacias_con_tiempo(
+                fuente, exclusiones, token=trabajo.token,
             )
-        
-        self.btn_eliminar_vacias.disabled = len(self._carpetas_vacias_detectadas) == 0
-        self._anunciar(f"Detectadas {len(self._carpetas_vacias_detectadas)} carpetas vacías")
-        self.page.update()
+            # Todas seleccionadas por defecto; solo se dibuja la página visible
+            self._resultados_vacias = ResultadosSeleccionables(detectadas)
+            # El tiempo de la detección cuenta en la primera eliminación de estos resultados
+            self._escaneo_vacias = (self._resultados_vacias, escaneo_s)
+            self._pagina_vacias = 0
+            self._pintar_vacias()
+            parcial = " (cancelado, resultado parcial)" if trabajo.token.cancelado else ""
+            self._anunciar(f"Detectadas {len(detectadas)} carpetas vacías{parcial}")
+            return detectadas
+
+        # La detección solo lee: no compite por la unidad con las tareas que mueven archivos
+        self.coordinador.encolar(
+            tarea, nombre=f"Detectar vacías · {fuente.name}", prioridad=PRIORIDAD_ALTA,
+        )
 
     def _accion_eliminar_vacias(self, e):
         """Elimina carpetas vacías seleccionadas."""
-        if not self._carpetas_vacias_detectadas:
+        resultados = self._resultados_vacias
+        if not resultados:
             self._anunciar("No hay carpetas vacías para eliminar")
             return
-        if self.coordinador.en_ejecucion():
-            self._anunciar("Tarea en ejecución, espera a que termine")
-            return
-
-        # Obtener carpetas seleccionadas
-        carpetas_seleccionadas = []
-        for i, control in enumerate(self.lista_vacias.controls):
-            if hasattr(control, 'leading') and hasattr(control.leading, 'value') and control.leading.value:
-                carpetas_seleccionadas.append(self._carpetas_vacias_detectadas[i])
 
+        carpetas_seleccionadas = resultados.rutas_seleccionadas()
         if not carpetas_seleccionadas:
             self._anunciar("Selecciona al menos una carpeta para eliminar")
             return
 
-        def tarea():
+        escaneo_s = 0.0
+        if self._escaneo_vacias and self._escaneo_vacias[0] is resultados:
+            escaneo_s = self._escaneo_vacias[1]
+            self._escaneo_vacias = None
+
+        def tarea(trabajo: Trabajo):
             try:
-                self._congelar_controles(True)
-                self._actualizar_progreso(0.01)
                 eliminadas = self.servicio_carpetas.eliminar_vacias(
-                    carpetas_seleccionadas, progreso_cb=self._actualizar_progreso
+                    carpetas_seleccionadas, progreso_cb=trabajo.reportar_progreso, token=trabajo.token,
+                    escaneo_s=escaneo_s,
                 )
                 self._anunciar(f"Eliminadas {len(eliminadas)} carpetas vacías")
                 
-                # Actualizar la lista removiendo las eliminadas
-                carpetas_restantes = [c for c in self._carpetas_vacias_detectadas if c not in eliminadas]
-                self._carpetas_vacias_detectadas = carpetas_restantes
-                
-                if carpetas_restantes:
-                    # Recrear la lista con las carpetas restantes
-                    self.lista_vacias.controls = []
-                    for i, carpeta in enumerate(carpetas_restantes):
-                        checkbox = ft.Checkbox(
-                            value=True,
-                            on_change=lambda e, idx=i: self._toggle_carpeta_seleccion(idx, e.control.value)
-                        )
-                        self.lista_vacias.controls.append(
-                            ft.ListTile(
-                                leading=checkbox,
-                                title=ft.Text(str(carpeta), size=12),
-                                subtitle=ft.Text(f"Ruta: {carpeta.parent}", size=10, color=ft.colors.GREY_600),
-                                trailing=ft.Icon(ft.icons.FOLDER_OPEN, color=ft.colors.ORANGE_600, size=20),
-                            )
-                        )
-                else:
-                    self.lista_vacias.controls.clear()
-                    self.btn_eliminar_vacias.disabled = True
-                    
+                # Quitar solo las filas eliminadas y redibujar la página actual
+                if resultados is self._resultados_vacias:
+                    resultados.eliminar(eliminadas)
+                    self._pintar_vacias()
+                return eliminadas
             finally:
-                self._congelar_controles(False)
-                self._actualizar_progreso(0.0)
                 self._cargar_historial()
                 self.page.update()
 
-        self.coordinador.ejecutar(tarea)
+        self.coordinador.encolar(
+            tarea, nombre=f"Eliminar vacías ({len(carpetas_seleccionadas)})",
+            ruta=carpetas_seleccionadas[0],
+        )
 
     def _refrescar_tabla_reglas(self):
         """Actualiza la tabla de reglas."""
+        if self.tabla_reglas is None:
+            return
         self.tabla_reglas.rows.clear()
+        avisos = {h.indice: h.mensaje for h in analizar(self.reglas)}
         for i, regla in enumerate(self.reglas):
+            perfil = self._perfil_reglas.get(regla.nombre)
+            if perfil and perfil["evaluaciones"]:
+                nunca = not perfil["coincidencias"]
+                celdas_perfil = [
+                    ft.DataCell(ft.Text(str(perfil["evaluaciones"]))),
+                    ft.DataCell(ft.Text(
+                        "nunca" if nunca else
+                        f"{perfil['coincidencias']} ({perfil['coincidencias'] / perfil['evaluaciones']:.0%})",
+                        color=ft.colors.ORANGE_700 if nunca else None,
+                    )),
+                    ft.DataCell(ft.Text(f"{perfil['ms']:.1f}")),
+                ]
+            else:
+                celdas_perfil = [ft.DataCell(ft.Text("—")) for _ in range(3)]
             self.tabla_reglas.rows.append(
                 ft.DataRow(
                     cells=[
-                        ft.DataCell(ft.Text(regla.nombre)),
+                        ft.DataCell(
+                            ft.Row([
+                                ft.Icon(ft.icons.WARNING_AMBER, color=ft.colors.ORANGE_700, size=16,
+                                        tooltip=avisos[i]),
+                                ft.Text(regla.nombre),
+                            ], spacing=4) if i in avisos else ft.Text(regla.nombre)
+                        ),
                         ft.DataCell(ft.Text(regla.destino_subcarpeta)),
                         ft.DataCell(ft.Text(", ".join(regla.extensiones))),
                         ft.DataCell(ft.Text(str(regla.tam_min_kb or ""))),
                         ft.DataCell(ft.Text(str(regla.tam_max_kb or ""))),
                         ft.DataCell(ft.Text(regla.fecha_desde or "")),
                         ft.DataCell(ft.Text(regla.fecha_hasta or "")),
+                        *celdas_perfil,
                         ft.DataCell(
                             ft.Row([
                                 ft.IconButton(ft.icons.EDIT, on_click=lambda e, idx=i: self._editar_regla(idx)),
@@ -832,6 +1212,17 @@ class AppUI:
                 )
             )
 
+    def _leer_perfil_reglas(self):
+        """Lee en segundo plano las cifras de cada regla en las últimas ejecuciones."""
+        if not self.repo:
+            return
+        repo = self.repo
+        self._cargar_datos_seccion("reglas", repo.perfil_reglas, self._pintar_perfil_reglas)
+
+    def _pintar_perfil_reglas(self, perfil: Dict[str, Dict[str, float]]):
+        self._perfil_reglas = perfil
+        self._refrescar_tabla_reglas()
+
     def _agregar_regla(self, e):
         """Abre diálogo para agregar nueva regla."""
         nombre = ft.TextField(
@@ -1033,17 +1424,185 @@ class AppUI:
         self.page.update()
 
     def _guardar_reglas(self, e):
-        """Guarda todas las reglas."""
-        self.servicio_reglas.guardar(self.reglas)
-        self._anunciar("Reglas guardadas correctamente")
+        """Guarda todas las reglas y avisa de las sombreadas, solapadas o inalcanzables."""
+        hallazgos = self.servicio_reglas.guardar(self.reglas)
+        if not hallazgos:
+            self._anunciar("Reglas guardadas correctamente")
+            return
+        self._mostrar_hallazgos_reglas(hallazgos)
+
+    def _mostrar_hallazgos_reglas(self, hallazgos: List[Hallazgo]):
+        """Diálogo con los avisos del análisis de reglas."""
+        iconos = {
+            "inalcanzable": (ft.icons.BLOCK, ft.colors.RED_600),
+            "sombreada": (ft.icons.VISIBILITY_OFF, ft.colors.ORANGE_700),
+            "solapada": (ft.icons.CALL_SPLIT, ft.colors.AMBER_700),
+        }
+        dialog = ft.AlertDialog(
+            title=ft.Row(
+                [
+                    ft.Icon(ft.icons.WARNING_AMBER, color=ft.colors.ORANGE_700),
+                    ft.Text("Reglas guardadas con avisos", size=18, weight=ft.FontWeight.BOLD)
+                ],
+                spacing=10
+            ),
+            content=ft.Container(
+                content=ft.Column(
+                    [
+                        ft.Text("Se prueban en orden y gana la primera que coincide. "
+                                "Las sombreadas e inalcanzables no se evalúan al clasificar.",
+                                size=12, color=ft.colors.GREY_600),
+                        *[
+                            ft.Row(
+                                [
+                                    ft.Icon(iconos[h.tipo][0], color=iconos[h.tipo][1], size=18),
+                                    ft.Text(h.mensaje, size=13, expand=True),
+                                ],
+                                spacing=8,
+                            )
+                            for h in hallazgos
+                        ],
+                    ],
+                    spacing=8,
+                    tight=True,
+                    scroll=ft.ScrollMode.AUTO,
+                ),
+                width=450,
+                padding=10
+            ),
+            actions=[
+                ft.TextButton("Entendido", on_click=lambda e: self._cerrar_dialogo()),
+            ],
+            actions_alignment=ft.MainAxisAlignment.END,
+        )
+        self.page.dialog = dialog
+        dialog.open = True
+        self.page.update()
+
+    def _confirmar_archivado(self):
+        """Pide confirmación antes de sacar el historial antiguo de la base compartida."""
+        dialog = ft.AlertDialog(
+            title=ft.Text("¿Archivar el historial antiguo?", size=18, weight=ft.FontWeight.BOLD),
+            content=ft.Text(
+                f"Las acciones de más de {HISTORIAL_RETENCION_DIAS} días se guardarán comprimidas en "
+                "este equipo y se borrarán de la base de datos: desde otros equipos ya no se verán.",
+                size=13,
+            ),
+            actions=[
+                ft.TextButton("Cancelar", on_click=lambda e: self._cerrar_dialogo()),
+                ft.TextButton("Archivar", on_click=lambda e: self._encolar_archivado()),
+            ],
+            actions_alignment=ft.MainAxisAlignment.END,
+        )
+        self.page.dialog = dialog
+        dialog.open = True
+        self.page.update()
+
+    def _cerrar_dialogo(self):
+        self.page.dialog.open = False
+        self.page.update()
 
     def _cargar_historial(self):
-        """Carga el historial de acciones."""
-        if not self.repo:
+        """Invalida el historial, el panel de inicio y las cifras de las reglas; se releen ya si están a la vista o al mostrarlos."""
+        for nombre in ("historial", "inicio", "reglas"):
+            self._invalidar_seccion(nombre)
+            if self._seccion_visible(nombre):
+                self._lectores_secciones[nombre]()
+
+    def _exportar_historial(self, e: ft.FilePickerResultEvent):
+        """Exporta el historial en segundo plano al archivo elegido."""
+        if not e.path or not self.repo:
             return
-            
+        ruta = Path(e.path)
+        exportador = ExportadorHistorial(self.repo.user_id)
+        incluir_archivado = bool(self.sw_historial_archivado.value)
+
+        def tarea(trabajo: Trabajo):
+            resultado = exportador.exportar(
+                ruta, incluir_archivado=incluir_archivado,
+                token=trabajo.token, progreso_cb=trabajo.reportar_progreso,
+            )
+            if resultado["estado"] == "cancelado":
+                self._anunciar("Exportación cancelada")
+            else:
+                self._anunciar(
+                    f"Historial exportado: {resultado['acciones']} acciones"
+                    + (f" y {resultado['movimientos']} movimientos" if resultado["ruta_movimientos"] else "")
+                    + f" en {ruta.name}"
+                )
+            return resultado
+
+        self.coordinador.encolar(tarea, nombre=f"Exportar historial · {ruta.name}",
+                                 prioridad=PRIORIDAD_BAJA, ruta=ruta.parent)
+
+    def _buscar_movimientos(self, e):
+        """Busca archivos movidos por nombre o ruta (con el campo vacío vuelve al historial)."""
+        self._busqueda_historial = self.txt_buscar_movimientos.value.strip()
+        self._invalidar_seccion("historial")
+        self._leer_historial()
+
+    def _leer_historial(self):
+        """Lee el historial (o la búsqueda de movimientos) en segundo plano mostrando un indicador de carga."""
+        if not self.repo or self.lista_historial is None:
+            return
+        self.lista_historial.controls = [
+            ft.Container(content=ft.ProgressRing(), alignment=ft.alignment.center, padding=50)
+        ]
+        self.page.update()
+        repo = self.repo
+        texto = self._busqueda_historial
+        if texto:
+            self._cargar_datos_seccion(
+                "historial", lambda: repo.buscar_movimientos(texto),
+                lambda movimientos: self._pintar_movimientos(texto, movimientos),
+            )
+            return
+        incluir_archivado = bool(self.sw_historial_archivado.value)
+        self._cargar_datos_seccion(
+            "historial", lambda: repo.listar(incluir_archivado=incluir_archivado), self._pintar_historial,
+        )
+
+    def _pintar_movimientos(self, texto: str, movimientos: List[dict]):
+        """Dibuja los archivos movidos que coinciden con la búsqueda."""
+        self.lista_historial.controls.clear()
+        if not movimientos:
+            self.lista_historial.controls.append(
+                ft.Container(
+                    content=ft.Text(f"Ningún archivo movido coincide con «{texto}»", size=14, color=ft.colors.GREY_600),
+                    alignment=ft.alignment.center,
+                    padding=50,
+                )
+            )
+            return
+        self.lista_historial.controls.append(
+            ft.Text(f"{len(movimientos)} resultado(s) para «{texto}»", size=12, color=ft.colors.GREY_600)
+        )
+        for m in movimientos:
+            self.lista_historial.controls.append(
+                ft.Card(
+                    content=ft.Container(
+                        content=ft.ListTile(
+                            leading=ft.Icon(ft.icons.DRIVE_FILE_MOVE, color=ft.colors.TEAL_600, size=24),
+                            title=ft.Text(m["nombre"], size=15, weight=ft.FontWeight.BOLD),
+                            subtitle=ft.Column(
+                                [
+                                    ft.Text(f"Fecha: {m['fecha']}", size=12, color=ft.colors.GREY_600),
+                                    ft.Text(f"Desde: {m['ruta_origen']}", size=12, color=ft.colors.GREY_700, selectable=True),
+                                    ft.Text(f"Ahora en: {m['ruta_destino']}", size=12, color=ft.colors.GREY_800, selectable=True),
+                                ],
+                                spacing=2,
+                            ),
+                        ),
+                        padding=10,
+                    ),
+                    elevation=2,
+                    margin=ft.Margin(0, 5, 0, 5),
+                )
+            )
+
+    def _pintar_historial(self, historial: List[dict]):
+        """Dibuja las filas del historial."""
         self.lista_historial.controls.clear()
-        historial = self.repo.listar()
         
         if not historial:
             self.lista_historial.controls.append(
@@ -1075,10 +1634,20 @@ class AppUI:
                         texto_detalle = f"Regla agregada: {detalle.get('nombre_regla', 'N/A')}"
                     else:
                         texto_detalle = f"Archivos movidos: {detalle.get('archivos_movidos', 0)}"
+                        if detalle.get('duplicados'):
+                            texto_detalle += f" · Duplicados ({detalle.get('politica_duplicados')}): {detalle['duplicados']}"
+                        if detalle.get('por_contenido'):
+                            texto_detalle += f" · Por contenido: {detalle['por_contenido']}"
                 else:
                     icono = ft.icons.FOLDER_OPEN
                     color_icono = ft.colors.ORANGE_600
-                    texto_detalle = f"Carpetas eliminadas: {detalle.get('carpetas_eliminadas', 0)}"
+                    if detalle.get('accion') == 'detectar':
+                        texto_detalle = f"Carpetas vacías encontradas: {detalle.get('carpetas_encontradas', 0)}"
+                    else:
+                        texto_detalle = f"Carpetas eliminadas: {detalle.get('carpetas_eliminadas', 0)}"
+                if detalle.get('estado') == 'cancelado':
+                    texto_detalle += " (cancelado, resultado parcial)"
+                texto_metricas = resumen_metricas(detalle.get('metricas'))
                 
                 # Determinar si se puede restaurar
                 puede_restaurar = bool(item.get("ruta_cuarentena"))
@@ -1088,7 +1657,8 @@ class AppUI:
                         content=ft.ListTile(
                             leading=ft.Icon(icono, color=color_icono, size=24),
                             title=ft.Text(
-                                f"{item['tipo'].replace('_', ' ').title()}",
+                                f"{item['tipo'].replace('_', ' ').title()}"
+                                + (" · archivado" if item.get("archivado") else ""),
                                 size=16,
                                 weight=ft.FontWeight.BOLD
                             ),
@@ -1096,6 +1666,8 @@ class AppUI:
                                 [
                                     ft.Text(f"Fecha: {item['fecha']}", size=12, color=ft.colors.GREY_600),
                                     ft.Text(texto_detalle, size=12, color=ft.colors.GREY_700),
+                                    *([ft.Text(texto_metricas, size=11, color=ft.colors.GREY_500)]
+                                      if texto_metricas else []),
                                 ],
                                 spacing=2,
                             ),
@@ -1118,8 +1690,6 @@ class AppUI:
                     margin=ft.Margin(0, 5, 0, 5),
                 )
                 self.lista_historial.controls.append(fila)
-        
-        self.page.update()
 
     def _restaurar_desde_historial(self, ruta_cuarentena: Optional[str]):
         """Restaura una carpeta desde el historial."""
@@ -1203,10 +1773,65 @@ class AppUI:
         dialog.open = True
         self.page.update()
 
+    def _pintar_vacias(self):
+        """Dibuja solo la página visible de carpetas vacías y el resumen de selección."""
+        resultados = self._resultados_vacias
+        self.lista_vacias.controls = []
+        if resultados is None:
+            return
+        paginas = resultados.paginas(VACIAS_POR_PAGINA)
+        self._pagina_vacias = min(self._pagina_vacias, paginas - 1)
+        for i, carpeta, seleccionada in resultados.pagina(self._pagina_vacias, VACIAS_POR_PAGINA):
+            checkbox = ft.Checkbox(
+                value=seleccionada,
+                on_change=lambda e, idx=i: self._toggle_carpeta_seleccion(idx, e.control.value)
+            )
+            self.lista_vacias.controls.append(
+                ft.ListTile(
+                    leading=checkbox,
+                    title=ft.Text(str(carpeta), size=12),
+                    subtitle=ft.Text(f"Ruta: {carpeta.parent}", size=10, color=ft.colors.GREY_600),
+                    trailing=ft.Icon(ft.icons.FOLDER_OPEN, color=ft.colors.ORANGE_600, size=20),
+                )
+            )
+        self.txt_pagina_vacias.value = f"{self._pagina_vacias + 1} / {paginas}"
+        self.btn_pagina_anterior.disabled = self._pagina_vacias == 0
+        self.btn_pagina_siguiente.disabled = self._pagina_vacias >= paginas - 1
+        self._actualizar_resumen_vacias()
+
+    def _actualizar_resumen_vacias(self):
+        resultados = self._resultados_vacias
+        total = len(resultados) if resultados else 0
+        seleccionadas = resultados.seleccionadas() if resultados else 0
+        self.txt_resumen_vacias.value = f"{seleccionadas} de {total} seleccionadas"
+        self.btn_eliminar_vacias.disabled = seleccionadas == 0
+
+    def _cambiar_pagina_vacias(self, delta: int):
+        self._pagina_vacias = max(0, self._pagina_vacias + delta)
+        self._pintar_vacias()
+        self.page.update()
+
+    def _seleccionar_vacias_patron(self, valor: bool):
+        """Marca o desmarca todas las carpetas (de todas las páginas) que casan con el patrón."""
+        if not self._resultados_vacias:
+            return
+        cambiadas = self._resultados_vacias.seleccionar_patron(self.txt_patron_vacias.value or "", valor)
+        self._pintar_vacias()
+        self._anunciar(f"{'Marcadas' if valor else 'Desmarcadas'} {cambiadas} carpetas")
+
+    def _seleccionar_vacias_todas(self, valor: bool):
+        if not self._resultados_vacias:
+            return
+        self._resultados_vacias.seleccionar_todas(valor)
+        self._pintar_vacias()
+        self.page.update()
+
     def _toggle_carpeta_seleccion(self, index: int, selected: bool):
         """Maneja la selección/deselección de carpetas vacías."""
-        # Aquí podrías implementar lógica adicional si necesitas
-        # Por ahora solo actualizamos la interfaz
+        if self._resultados_vacias is None:
+            return
+        self._resultados_vacias.seleccionar(index, selected)
+        self._actualizar_resumen_vacias()
         self.page.update()
 
     def _build_seccion_premium(self) -> ft.Container:
@@ -0,0 +1,281 @@
+# organizador_inteligente/vigilancia.py
+# -------------------------------------------------------------
+# Vigilancia de carpetas: clasificación incremental de archivos nuevos
+# - Linux: inotify (vía ctypes, sin dependencias extra).
+# - Resto de plataformas o si inotify falla: sondeo periódico.
+# - Los eventos se agrupan (debounce) y se clasifican por lotes con
+#   las mismas reglas que ServicioClasificacion.
+# -------------------------------------------------------------
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from config import (
+    CATEGORIAS, EXCLUSIONES_POR_DEFECTO,
+    VIGILANCIA_DEBOUNCE_S, VIGILANCIA_INTERVALO_SONDEO_S, VIGILANCIA_MAX_LOTE,
+)
+from metricas import VIGILANCIA_LATIDO, VIGILANCIA_PENDIENTES
+from models import ReglaClasificacion
+from tareas import TokenCancelacion
+
+# Constantes de <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+_MASCARA = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE_SELF | IN_ONLYDIR
+_EVENTO = struct.Struct("iIII")
+
+
+def inotify_disponible() -> bool:
+    """Indica si el sistema ofrece inotify."""
+    if not sys.platform.startswith("linux"):
+        return False
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        return hasattr(libc, "inotify_init1")
+    except OSError:
+        return False
+
+
+class FuenteInotify:
+    """Entrega rutas de archivos cerrados tras escritura o movidos a la carpeta vigilada."""
+    def __init__(self, carpeta: Path, recursiva: bool, excluir: Callable[[Path], bool]):
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.recursiva = recursiva
+        self.excluir = excluir
+        self.desbordado = False
+        self._carpetas: Dict[int, str] = {}
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self._vigilar(str(carpeta))
+
+    def _vigilar(self, carpeta: str) -> List[str]:
+        """Agrega un watch (y sus subcarpetas si es recursiva); devuelve archivos ya presentes."""
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(carpeta), _MASCARA)
+        if wd < 0:
+            return []
+        self._carpetas[wd] = carpeta
+        presentes = []
+        if self.recursiva:
+            try:
+                with os.scandir(carpeta) as it:
+                    for entrada in it:
+                        if entrada.is_dir(follow_symlinks=False):
+                            if not self.excluir(Path(entrada.path)):
+                                presentes.extend(self._vigilar(entrada.path))
+                        elif entrada.is_file(follow_symlinks=False):
+                            presentes.append(entrada.path)
+            except OSError:
+                pass
+        return presentes
+
+    def esperar(self, timeout: float) -> List[str]:
+        """Espera eventos hasta ``timeout`` segundos y devuelve las rutas afectadas."""
+        listos, _, _ = select.select([self.fd], [], [], timeout)
+        if not listos:
+            return []
+        try:
+            datos = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        rutas = []
+        pos = 0
+        while pos + _EVENTO.size <= len(datos):
+            wd, mascara, _cookie, largo = _EVENTO.unpack_from(datos, pos)
+            nombre = datos[pos + _EVENTO.size:pos + _EVENTO.size + largo].rstrip(b"\0")
+            pos += _EVENTO.size + largo
+            if mascara & IN_Q_OVERFLOW:
+                self.desbordado = True
+                continue
+            if mascara & IN_IGNORED:
+                self._carpetas.pop(wd, None)
+                continue
+            carpeta = self._carpetas.get(wd)
+            if carpeta is None or not nombre:
+                continue
+            ruta = os.path.join(carpeta, os.fsdecode(nombre))
+            if mascara & IN_ISDIR:
+                if self.recursiva and mascara & (IN_CREATE | IN_MOVED_TO) and not self.excluir(Path(ruta)):
+                    # Los archivos creados antes de registrar el watch no generan evento
+                    rutas.extend(self._vigilar(ruta))
+            elif mascara & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                rutas.append(ruta)
+        return rutas
+
+    def cerrar(self):
+        """Libera el descriptor de inotify."""
+        os.close(self.fd)
+
+
+class FuenteSondeo:
+    """Alternativa portátil: compara instantáneas y reporta archivos estables entre dos sondeos."""
+    def __init__(self, carpeta: Path, recursiva: bool, excluir: Callable[[Path], bool],
+                 intervalo_s: float = VIGILANCIA_INTERVALO_SONDEO_S):
+        self.carpeta = carpeta
+        self.recursiva = recursiva
+        self.excluir = excluir
+        self.intervalo_s = intervalo_s
+        self.desbordado = False
+        self._vistos = self._escanear()
+        self._candidatos: Dict[str, Tuple[int, int]] = {}
+        self._proximo = time.monotonic() + intervalo_s
+
+    def _escanear(self) -> Dict[str, Tuple[int, int]]:
+        firmas: Dict[str, Tuple[int, int]] = {}
+        pendientes = [str(self.carpeta)]
+        while pendientes:
+            carpeta = pendientes.pop()
+            try:
+                with os.scandir(carpeta) as it:
+                    for entrada in it:
+                        try:
+                            if entrada.is_file(follow_symlinks=False):
+                                st = entrada.stat(follow_symlinks=False)
+                                firmas[entrada.path] = (st.st_size, st.st_mtime_ns)
+                            elif self.recursiva and entrada.is_dir(follow_symlinks=False):
+                                if not self.excluir(Path(entrada.path)):
+                                    pendientes.append(entrada.path)
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+        return firmas
+
+    def esperar(self, timeout: float) -> List[str]:
+        """Duerme hasta el próximo sondeo (o ``timeout``) y devuelve los archivos nuevos ya estables."""
+        restante = self._proximo - time.monotonic()
+        if restante > timeout:
+            time.sleep(max(0.0, timeout))
+            return []
+        time.sleep(max(0.0, restante))
+        self._proximo = time.monotonic() + self.intervalo_s
+        actual = self._escanear()
+        nuevos = []
+        for ruta, firma in actual.items():
+            if self._vistos.get(ruta) == firma:
+                continue
+            if self._candidatos.get(ruta) == firma:
+                # Sin cambios entre dos sondeos: se considera terminada la escritura
+                nuevos.append(ruta)
+                self._vistos[ruta] = firma
+                del self._candidatos[ruta]
+            else:
+                self._candidatos[ruta] = firma
+        self._vistos = {r: f for r, f in self._vistos.items() if r in actual}
+        self._candidatos = {r: f for r, f in self._candidatos.items() if r in actual}
+        return nuevos
+
+    def cerrar(self):
+        """Sin recursos que liberar."""
+
+
+class VigilanteCarpetas:
+    """Vigila una carpeta y clasifica incrementalmente los archivos nuevos.
+
+    Los eventos se acumulan hasta que un archivo lleva ``debounce_s`` segundos sin
+    cambios y se clasifican en lotes de hasta ``max_lote`` archivos. Las subcarpetas
+    de destino (reglas y categorías) nunca se vigilan, para no reclasificar lo ya movido.
+    """
+    def __init__(self, servicio, carpeta: Path, reglas: List[ReglaClasificacion],
+                 destino_base: Optional[Path] = None, recursiva: bool = False,
+                 exclusiones: Optional[Iterable[str]] = None,
+                 debounce_s: float = VIGILANCIA_DEBOUNCE_S,
+                 max_lote: int = VIGILANCIA_MAX_LOTE,
+                 intervalo_sondeo_s: float = VIGILANCIA_INTERVALO_SONDEO_S,
+                 forzar_sondeo: bool = False, clasificar_existentes: bool = False):
+        self.servicio = servicio
+        self.carpeta = Path(carpeta)
+        self.reglas = reglas
+        self.destino_base = destino_base or self.carpeta
+        self.recursiva = recursiva
+        self.debounce_s = debounce_s
+        self.max_lote = max_lote
+        self.intervalo_sondeo_s = intervalo_sondeo_s
+        self.forzar_sondeo = forzar_sondeo
+        self.clasificar_existentes = clasificar_existentes
+        self._excluidas: Set[str] = (
+            set(exclusiones or []) | EXCLUSIONES_POR_DEFECTO | set(CATEGORIAS)
+            | {r.destino_subcarpeta for r in reglas}
+        )
+        self.modo: Optional[str] = None
+
+    def _excluir(self, carpeta: Path) -> bool:
+        return carpeta.name in self._excluidas
+
+    def _crear_fuente(self):
+        if not self.forzar_sondeo and inotify_disponible():
+            try:
+                self.modo = "inotify"
+                return FuenteInotify(self.carpeta, self.recursiva, self._excluir)
+            except OSError as e:
+                print(f"inotify no disponible ({e}), se usará sondeo")
+        self.modo = "sondeo"
+        return FuenteSondeo(self.carpeta, self.recursiva, self._excluir, self.intervalo_sondeo_s)
+
+    def _existentes(self) -> List[str]:
+        """Archivos ya presentes en el primer nivel de la carpeta vigilada."""
+        try:
+            with os.scandir(self.carpeta) as it:
+                return [e.path for e in it if e.is_file(follow_symlinks=False)]
+        except OSError:
+            return []
+
+    def ejecutar(self, token: Optional[TokenCancelacion] = None,
+                 al_clasificar: Optional[Callable[[Dict], None]] = None):
+        """Bucle principal; termina cuando el token se cancela."""
+        fuente = self._crear_fuente()
+        pendientes: Dict[str, float] = {}
+        if self.clasificar_existentes:
+            ahora = time.monotonic()
+            pendientes.update((r, ahora) for r in self._existentes())
+        try:
+            while token is None or token.continuar():
+                ahora = time.monotonic()
+                if pendientes:
+                    timeout = max(0.0, self.debounce_s - (ahora - min(pendientes.values())))
+                else:
+                    timeout = 1.0
+                for ruta in fuente.esperar(timeout):
+                    pendientes[ruta] = time.monotonic()
+                if fuente.desbordado:
+                    # Se perdieron eventos: revisar todo el primer nivel
+                    fuente.desbordado = False
+                    ahora = time.monotonic()
+                    pendientes.update((r, ahora) for r in self._existentes())
+
+                ahora = time.monotonic()
+                listos = [r for r, t in pendientes.items() if ahora - t >= self.debounce_s]
+                for i in range(0, len(listos), self.max_lote):
+                    lote = listos[i:i + self.max_lote]
+                    for ruta in lote:
+                        del pendientes[ruta]
+                    detalle = self.servicio.clasificar_archivos(
+                        [Path(r) for r in lote], self.reglas, self.destino_base
+                    )
+                    if al_clasificar:
+                        al_clasificar(detalle)
+                VIGILANCIA_PENDIENTES.set(len(pendientes))
+                VIGILANCIA_LATIDO.set(time.time())
+        finally:
+            fuente.cerrar()
+
+
+if __name__ == "__main__":
+    # Modo sin interfaz: equivalente a `python -m organizador vigilar ...`
+    from cli import main
+    sys.exit(main(["vigilar", *sys.argv[1:]]))